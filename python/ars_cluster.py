@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+"""Distribute the analyses of an ARS spec across worker processes or machines.
+
+A coordinator splits the spec's analyses into work units (one per analysis)
+and hands them to workers over a transport:
+
+* ``tcp`` – workers connect to the coordinator's socket and receive units
+  as newline-delimited JSON messages.
+* ``fs`` – units are files in a queue directory on a shared file system;
+  workers claim them with an atomic rename and drop results next to them.
+
+Workers run ``build_analysis_ard`` from ``ars_to_ard`` and stream each ARD
+table back. The coordinator writes ARDs in analysis order regardless of
+completion order, re-queues units whose worker disconnects or whose lease
+expires, and writes a per-unit timing report. Workers renew a unit's lease
+with a heartbeat every ``HEARTBEAT_SECONDS`` while it runs. Like ``ars_to_ard.py`` this module only
+needs the standard library. Every machine must see the data directory at
+the same path.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from ars_runtime.timings import RunTimer, peak_rss_bytes, write_timings
+from ars_to_ard import (
+    build_analysis_ard,
+    load_analyses,
+    load_datasets,
+    write_ard,
+)
+
+
+# A unit not heard from for this many seconds is presumed lost and re-queued.
+DEFAULT_UNIT_TIMEOUT = 30.0
+HEARTBEAT_SECONDS = 1.0
+
+
+@dataclass
+class WorkUnit:
+    """One analysis to run, plus how often it has been handed out."""
+
+    unit_id: int
+    analysis: Mapping[str, object]
+    data_dir: str
+    attempts: int = 0
+
+    def payload(self) -> Dict[str, object]:
+        return {
+            "unit_id": self.unit_id,
+            "analysis": self.analysis,
+            "data_dir": self.data_dir,
+            "attempt": self.attempts,
+        }
+
+
+class UnitScheduler:
+    """Thread-safe bookkeeping of pending, in-flight and finished work units.
+
+    A unit released because its worker was lost goes back to the front of
+    the queue until it has been attempted ``max_retries + 1`` times, after
+    which it is recorded as failed. The first result received for a unit
+    wins; late duplicates from presumed-lost workers are ignored.
+    """
+
+    def __init__(self, units: Sequence[WorkUnit], max_retries: int = 2):
+        self.units = {unit.unit_id: unit for unit in units}
+        self.max_retries = max_retries
+        self._pending: Deque[WorkUnit] = deque(units)
+        self._in_flight: Dict[int, Tuple[str, float]] = {}
+        self._results: Dict[int, Dict[str, object]] = {}
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        with self._cond:
+            return len(self._results) == len(self.units)
+
+    def acquire(self, worker: str) -> Optional[WorkUnit]:
+        """Return the next unit for *worker*, or ``None`` once every unit is resolved."""
+
+        with self._cond:
+            while True:
+                if self._pending:
+                    unit = self._pending.popleft()
+                    unit.attempts += 1
+                    self._in_flight[unit.unit_id] = (worker, time.perf_counter())
+                    return unit
+                if len(self._results) == len(self.units):
+                    return None
+                self._cond.wait(timeout=1.0)
+
+    def complete(self, unit_id: int, result: Dict[str, object]) -> None:
+        with self._cond:
+            dispatched = self._in_flight.pop(unit_id, None)
+            if unit_id in self._results or unit_id not in self.units:
+                return
+            self._pending = deque(u for u in self._pending if u.unit_id != unit_id)
+            result = dict(result)
+            result["attempts"] = self.units[unit_id].attempts
+            if dispatched is not None:
+                result["round_trip_seconds"] = round(time.perf_counter() - dispatched[1], 6)
+            self._results[unit_id] = result
+            self._cond.notify_all()
+
+    def release(self, unit_id: int, reason: str) -> None:
+        """Return a unit whose worker was lost to the queue, or fail it."""
+
+        with self._cond:
+            if self._in_flight.pop(unit_id, None) is None or unit_id in self._results:
+                return
+            unit = self.units[unit_id]
+            if unit.attempts > self.max_retries:
+                self._results[unit_id] = {
+                    "status": "failed",
+                    "error": f"worker lost on {unit.attempts} attempt(s): {reason}",
+                    "attempts": unit.attempts,
+                }
+            else:
+                self._pending.appendleft(unit)
+            self._cond.notify_all()
+
+    def wait_result(self, unit_id: int) -> Dict[str, object]:
+        with self._cond:
+            while unit_id not in self._results:
+                self._cond.wait(timeout=1.0)
+            return self._results[unit_id]
+
+
+def execute_unit(
+    payload: Mapping[str, object],
+    worker: str,
+    cache: Dict[str, Mapping[str, Sequence[Mapping[str, object]]]],
+) -> Dict[str, object]:
+    """Run one unit on a worker; datasets are cached per data directory."""
+
+    start = time.perf_counter()
+    cpu = time.process_time()
+    result: Dict[str, object] = {"unit_id": payload["unit_id"], "worker": worker}
+    try:
+        data_dir = str(payload["data_dir"])
+        if data_dir not in cache:
+            cache[data_dir] = load_datasets(Path(data_dir))
+        metrics: Dict[str, object] = {}
+        table = build_analysis_ard(
+            payload["analysis"], cache[data_dir], metrics=metrics  # type: ignore[arg-type]
+        )
+        result["status"] = "ok"
+        result["rows_in"] = metrics.get("rows_in")
+        result["analysis_id"] = metrics.get("analysis_id")
+        if table is not None:
+            file_name, fieldnames, rows = table
+            result["table"] = {"file_name": file_name, "fieldnames": fieldnames, "rows": rows}
+            result["rows"] = len(rows)
+    except Exception as exc:  # reported back instead of killing the worker
+        result["status"] = "error"
+        result["error"] = f"{type(exc).__name__}: {exc}"
+    result["compute_seconds"] = round(time.perf_counter() - start, 6)
+    result["cpu_seconds"] = round(time.process_time() - cpu, 6)
+    result["peak_rss_bytes"] = peak_rss_bytes()
+    return result
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _execute_with_heartbeat(
+    payload: Mapping[str, object],
+    worker: str,
+    cache: Dict[str, Mapping[str, Sequence[Mapping[str, object]]]],
+    beat: Callable[[], None],
+    interval: float,
+) -> Dict[str, object]:
+    """``execute_unit`` while *beat* renews the unit's lease every *interval* seconds."""
+
+    stop = threading.Event()
+
+    def renew() -> None:
+        while not stop.wait(interval):
+            try:
+                beat()
+            except OSError:
+                return
+
+    thread = threading.Thread(target=renew, name="ars-heartbeat", daemon=True)
+    thread.start()
+    try:
+        return execute_unit(payload, worker, cache)
+    finally:
+        stop.set()
+        thread.join()
+
+
+# --- TCP transport -----------------------------------------------------------
+
+
+def _send(stream, message: Mapping[str, object]) -> None:
+    stream.write(json.dumps(message).encode("utf-8") + b"\n")
+    stream.flush()
+
+
+def _receive(stream) -> Optional[Dict[str, object]]:
+    line = stream.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+class _UnitHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        scheduler: UnitScheduler = self.server.scheduler  # type: ignore[attr-defined]
+        timeout: Optional[float] = self.server.unit_timeout  # type: ignore[attr-defined]
+        hello = _receive(self.rfile) or {}
+        worker = str(hello.get("worker") or "%s:%s" % self.client_address)
+        unit: Optional[WorkUnit] = None
+        try:
+            while True:
+                unit = scheduler.acquire(worker)
+                if unit is None:
+                    _send(self.wfile, {"type": "done"})
+                    return
+                # The timeout is the lease: each heartbeat line renews it.
+                self.connection.settimeout(timeout)
+                _send(self.wfile, dict(unit.payload(), type="unit"))
+                message = _receive(self.rfile)
+                while message is not None and message.get("type") == "heartbeat":
+                    message = _receive(self.rfile)
+                if message is None:
+                    raise ConnectionError("worker disconnected")
+                scheduler.complete(unit.unit_id, message["result"])  # type: ignore[arg-type]
+                unit = None
+        except (OSError, ValueError, KeyError) as exc:
+            if unit is not None:
+                scheduler.release(unit.unit_id, f"{type(exc).__name__}: {exc}")
+
+
+class _UnitServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def serve_tcp(
+    scheduler: UnitScheduler, bind: Tuple[str, int], unit_timeout: Optional[float]
+) -> _UnitServer:
+    server = _UnitServer(bind, _UnitHandler)
+    server.scheduler = scheduler  # type: ignore[attr-defined]
+    server.unit_timeout = unit_timeout  # type: ignore[attr-defined]
+    threading.Thread(target=server.serve_forever, name="ars-coordinator", daemon=True).start()
+    return server
+
+
+def run_tcp_worker(
+    address: Tuple[str, int],
+    connect_timeout: float = 30.0,
+    heartbeat: float = HEARTBEAT_SECONDS,
+) -> None:
+    name = worker_name()
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            sock = socket.create_connection(address)
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+    cache: Dict[str, Mapping[str, Sequence[Mapping[str, object]]]] = {}
+    try:
+        with sock, sock.makefile("rwb") as stream:
+            lock = threading.Lock()
+
+            def send(message: Mapping[str, object]) -> None:
+                with lock:
+                    _send(stream, message)
+
+            send({"type": "hello", "worker": name})
+            while True:
+                message = _receive(stream)
+                if message is None or message.get("type") == "done":
+                    return
+                result = _execute_with_heartbeat(
+                    message, name, cache, lambda: send({"type": "heartbeat"}), heartbeat
+                )
+                send({"type": "result", "result": result})
+    except ConnectionError:
+        # The coordinator shut down after the last unit was resolved.
+        return
+
+
+# --- Shared file-system transport --------------------------------------------
+
+
+def _queue_dirs(queue_dir: Path) -> Tuple[Path, Path, Path]:
+    dirs = (queue_dir / "todo", queue_dir / "claimed", queue_dir / "done")
+    for directory in dirs:
+        directory.mkdir(parents=True, exist_ok=True)
+    return dirs
+
+
+def _atomic_write_json(path: Path, payload: Mapping[str, object]) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(payload), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def serve_fs(
+    scheduler: UnitScheduler,
+    queue_dir: Path,
+    unit_timeout: Optional[float],
+    poll_interval: float = 0.2,
+) -> threading.Thread:
+    """Publish units to *queue_dir* and collect results until all are resolved.
+
+    A worker writes a ``.lease`` file beside its claim before renaming the
+    unit into ``claimed/``, so a claim never appears with the stale mtime of
+    its publication, and touches the lease every ``HEARTBEAT_SECONDS``. A
+    claim whose lease is older than *unit_timeout* seconds is treated as lost
+    and republished, subject to the scheduler's retry limit.
+    """
+
+    todo, claimed, done = _queue_dirs(queue_dir)
+    (queue_dir / "STOP").unlink(missing_ok=True)
+
+    def publish() -> None:
+        while True:
+            unit = scheduler.acquire("fs-queue")
+            if unit is None:
+                return
+            _atomic_write_json(todo / f"{unit.unit_id:06d}-{unit.attempts}.json", unit.payload())
+
+    def collect() -> None:
+        while not scheduler.finished:
+            for path in sorted(done.glob("*.json")):
+                try:
+                    result = json.loads(path.read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    continue
+                path.unlink(missing_ok=True)
+                scheduler.complete(int(result["unit_id"]), result)
+            if unit_timeout is not None:
+                now = time.time()
+                for path in claimed.glob("*.json"):
+                    lease = path.with_suffix(".lease")
+                    try:
+                        expired = now - _lease_time(lease, path) > unit_timeout
+                    except OSError:
+                        continue
+                    if expired:
+                        path.unlink(missing_ok=True)
+                        lease.unlink(missing_ok=True)
+                        unit_id = int(path.name.split("-", 1)[0])
+                        scheduler.release(unit_id, "claim timed out")
+            time.sleep(poll_interval)
+        (queue_dir / "STOP").touch()
+        for path in todo.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+    threading.Thread(target=publish, name="ars-fs-publish", daemon=True).start()
+    collector = threading.Thread(target=collect, name="ars-fs-collect", daemon=True)
+    collector.start()
+    return collector
+
+
+def _lease_time(lease: Path, claim: Path) -> float:
+    try:
+        return lease.stat().st_mtime
+    except FileNotFoundError:
+        # The worker is finishing (it removes the claim, then the lease).
+        return claim.stat().st_mtime
+
+
+def run_fs_worker(
+    queue_dir: Path, poll_interval: float = 0.2, heartbeat: float = HEARTBEAT_SECONDS
+) -> None:
+    todo, claimed, done = _queue_dirs(queue_dir)
+    name = worker_name()
+    tag = name.replace(":", "_").replace("/", "_")
+    cache: Dict[str, Mapping[str, Sequence[Mapping[str, object]]]] = {}
+    while True:
+        candidates = sorted(todo.glob("*.json"))
+        if not candidates:
+            if (queue_dir / "STOP").exists():
+                return
+            time.sleep(poll_interval)
+            continue
+        for path in candidates:
+            claim = claimed / f"{path.stem}.{tag}.json"
+            lease = claim.with_suffix(".lease")
+            # The lease exists, freshly stamped, before the claim does.
+            _atomic_write_json(lease, {"worker": name, "claimed_at": time.time()})
+            try:
+                os.rename(path, claim)  # atomic: exactly one worker wins
+            except OSError:
+                lease.unlink(missing_ok=True)
+                continue
+            try:
+                payload = json.loads(claim.read_text(encoding="utf-8"))
+            except OSError:  # the lease expired and the coordinator took it back
+                lease.unlink(missing_ok=True)
+                continue
+            result = _execute_with_heartbeat(
+                payload, name, cache, lambda: os.utime(lease), heartbeat
+            )
+            _atomic_write_json(done / f"{path.stem}.{tag}.json", result)
+            claim.unlink(missing_ok=True)
+            lease.unlink(missing_ok=True)
+            break
+
+
+# --- Coordinator ---------------------------------------------------------------
+
+
+def _parse_address(text: str) -> Tuple[str, int]:
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def spawn_local_workers(count: int, transport_args: List[str]) -> List[subprocess.Popen]:
+    command = [sys.executable, str(Path(__file__).resolve()), "worker"] + transport_args
+    return [subprocess.Popen(command) for _ in range(count)]
+
+
+def coordinate(args: argparse.Namespace) -> None:
+    analyses = load_analyses(args.ars_path, args.data_dir)
+    data_dir = str(args.data_dir.resolve())
+    units = [WorkUnit(index, analysis, data_dir) for index, analysis in enumerate(analyses)]
+    scheduler = UnitScheduler(units, max_retries=args.max_retries)
+    args.out.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    timer = RunTimer()
+
+    server = None
+    if args.transport == "tcp":
+        server = serve_tcp(scheduler, _parse_address(args.bind), args.unit_timeout)
+        host, port = server.server_address[:2]
+        print(f"Coordinator listening on {host}:{port} ({len(units)} unit(s))")
+        worker_args = ["--transport", "tcp", "--connect", f"{host}:{port}"]
+    else:
+        serve_fs(scheduler, args.queue_dir, args.unit_timeout)
+        print(f"Coordinator publishing {len(units)} unit(s) to {args.queue_dir}")
+        worker_args = ["--transport", "fs", "--queue-dir", str(args.queue_dir)]
+    local = spawn_local_workers(args.local_workers, worker_args)
+
+    report: List[Dict[str, object]] = []
+    try:
+        # Results arrive in any order; ARDs are written strictly in unit order.
+        for unit in units:
+            result = scheduler.wait_result(unit.unit_id)
+            table = result.get("table")
+            if result.get("status") == "ok" and isinstance(table, Mapping):
+                write_ard(args.out / str(table["file_name"]), table["fieldnames"], table["rows"])
+                timer.analyses.append(
+                    {
+                        "analysis_id": result.get("analysis_id"),
+                        "file": table["file_name"],
+                        "wall_seconds": result.get("compute_seconds"),
+                        "cpu_seconds": result.get("cpu_seconds"),
+                        "peak_rss_bytes": result.get("peak_rss_bytes"),
+                        "rows_in": result.get("rows_in"),
+                        "rows_out": result.get("rows"),
+                        "worker": result.get("worker"),
+                    }
+                )
+            entry: Dict[str, object] = {
+                "unit_id": unit.unit_id,
+                "analysis_id": unit.analysis.get("analysis_id"),
+            }
+            entry.update((k, v) for k, v in result.items() if k not in {"table", "unit_id"})
+            report.append(entry)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        for process in local:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    summary = {
+        "transport": args.transport,
+        "units": report,
+        "wall_seconds": round(time.perf_counter() - start, 6),
+    }
+    # Per-analysis figures are the workers' own measurements; the run totals
+    # are the coordinator's, so they include dispatch and transfer time.
+    write_timings(args.out, timer.sidecar())
+    report_path = args.report or args.out / "cluster_report.json"
+    report_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    print(f"Wrote: {report_path}")
+
+    failed = [entry for entry in report if entry.get("status") != "ok"]
+    if failed:
+        raise SystemExit(f"{len(failed)} unit(s) failed. See {report_path} for details.")
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    roles = parser.add_subparsers(dest="role", required=True)
+
+    coordinator = roles.add_parser(
+        "coordinator", help="Split an ARS spec into units and collect ARDs"
+    )
+    coordinator.add_argument("--ars", dest="ars_path", type=Path, default=Path("ars.json"))
+    coordinator.add_argument("--data", dest="data_dir", type=Path, default=Path("data"))
+    coordinator.add_argument("--out", type=Path, default=Path("."), help="ARD output directory")
+    coordinator.add_argument(
+        "--report",
+        type=Path,
+        default=None,
+        help="Timing report path (default: OUT/cluster_report.json)",
+    )
+    coordinator.add_argument("--bind", default="127.0.0.1:0", help="TCP address to listen on")
+    coordinator.add_argument(
+        "--max-retries", type=int, default=2, help="Re-dispatches per lost unit"
+    )
+    coordinator.add_argument(
+        "--unit-timeout",
+        type=float,
+        default=DEFAULT_UNIT_TIMEOUT,
+        help="Lease in seconds: a unit whose worker sends no heartbeat (every "
+        f"{HEARTBEAT_SECONDS:g}s) for this long is re-queued (default: %(default)s)",
+    )
+    coordinator.add_argument(
+        "--local-workers", type=int, default=0, help="Also start this many workers on this machine"
+    )
+
+    worker = roles.add_parser("worker", help="Run units handed out by a coordinator")
+    worker.add_argument("--connect", default=None, help="Coordinator TCP address (host:port)")
+
+    for role in (coordinator, worker):
+        role.add_argument("--transport", choices=("tcp", "fs"), default="tcp")
+        role.add_argument(
+            "--queue-dir", type=Path, default=None, help="Shared queue directory (fs)"
+        )
+
+    args = parser.parse_args(argv)
+    if args.transport == "fs" and args.queue_dir is None:
+        parser.error("--queue-dir is required with --transport fs")
+    if args.role == "worker" and args.transport == "tcp" and not args.connect:
+        parser.error("--connect is required for TCP workers")
+    return args
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.role == "coordinator":
+        coordinate(args)
+    elif args.transport == "tcp":
+        run_tcp_worker(_parse_address(args.connect))
+    else:
+        run_fs_worker(args.queue_dir)
+
+
+if __name__ == "__main__":
+    main()
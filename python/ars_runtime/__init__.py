@@ -1,2 +1,9 @@
 __all__ = ["run_ars"]
-from .engine import run_ars
+
+# Resolved on first use so that ``import ars_runtime`` (and the CLI's
+# argument parsing) does not pull in pandas, NumPy or jsonschema.
+def __getattr__(name):
+    if name == "run_ars":
+        from .engine import run_ars
+        return run_ars
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,9 +1,50 @@
 import argparse
-from .engine import run_ars
-p = argparse.ArgumentParser()
-p.add_argument("--spec", required=True)
-p.add_argument("--in", dest="ind", required=True)
-p.add_argument("--out", required=True)
-p.add_argument("--seed", type=int, default=123)
-args = p.parse_args()
-run_ars(args.spec, args.ind, args.out, args.seed)
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--spec", required=True)
+    p.add_argument("--in", dest="ind")
+    p.add_argument("--out")
+    p.add_argument("--seed", type=int, default=123)
+    p.add_argument("--io-threads", type=int, default=2,
+                   help="background threads for loading and writing (0 = run stages sequentially)")
+    p.add_argument("--memory-limit", default=None,
+                   help="budget for intermediate frames, e.g. 12G; colder frames spill to disk")
+    p.add_argument("--spill-dir", default=None,
+                   help="directory for spilled frames (default: system temp dir)")
+    p.add_argument("--derive-cache", default=None,
+                   help="directory for cached derived columns, reused across runs")
+    p.add_argument("--validate-only", action="store_true",
+                   help="validate the spec and exit without loading any data")
+    p.add_argument("--explain", action="store_true",
+                   help="print the planned stages with row, memory and cost estimates as JSON and exit")
+    args = p.parse_args(argv)
+    if args.explain and args.ind is None:
+        p.error("--in is required with --explain")
+    if not (args.validate_only or args.explain) and (args.ind is None or args.out is None):
+        p.error("--in and --out are required unless --validate-only or --explain is given")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Imported after argument parsing so --help and usage errors stay fast.
+    if args.validate_only:
+        from .spec import load_spec, validate_spec
+        validate_spec(load_spec(args.spec))
+        return
+    if args.explain:
+        import json
+        from .spec import load_spec, validate_spec
+        from .explain import explain_spec
+        spec = load_spec(args.spec)
+        validate_spec(spec)
+        print(json.dumps(explain_spec(spec, args.ind), indent=2))
+        return
+    from .engine import run_ars
+    from .memory import parse_size
+    limit = parse_size(args.memory_limit) if args.memory_limit else None
+    run_ars(args.spec, args.ind, args.out, args.seed, io_threads=args.io_threads,
+            memory_limit=limit, spill_dir=args.spill_dir, derive_cache=args.derive_cache)
+
+if __name__ == "__main__":
+    main()
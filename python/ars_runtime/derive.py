@@ -0,0 +1,379 @@
+"""Derived-variable stage.
+
+Specs declare derived columns as ``derivations: [{name, expr, source}]``.
+Derivations on a named source run on the raw (filtered) frame before any
+join, so joined frames carry them; ``source: "ANALYSIS"`` (the default)
+runs on the joined frame.
+Each expression is a restricted Python expression over column names, e.g.
+``AVAL - BASE``, ``cut(AGE, [0, 65, 200], ["<65", ">=65"])`` or
+``where(AVAL > 100, "Y", "N")``. Expressions are parsed and compiled once
+per process into functions that operate on whole columns, never row by row.
+
+Derived columns are cached under a key built from the content hash of the
+input columns they read, so repeated analyses and later runs over unchanged
+data reuse them instead of recomputing them.
+"""
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import operator
+from functools import lru_cache
+from pathlib import Path
+
+CACHE_VERSION = 3
+
+
+class DerivationError(ValueError):
+    """Raised when a derivation cannot be compiled or evaluated."""
+
+
+_BINOPS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+           ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+           ast.Pow: operator.pow}
+_CMPOPS = {ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt,
+           ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge}
+
+
+def _np():
+    import numpy as np
+    return np
+
+
+def _pd():
+    import pandas as pd
+    return pd
+
+
+def _series(value, index):
+    pd = _pd()
+    return value if isinstance(value, pd.Series) else pd.Series(value, index=index)
+
+
+def _where(cond, a, b):
+    index = cond.index
+    return _series(a, index).where(cond.fillna(False).astype(bool), _series(b, index))
+
+
+def _cut(x, breaks, labels=None):
+    # Left-closed bins, as in "[18, 65)", which is how age groups are specified.
+    return _pd().cut(x, bins=list(breaks), labels=list(labels) if labels else None, right=False)
+
+
+def _coalesce(*values):
+    out = values[0]
+    for v in values[1:]:
+        out = _series(out, getattr(v, "index", None)).fillna(v)
+    return out
+
+
+_FUNCS = {
+    "abs": abs,
+    "round": lambda x, n=0: _np().round(x, int(n)),
+    "floor": lambda x: _np().floor(x),
+    "ceil": lambda x: _np().ceil(x),
+    "sqrt": lambda x: _np().sqrt(x),
+    "log": lambda x: _np().log(x),
+    "exp": lambda x: _np().exp(x),
+    "isnull": lambda x: _pd().isna(x),
+    "notnull": lambda x: _pd().notna(x),
+    "number": lambda x: _pd().to_numeric(x, errors="coerce"),
+    "where": _where,
+    "cut": _cut,
+    "coalesce": _coalesce,
+}
+
+
+class _Compiler:
+    """Turn a parsed expression into ``fn(columns) -> Series | scalar``."""
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        self.names: set[str] = set()
+
+    def fail(self, node, what: str):
+        raise DerivationError(f"unsupported {what} in derivation {self.expr!r}")
+
+    def visit(self, node):
+        method = getattr(self, f"visit_{type(node).__name__}", None)
+        if method is None:
+            self.fail(node, type(node).__name__)
+        return method(node)
+
+    def visit_Expression(self, node):
+        return self.visit(node.body)
+
+    def visit_Constant(self, node):
+        value = node.value
+        return lambda cols: value
+
+    def visit_Name(self, node):
+        name = node.id
+        self.names.add(name)
+        return lambda cols: cols[name]
+
+    def visit_List(self, node):
+        items = [self.literal(e) for e in node.elts]
+        return lambda cols: items
+
+    visit_Tuple = visit_List
+
+    def literal(self, node):
+        try:
+            return ast.literal_eval(node)
+        except ValueError:
+            self.fail(node, "non-literal list item")
+
+    def visit_BinOp(self, node):
+        op = _BINOPS.get(type(node.op)) or self.fail(node, "operator")
+        left, right = self.visit(node.left), self.visit(node.right)
+        return lambda cols: op(left(cols), right(cols))
+
+    def visit_UnaryOp(self, node):
+        operand = self.visit(node.operand)
+        if isinstance(node.op, ast.USub):
+            return lambda cols: -operand(cols)
+        if isinstance(node.op, ast.Not):
+            return lambda cols: ~operand(cols)
+        self.fail(node, "unary operator")
+
+    def visit_BoolOp(self, node):
+        parts = [self.visit(v) for v in node.values]
+        op = operator.and_ if isinstance(node.op, ast.And) else operator.or_
+
+        def run(cols):
+            out = parts[0](cols)
+            for part in parts[1:]:
+                out = op(out, part(cols))
+            return out
+        return run
+
+    def visit_Compare(self, node):
+        left = self.visit(node.left)
+        steps = []
+        for op, comparator in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                values = self.literal(comparator)
+                negate = isinstance(op, ast.NotIn)
+                # The literal is the right operand carried into the next link.
+                steps.append((lambda a, b, n=negate: ~a.isin(b) if n else a.isin(b),
+                              lambda cols, v=values: v))
+            else:
+                fn = _CMPOPS.get(type(op)) or self.fail(node, "comparison")
+                steps.append((fn, self.visit(comparator)))
+
+        def run(cols):
+            out, a = None, left(cols)
+            for fn, right in steps:
+                b = right(cols)
+                result = fn(a, b)
+                out = result if out is None else out & result
+                a = b
+            return out
+        return run
+
+    def visit_IfExp(self, node):
+        cond, a, b = self.visit(node.test), self.visit(node.body), self.visit(node.orelse)
+        return lambda cols: _where(cond(cols), a(cols), b(cols))
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCS or node.keywords:
+            self.fail(node, "function call")
+        fn = _FUNCS[node.func.id]
+        args = [self.visit(a) for a in node.args]
+        return lambda cols: fn(*(arg(cols) for arg in args))
+
+
+@lru_cache(maxsize=None)
+def compile_expr(expr: str):
+    """Compile *expr* once; returns ``(fn, referenced_names)``."""
+    try:
+        tree = ast.parse(expr, mode="eval")
+    except SyntaxError as exc:
+        raise DerivationError(f"cannot parse derivation {expr!r}: {exc.msg}") from None
+    compiler = _Compiler(expr)
+    fn = compiler.visit(tree)
+    return fn, frozenset(compiler.names)
+
+
+def derivations_by_source(spec: dict) -> dict:
+    out: dict = {}
+    for d in spec.get("derivations") or []:
+        out.setdefault(d.get("source", "ANALYSIS"), []).append(d)
+    return out
+
+
+def check_sources(spec: dict) -> None:
+    """Raise unless every derivation targets a declared source, or ANALYSIS when joins exist."""
+    known = [s["name"] for s in spec.get("sources", [])] + (["ANALYSIS"] if spec.get("joins") else [])
+    unknown = sorted(set(derivations_by_source(spec)) - set(known))
+    if unknown:
+        raise DerivationError(f"derivations target unknown source(s) {', '.join(unknown)}; "
+                              f"expected one of {', '.join(known) or '(none)'}")
+
+
+def input_columns(derivations: list) -> list:
+    """Columns read from the source frame (names not produced by an earlier derivation)."""
+    produced, needed = set(), []
+    for d in derivations:
+        _, names = compile_expr(d["expr"])
+        needed += sorted(n for n in names if n not in produced and n not in needed)
+        produced.add(d["name"])
+    return needed
+
+
+def content_key(df, derivations: list) -> str:
+    """Hash of the referenced input columns' contents plus the derivation definitions."""
+    pd = _pd()
+    cols = input_columns(derivations)
+    missing = [c for c in cols if c not in df.columns]
+    if missing:
+        raise DerivationError(f"derivations reference unknown column(s): {', '.join(missing)}")
+    h = hashlib.sha256()
+    h.update(json.dumps([CACHE_VERSION, [(d["name"], d["expr"]) for d in derivations],
+                         [(c, str(df[c].dtype)) for c in cols], len(df)]).encode("utf-8"))
+    if cols:
+        h.update(pd.util.hash_pandas_object(df[cols], index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def evaluate(df, derivations: list):
+    """Return a frame holding only the derived columns, aligned to *df*."""
+    pd = _pd()
+    cols = {c: df[c] for c in df.columns}
+    out = {}
+    for d in derivations:
+        fn, _ = compile_expr(d["expr"])
+        try:
+            value = fn(cols)
+        except DerivationError:
+            raise
+        except Exception as exc:
+            raise DerivationError(f"derivation {d['name']!r} failed: {exc}") from exc
+        cols[d["name"]] = out[d["name"]] = _series(value, df.index)
+    return pd.DataFrame(out, index=df.index)
+
+
+def _json_value(value):
+    if value is None:
+        return None
+    if hasattr(value, "item"):  # NumPy scalar
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value if isinstance(value, (str, int, float, bool)) else str(value)
+
+
+class DerivationCache:
+    """Derived columns keyed by ``content_key``; persisted to *directory* if given.
+
+    On disk each entry is a directory holding ``manifest.json`` plus one file
+    per column. Numeric, boolean and datetime columns (and category codes)
+    are ``.npy`` files loaded with ``allow_pickle=False``. Object columns and
+    category labels are JSON. Nothing read from the cache can execute code,
+    so the directory may sit on a shared file system. Interval categories
+    (``cut`` without labels) are stored as their bounds and rebuilt as
+    intervals; other labels that are not plain scalars are kept as text.
+    """
+
+    def __init__(self, directory: str | None = None):
+        self.directory = Path(directory) if directory else None
+        self._memory: dict = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        if key in self._memory:
+            self.hits += 1
+            return self._memory[key]
+        if self.directory is not None and (self.directory / key / "manifest.json").exists():
+            try:
+                derived = self._load(self.directory / key)
+            except (OSError, ValueError, KeyError):
+                derived = None  # unreadable entry: recompute and overwrite
+            if derived is not None:
+                self._memory[key] = derived
+                self.hits += 1
+                return derived
+        self.misses += 1
+        return None
+
+    def put(self, key: str, derived) -> None:
+        self._memory[key] = derived
+        if self.directory is not None:
+            self._save(key, derived.reset_index(drop=True))
+
+    def _save(self, key: str, derived) -> None:
+        import os
+        import shutil
+        import tempfile
+        np, pd = _np(), _pd()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=f".{key}.", dir=self.directory))
+        columns = []
+        for i, name in enumerate(derived.columns):
+            s = derived[name]
+            entry = {"name": name, "dtype": str(s.dtype)}
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                np.save(tmp / f"{i}.npy", s.cat.codes.to_numpy(), allow_pickle=False)
+                categories = s.cat.categories
+                entry.update(kind="category", ordered=bool(s.cat.ordered),
+                             categories=[_json_value(c) for c in categories])
+                if isinstance(categories, pd.IntervalIndex):
+                    entry["intervals"] = {"left": [_json_value(v) for v in categories.left],
+                                          "right": [_json_value(v) for v in categories.right],
+                                          "closed": categories.closed}
+            elif isinstance(s.dtype, np.dtype) and s.dtype.kind in "biufcmM":
+                np.save(tmp / f"{i}.npy", s.to_numpy(), allow_pickle=False)
+                entry["kind"] = "array"
+            else:
+                (tmp / f"{i}.json").write_text(json.dumps([_json_value(v) for v in s.tolist()]))
+                entry["kind"] = "json"
+            columns.append(entry)
+        (tmp / "manifest.json").write_text(json.dumps({"version": CACHE_VERSION, "rows": len(derived),
+                                                       "columns": columns}))
+        target = self.directory / key
+        shutil.rmtree(target, ignore_errors=True)
+        try:
+            os.replace(tmp, target)
+        except OSError:  # another run stored the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _load(self, entry: Path):
+        np, pd = _np(), _pd()
+        manifest = json.loads((entry / "manifest.json").read_text())
+        if manifest.get("version") != CACHE_VERSION:
+            return None
+        out = {}
+        for i, col in enumerate(manifest["columns"]):
+            if col["kind"] == "category":
+                codes = np.load(entry / f"{i}.npy", allow_pickle=False)
+                categories = col["categories"]
+                if "intervals" in col:
+                    bounds = col["intervals"]
+                    categories = pd.IntervalIndex.from_arrays(bounds["left"], bounds["right"],
+                                                              closed=bounds["closed"])
+                dtype = pd.CategoricalDtype(categories, ordered=col["ordered"])
+                out[col["name"]] = pd.Categorical.from_codes(codes, dtype=dtype)
+            elif col["kind"] == "array":
+                out[col["name"]] = np.load(entry / f"{i}.npy", allow_pickle=False)
+            else:
+                values = json.loads((entry / f"{i}.json").read_text())
+                dtype = None if col["dtype"] == "object" else col["dtype"]
+                out[col["name"]] = pd.Series(values, dtype=dtype)
+        return pd.DataFrame(out, index=pd.RangeIndex(manifest["rows"]))
+
+
+def apply_derivations(df, derivations: list, cache: DerivationCache | None = None):
+    """Return *df* with the derived columns appended (or replaced)."""
+    if not derivations:
+        return df
+    key = content_key(df, derivations) if cache is not None else None
+    derived = cache.get(key) if cache is not None else None
+    if derived is None:
+        derived = evaluate(df, derivations)
+        if cache is not None:
+            cache.put(key, derived)
+    derived = derived.set_axis(df.index)
+    return df.assign(**{c: derived[c] for c in derived.columns})
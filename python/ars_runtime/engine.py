@@ -1,17 +1,133 @@
-from .spec import load_spec, validate_spec
-from .io import load_sources, emit_ard
-from .dsl import apply_filters
-from .joins import apply_joins
-from .stats import summarize
-from .metadata import build_metadata
-
-def run_ars(spec_path: str, input_dir: str, output_dir: str, seed: int = 123) -> None:
+# Stage modules are imported inside the functions that need them: importing
+# the engine must stay cheap because the CLI is started thousands of times.
+
+def run_ars(spec_path: str, input_dir: str, output_dir: str, seed: int = 123,
+            io_threads: int = 2, memory_limit: int | None = None,
+            spill_dir: str | None = None, derive_cache: str | None = None) -> None:
+    from .spec import load_spec, validate_spec
+    from .memory import FrameStore
+    from .derive import DerivationCache, check_sources
+    from .timings import RunTimer
     spec = load_spec(spec_path)
     validate_spec(spec)
+    check_sources(spec)
     rng = seed
-    doms = load_sources(spec, input_dir)
-    doms = apply_filters(doms, spec.get("population"))
-    doms = apply_joins(doms, spec.get("joins"))
-    out  = summarize(doms, spec.get("analyses", []))
+    # Intermediates live in a FrameStore: each frame is dropped after its last
+    # planned consumer and cold frames spill to disk beyond memory_limit.
+    frames = FrameStore(limit=memory_limit, spill_dir=spill_dir)
+    frames.plan(_planned_uses(spec))
+    # Derived columns are cached by the content of the columns they read;
+    # with derive_cache set the cache also persists across runs.
+    derived = DerivationCache(derive_cache)
+    timer = RunTimer()
+    try:
+        if io_threads <= 0:
+            _run_sequential(spec, input_dir, output_dir, seed, frames, derived, timer)
+        else:
+            _run_pipelined(spec, input_dir, output_dir, seed, io_threads, frames, derived, timer)
+    finally:
+        frames.close()
+
+def _planned_uses(spec: dict) -> dict:
+    uses = {}
+    for j in spec.get("joins") or []:
+        for side in ("left", "right"):
+            name = j[side]["source"]
+            uses[name] = uses.get(name, 0) + 1
+    for a in spec.get("analyses", []):
+        name = a.get("source", "ANALYSIS")
+        uses[name] = uses.get(name, 0) + 1
+    return uses
+
+def _run_sequential(spec: dict, input_dir: str, output_dir: str, seed: int, frames,
+                    derived, timer) -> None:
+    from .io import load_source, write_table, write_metadata
+    from .timings import write_timings
+    from .dsl import apply_filters
+    from .metadata import build_metadata
+    for s in spec.get("sources", []):
+        name = s["name"]
+        frames.put(name, apply_filters({name: load_source(input_dir, name)}, spec.get("population"))[name])
+    _derive(spec, frames, derived, [s["name"] for s in spec.get("sources", [])])
+    _join(spec, frames)
+    _derive(spec, frames, derived, ["ANALYSIS"])
     meta = build_metadata(engine="Python", spec=spec, seed=seed)
-    emit_ard(out, output_dir, metadata=meta)
+    _validate_outputs(spec, [], meta)
+    for name, table in _summaries(spec, frames, timer):
+        _validate_outputs(spec, [(name, table)])
+        write_table(output_dir, name, table)
+    write_metadata(output_dir, meta)
+    write_timings(output_dir, timer.sidecar())
+
+def _run_pipelined(spec: dict, input_dir: str, output_dir: str, seed: int, io_threads: int,
+                   frames, derived, timer) -> None:
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from .io import write_table, write_metadata
+    from .timings import write_timings
+    from .dsl import apply_filters
+    from .metadata import build_metadata
+    from .pipeline import AsyncWriter, prefetch_sources
+    # Sources load on background threads and are filtered as each one lands;
+    # finished ARD tables drain to disk on a writer thread while the next
+    # analysis is summarised.
+    with ThreadPoolExecutor(max_workers=io_threads, thread_name_prefix="ars-load") as pool, \
+         AsyncWriter(maxsize=io_threads * 2) as writer:
+        pending = prefetch_sources(spec, input_dir, pool)
+        names = {fut: name for name, fut in pending.items()}
+        for fut in as_completed(names):
+            name = names[fut]
+            frames.put(name, apply_filters({name: fut.result()}, spec.get("population"))[name])
+        _derive(spec, frames, derived, list(pending))
+        _join(spec, frames)
+        _derive(spec, frames, derived, ["ANALYSIS"])
+        for name, table in _summaries(spec, frames, timer):
+            _validate_outputs(spec, [(name, table)])
+            writer.submit(write_table, output_dir, name, table)
+        meta = build_metadata(engine="Python", spec=spec, seed=seed)
+        _validate_outputs(spec, [], meta)
+        writer.submit(write_metadata, output_dir, meta)
+        writer.submit(write_timings, output_dir, timer.sidecar())
+
+def _join(spec: dict, frames) -> None:
+    from .joins import apply_joins
+    joins = spec.get("joins")
+    if not joins:
+        return
+    needed = {j[side]["source"] for j in joins for side in ("left", "right")}
+    joined = apply_joins({name: frames.get(name) for name in needed}, joins)
+    frames.put("ANALYSIS", joined["ANALYSIS"])
+    del joined
+    for j in joins:
+        frames.done_with(j["left"]["source"])
+        frames.done_with(j["right"]["source"])
+
+def _derive(spec: dict, frames, cache, sources: list) -> None:
+    from .derive import apply_derivations, derivations_by_source
+    by_source = derivations_by_source(spec)
+    for source in sources:
+        df = frames.get(source) if source in by_source else None
+        # A frame is absent only when nothing downstream reads it (see plan).
+        if df is not None:
+            frames.put(source, apply_derivations(df, by_source[source], cache))
+
+def _summaries(spec: dict, frames, timer):
+    import time
+    from .stats import iter_summaries
+    analyses = spec.get("analyses", [])
+    summaries = iter_summaries(frames, analyses)
+    for a in analyses:
+        source = a.get("source", "ANALYSIS")
+        rows_in = len(frames.get(source, ()))
+        start, cpu = time.perf_counter(), time.process_time()
+        name, table = next(summaries)
+        timer.record(name, start, cpu, rows_in, len(table))
+        frames.done_with(source)
+        yield name, table
+
+def _validate_outputs(spec: dict, tables, metadata: dict | None = None) -> None:
+    from .validation import validate_metadata, validate_table
+    group_by = {a.get("id", a.get("variable")): a.get("group_by", []) for a in spec.get("analyses", [])}
+    for name, table in tables:
+        validate_table(name, table, required=group_by.get(name, []))
+    if metadata is not None:
+        validate_metadata(metadata)
@@ -0,0 +1,212 @@
+"""Execution plan and cost estimates for ``--explain``.
+
+Only the standard library is used so that explaining a spec stays as cheap
+as ``--validate-only``: datasets are probed from their header and a sample
+of leading rows, never fully loaded.
+"""
+from __future__ import annotations
+
+import ast
+import csv
+import math
+import operator
+from pathlib import Path
+
+# Approximate per-cell footprint of a pandas column.
+NUMERIC_CELL_BYTES = 8
+OBJECT_CELL_BYTES = 60
+
+
+def probe_source(path: Path, sample_rows: int = 1000) -> dict:
+    size = path.stat().st_size
+    with path.open(newline="", encoding="utf-8") as handle:
+        header_line = handle.readline()
+        lines = [handle.readline() for _ in range(sample_rows)]
+    lines = [line for line in lines if line.strip()]
+    columns = next(csv.reader([header_line])) if header_line else []
+    sample = list(csv.DictReader([header_line] + lines))
+    if len(lines) < sample_rows:
+        rows = len(lines)
+    else:
+        avg = sum(len(line.encode("utf-8")) for line in lines) / len(lines)
+        rows = int((size - len(header_line.encode("utf-8"))) / max(avg, 1.0))
+    numeric = [c for c in columns if sample and all(_is_number(r.get(c)) for r in sample)]
+    return {"path": str(path), "bytes": size, "columns": columns, "numeric_columns": numeric,
+            "estimated_rows": rows, "sampled_rows": len(sample), "sample": sample}
+
+
+def _is_number(value) -> bool:
+    if value is None or not str(value).strip():
+        return True
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+_COMPARE = {
+    ast.Eq: operator.eq, ast.NotEq: operator.ne,
+    ast.Gt: lambda a, b: float(a) > float(b), ast.GtE: lambda a, b: float(a) >= float(b),
+    ast.Lt: lambda a, b: float(a) < float(b), ast.LtE: lambda a, b: float(a) <= float(b),
+}
+
+
+def _matches(node, row: dict):
+    """Evaluate a population ``where`` node on one sampled row (the legacy engine's grammar)."""
+    if isinstance(node, ast.BoolOp) and isinstance(node.op, (ast.And, ast.Or)):
+        values = [bool(_matches(v, row)) for v in node.values]
+        return all(values) if isinstance(node.op, ast.And) else any(values)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return not _matches(node.operand, row)
+    if isinstance(node, ast.Compare) and all(type(op) in _COMPARE for op in node.ops):
+        left, results = _matches(node.left, row), []
+        for op, comparator in zip(node.ops, node.comparators):
+            right = _matches(comparator, row)
+            results.append(_COMPARE[type(op)](left, right))
+            left = right
+        return all(results)
+    if isinstance(node, ast.Name):
+        return row.get(node.id)
+    if isinstance(node, ast.Constant):
+        return node.value
+    raise ValueError(f"unsupported expression {ast.dump(node)}")
+
+
+def _filter_sample(where: str, frames: dict) -> dict:
+    """Measure *where* on each source's sample and scale its rows; returns the filter stage."""
+    stage = {"stage": "filter", "where": where, "selectivity": 1.0, "sources": {}}
+    try:
+        tree = ast.parse(where, mode="eval").body
+    except SyntaxError as exc:
+        stage["where"] = f"{where} (not evaluable on sample: {exc})"
+        return stage
+    names = {n.id for n in ast.walk(tree) if isinstance(n, ast.Name)}
+    sampled = kept_total = 0
+    for name, frame in frames.items():
+        # Only sources carrying every filter column are filtered.
+        if not frame["sample"] or not names <= set(frame["columns"]):
+            continue
+        try:
+            kept = [r for r in frame["sample"] if _matches(tree, r)]
+        except (ValueError, TypeError) as exc:
+            stage["sources"][name] = f"not evaluable on sample: {exc}"
+            continue
+        selectivity = len(kept) / len(frame["sample"])
+        sampled, kept_total = sampled + len(frame["sample"]), kept_total + len(kept)
+        frame["rows"] = int(round(frame["rows"] * selectivity))
+        frame["sample"] = kept
+        stage["sources"][name] = {"selectivity": round(selectivity, 4),
+                                  "estimated_rows": frame["rows"]}
+    if sampled:
+        stage["selectivity"] = round(kept_total / sampled, 4)
+    return stage
+
+
+def _frame_bytes(rows: int, columns: list, numeric: list) -> int:
+    width = sum(NUMERIC_CELL_BYTES if c in numeric else OBJECT_CELL_BYTES for c in columns)
+    return rows * width
+
+
+def _derive_stages(spec: dict, frames: dict, stages: list, joined: bool) -> None:
+    # Source-scoped derivations run before the joins, ANALYSIS ones after.
+    for d in spec.get("derivations") or []:
+        source = d.get("source", "ANALYSIS")
+        if (source == "ANALYSIS") != joined:
+            continue
+        frame = frames.get(source)
+        if frame is None:
+            stages.append({"stage": "derive", "name": d["name"], "source": source,
+                           "error": f"source '{source}' not available"})
+            continue
+        if d["name"] not in frame["columns"]:
+            frame["columns"] = frame["columns"] + [d["name"]]
+        stages.append({"stage": "derive", "name": d["name"], "source": source, "expr": d["expr"],
+                       "estimated_rows": frame["rows"],
+                       "estimated_memory_bytes": frame["rows"] * OBJECT_CELL_BYTES})
+
+
+def explain_spec(spec: dict, input_dir: str) -> dict:
+    """Return the staged plan ``run_ars`` would execute for *spec* over *input_dir*."""
+    from .registry import DEFAULT_STATISTICS, plan_statistics
+    probes, stages, frames = {}, [], {}
+    for s in spec.get("sources", []):
+        name = s["name"]
+        path = Path(input_dir) / f"{name}.csv"
+        if not path.exists():
+            stages.append({"stage": "load", "source": name, "error": f"{path} not found"})
+            continue
+        p = probes[name] = probe_source(path)
+        frames[name] = {"rows": p["estimated_rows"], "columns": p["columns"],
+                        "numeric": p["numeric_columns"], "sample": p["sample"]}
+        stages.append({"stage": "load", "source": name, "bytes": p["bytes"],
+                       "estimated_rows": p["estimated_rows"],
+                       "estimated_memory_bytes": _frame_bytes(p["estimated_rows"], p["columns"],
+                                                              p["numeric_columns"])})
+
+    population = spec.get("population") or {}
+    if population.get("where"):
+        # Selectivity is measured on the probe samples, as ``ars_to_ard.py --explain`` does.
+        stages.append(_filter_sample(str(population["where"]), frames))
+
+    _derive_stages(spec, frames, stages, joined=False)
+
+    for j in spec.get("joins") or []:
+        left, right = frames.get(j["left"]["source"]), frames.get(j["right"]["source"])
+        if not left or not right:
+            stages.append({"stage": "join", "error": "join source not loaded"})
+            continue
+        how = j.get("type", "inner")
+        rows = left["rows"] if how == "left" else max(left["rows"], right["rows"])
+        columns = left["columns"] + [c for c in right["columns"] if c not in left["columns"]]
+        numeric = left["numeric"] + right["numeric"]
+        frames["ANALYSIS"] = {"rows": rows, "columns": columns, "numeric": numeric,
+                              "sample": left["sample"] + right["sample"]}
+        stages.append({"stage": "join", "left": j["left"]["source"], "right": j["right"]["source"],
+                       "on": j["on"], "type": how, "estimated_rows": rows,
+                       "estimated_memory_bytes": _frame_bytes(rows, columns, numeric)})
+
+    _derive_stages(spec, frames, stages, joined=True)
+
+    analyses, total = [], 0.0
+    for a in spec.get("analyses", []):
+        source = a.get("source", "ANALYSIS")
+        frame = frames.get(source)
+        entry = {"id": a.get("id", a.get("variable")), "source": source}
+        if frame is None:
+            entry["error"] = f"source '{source}' not available"
+            analyses.append(entry)
+            continue
+        gb = a.get("group_by", [])
+        cards = {g: len({r.get(g) for r in frame["sample"] if g in r}) for g in gb}
+        groups = len({tuple(r.get(g) for g in gb) for r in frame["sample"]}) or 1
+        statset = list(a.get("statistics", DEFAULT_STATISTICS))
+        plan = plan_statistics(tuple(statset))
+        sorts = "sorted" in plan.needs
+        cost = frame["rows"] * (len(statset) + (math.log2(frame["rows"] / groups + 1) if sorts else 0))
+        total += cost
+        entry.update({
+            "group_by": gb, "cardinalities": cards, "estimated_groups": groups,
+            "variable": a.get("variable"), "statistics": statset,
+            "kernels": [{"statistic": label,
+                         "kernel": "groupby-sort" if "sorted" in st.needs else "groupby-reduce",
+                         "intermediates": sorted(st.needs)}
+                        for label, st in zip(plan.labels, plan.statistics)],
+            "intermediates": sorted(plan.needs),
+            "estimated_rows_in": frame["rows"], "estimated_rows_out": groups,
+            "estimated_memory_bytes": frame["rows"] * 8 * 2 + groups * len(statset) * 8,
+            "estimated_cost": cost,
+        })
+        analyses.append(entry)
+    for entry in analyses:
+        if "estimated_cost" in entry:
+            entry["relative_cost"] = round(entry["estimated_cost"] / (total or 1.0), 4)
+
+    peak = sum(_frame_bytes(f["rows"], f["columns"], f["numeric"]) for f in frames.values())
+    return {
+        "engine": "ars_runtime",
+        "sources": {n: {k: v for k, v in p.items() if k != "sample"} for n, p in probes.items()},
+        "stages": stages,
+        "analyses": analyses,
+        "estimated_peak_memory_bytes": peak,
+    }
@@ -1,15 +1,25 @@
+import json
 from pathlib import Path
 import pandas as pd
 
+def load_source(input_dir: str, name: str) -> pd.DataFrame:
+    return pd.read_csv(Path(input_dir) / f"{name}.csv")
+
 def load_sources(spec: dict, input_dir: str) -> dict:
     doms = {}
     for s in spec.get("sources", []):
-        p = Path(input_dir) / f"{s['name']}.csv"
-        doms[s["name"]] = pd.read_csv(p)
+        doms[s["name"]] = load_source(input_dir, s["name"])
     return doms
 
-def emit_ard(tables: dict, output_dir: str, metadata: dict):
+def write_table(output_dir: str, name: str, df: pd.DataFrame) -> None:
+    out = Path(output_dir); out.mkdir(parents=True, exist_ok=True)
+    df.to_csv(out / f"{name}.csv", index=False)
+
+def write_metadata(output_dir: str, metadata: dict) -> None:
     out = Path(output_dir); out.mkdir(parents=True, exist_ok=True)
+    (out / "metadata.json").write_text(json.dumps(metadata, indent=2))
+
+def emit_ard(tables: dict, output_dir: str, metadata: dict):
     for name, df in tables.items():
-        df.to_csv(out / f"{name}.csv", index=False)
-    (out / "metadata.json").write_text(__import__("json").dumps(metadata, indent=2))
+        write_table(output_dir, name, df)
+    write_metadata(output_dir, metadata)
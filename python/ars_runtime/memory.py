@@ -0,0 +1,220 @@
+"""Memory budget tracking for intermediate frames.
+
+``FrameStore`` holds the frames that flow between stages, releases each one
+as soon as its last planned consumer is done with it, and spills the least
+recently used frames to disk when resident frames exceed the budget.
+Every column is spilled as an ``.npy`` file and reloaded memory-mapped, so
+a reload only pages in what is actually read. Numeric and datetime columns
+are written as they are; object, string and categorical columns as integer
+codes into their distinct values, which go into ``layout.json``. Nothing is
+pickled. A frame holding values JSON cannot represent exactly (arbitrary
+Python objects) is not spillable and stays resident.
+"""
+from __future__ import annotations
+
+import json
+import math
+import re
+import shutil
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+
+_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(text: str) -> int:
+    """Parse ``"512M"``, ``"16G"``, ``"1.5g"`` or a plain byte count."""
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*", str(text), flags=re.IGNORECASE)
+    if not m:
+        raise ValueError(f"Invalid memory size: {text!r}")
+    return int(float(m.group(1)) * _UNITS[m.group(2).upper()])
+
+
+def frame_nbytes(df) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class FrameStore:
+    """Named frames with reference-counted release and spill-to-disk.
+
+    ``limit=None`` disables spilling; frames are still released when their
+    planned uses (see ``plan``) drop to zero.
+    """
+
+    def __init__(self, limit: int | None = None, spill_dir: str | None = None):
+        self.limit = limit
+        self._spill_root = spill_dir
+        self._spill_dir: Path | None = None
+        self._resident: OrderedDict = OrderedDict()  # name -> frame, LRU first
+        self._sizes: dict[str, int] = {}
+        self._spilled: dict[str, Path] = {}
+        self._uses: dict[str, int] = {}
+        self.peak_bytes = 0
+        self.spill_count = 0
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(self._sizes[name] for name in self._resident)
+
+    def plan(self, uses: dict[str, int]) -> None:
+        """Record how many downstream consumers will read each frame."""
+        for name, count in uses.items():
+            self._uses[name] = self._uses.get(name, 0) + count
+
+    def put(self, name: str, df) -> None:
+        self.discard(name)
+        if self._uses and not self._uses.get(name):
+            return  # nothing downstream reads it
+        self._resident[name] = df
+        self._sizes[name] = frame_nbytes(df)
+        self._enforce(keep=name)
+
+    def get(self, name: str, default=None):
+        if name in self._resident:
+            self._resident.move_to_end(name)
+            return self._resident[name]
+        if name in self._spilled:
+            df = self._reload(self._spilled.pop(name))
+            self._resident[name] = df
+            self._enforce(keep=name)
+            return df
+        return default
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._resident or name in self._spilled
+
+    def done_with(self, name: str) -> None:
+        """Mark one planned use of *name* as finished; release it at zero."""
+        if name not in self._uses:
+            return
+        self._uses[name] -= 1
+        if self._uses[name] <= 0:
+            self.discard(name)
+
+    def discard(self, name: str) -> None:
+        self._resident.pop(name, None)
+        self._sizes.pop(name, None)
+        path = self._spilled.pop(name, None)
+        if path is not None:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def close(self) -> None:
+        self._resident.clear()
+        self._sizes.clear()
+        self._spilled.clear()
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+    def _enforce(self, keep: str) -> None:
+        total = self.resident_bytes
+        if self.limit is not None:
+            for name in list(self._resident):
+                if total <= self.limit:
+                    break
+                if name != keep and self._spill(name):
+                    total -= self._sizes[name]
+        self.peak_bytes = max(self.peak_bytes, total)
+
+    def _spill(self, name: str) -> bool:
+        import pandas as pd
+
+        if self._spill_dir is None:
+            self._spill_dir = Path(tempfile.mkdtemp(prefix="ars-spill-", dir=self._spill_root))
+        df = self._resident[name]
+        path = self._spill_dir / f"{self.spill_count}_{re.sub(r'[^A-Za-z0-9_]', '_', name)}"
+        path.mkdir()
+        try:
+            # Columns are saved by position, so duplicate names round-trip too.
+            columns = [dict(_save_column(path / f"{i}", df.iloc[:, i]), name=column)
+                       for i, column in enumerate(df.columns)]
+            if isinstance(df.index, pd.RangeIndex):
+                r = df.index
+                index = {"range": [r.start, r.stop, r.step], "names": [r.name]}
+            else:
+                levels = [_save_column(path / f"index{i}", pd.Series(df.index.get_level_values(i)))
+                          for i in range(df.index.nlevels)]
+                index = {"levels": levels, "names": list(df.index.names)}
+            layout = json.dumps({"columns": columns, "column_dtype": str(df.columns.dtype),
+                                 "index": index})
+        except _Unspillable:
+            shutil.rmtree(path, ignore_errors=True)
+            return False
+        (path / "layout.json").write_text(layout)
+        del self._resident[name]
+        self._spilled[name] = path
+        self.spill_count += 1
+        return True
+
+    def _reload(self, path: Path):
+        import pandas as pd
+
+        layout = json.loads((path / "layout.json").read_text())
+        spec = layout["index"]
+        if "range" in spec:
+            index = pd.RangeIndex(*spec["range"], name=spec["names"][0])
+        else:
+            levels = [_load_column(path / f"index{i}", entry)
+                      for i, entry in enumerate(spec["levels"])]
+            index = pd.MultiIndex.from_arrays(levels, names=spec["names"])
+            if index.nlevels == 1:
+                index = index.get_level_values(0)
+        columns = {i: _load_column(path / f"{i}", entry)
+                   for i, entry in enumerate(layout["columns"])}
+        df = pd.DataFrame(columns, index=index, copy=False)
+        df.columns = pd.Index([entry["name"] for entry in layout["columns"]],
+                              dtype=layout["column_dtype"])
+        return df
+
+
+class _Unspillable(Exception):
+    """A column holds values that cannot be written without pickling."""
+
+
+_JSON_SCALARS = (str, bool, int, float)
+
+
+def _save_column(stem: Path, s) -> dict:
+    """Write one column or index level to ``<stem>.npy``; returns its layout entry."""
+    import numpy as np
+    import pandas as pd
+
+    dtype = s.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+        np.save(f"{stem}.npy", s.to_numpy(), allow_pickle=False)
+        return {"kind": "npy"}
+    entry: dict = {"kind": "codes", "dtype": str(dtype)}
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes, categories = s.cat.codes.to_numpy(), s.cat.categories.tolist()
+        entry["ordered"] = bool(dtype.ordered)
+    else:
+        codes, uniques = pd.factorize(s.to_numpy(dtype=object), use_na_sentinel=True)
+        categories = list(uniques)
+        missing = s[s.isna()]
+        # Object columns keep whichever missing marker they held (None or NaN).
+        entry["na"] = None if len(missing) and missing.iloc[0] is None else math.nan
+    if not all(isinstance(value, _JSON_SCALARS) for value in categories):
+        raise _Unspillable(str(dtype))
+    entry["categories"] = categories
+    np.save(f"{stem}.npy", codes, allow_pickle=False)
+    return entry
+
+
+def _load_column(stem: Path, entry: dict):
+    """The array written by ``_save_column``; ``.npy`` data stays memory-mapped."""
+    import numpy as np
+    import pandas as pd
+
+    data = np.load(f"{stem}.npy", mmap_mode="r")
+    if entry["kind"] == "npy":
+        return data
+    if entry["dtype"] == "category":
+        return pd.Categorical.from_codes(data, categories=entry["categories"],
+                                         ordered=entry["ordered"])
+    # Code -1 (missing) picks the trailing missing marker.
+    lookup = np.empty(len(entry["categories"]) + 1, dtype=object)
+    lookup[:-1] = entry["categories"]
+    lookup[-1] = entry["na"]
+    values = lookup[data]
+    return values if entry["dtype"] == "object" else pd.array(values, dtype=entry["dtype"])
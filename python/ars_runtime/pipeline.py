@@ -0,0 +1,69 @@
+"""Background helpers that overlap dataset I/O with compute."""
+from __future__ import annotations
+
+import queue
+import threading
+from concurrent.futures import Executor, Future
+from typing import Callable
+
+_STOP = object()
+
+
+def prefetch_sources(spec: dict, input_dir: str, pool: Executor) -> dict[str, Future]:
+    """Schedule every source in *spec* for loading on *pool*, in spec order."""
+    from .io import load_source
+    return {
+        s["name"]: pool.submit(load_source, input_dir, s["name"])
+        for s in spec.get("sources", [])
+    }
+
+
+class AsyncWriter:
+    """Run write jobs on one background thread fed through a bounded queue.
+
+    Jobs run in submission order. ``submit`` blocks once ``maxsize`` jobs are
+    pending so compute cannot run arbitrarily far ahead of the disk. The first
+    failure stops the writer and is re-raised from ``submit`` or ``close``.
+    """
+
+    def __init__(self, maxsize: int = 4):
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, maxsize))
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._drain, name="ard-writer", daemon=True)
+        self._thread.start()
+
+    def _drain(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            if self._error is not None:
+                continue
+            fn, args = job
+            try:
+                fn(*args)
+            except BaseException as exc:  # surfaced to the producer thread
+                self._error = exc
+
+    def submit(self, fn: Callable, *args) -> None:
+        if self._error is not None:
+            raise self._error
+        self._queue.put((fn, args))
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> "AsyncWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        elif self._thread.is_alive():
+            # Stop without raising a write error over the exception in flight.
+            self._queue.put(_STOP)
+            self._thread.join()
@@ -0,0 +1,315 @@
+"""Statistics registry shared by the Python engines.
+
+Each statistic declares which per-group intermediates it reads (``count``,
+``moments``, ``extrema``, ``sorted``) and provides a kernel that turns them
+into a value. The same kernel runs on plain floats, one group at a time
+(``GroupIntermediates``, used by ``ars_to_ard.py``), and on pandas Series
+covering every group at once (``FrameIntermediates``, used by ``stats.py``).
+A statistic is therefore defined once for both engines.
+
+Requested names are resolved to a ``StatPlan`` once per analysis. Only the
+intermediates the plan needs are computed, and all of its quantiles are
+taken in one batched call. New statistics are added with ``register`` or
+``register_family`` and need no change to the engines' group loops.
+
+Only the standard library is imported here. ``FrameIntermediates`` works on
+the pandas objects it is given.
+"""
+from __future__ import annotations
+
+import math
+import re
+import statistics
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+INTERMEDIATES = ("count", "moments", "extrema", "sorted")
+DEFAULT_STATISTICS = ("n", "mean", "sd", "median", "q1", "q3", "min", "max", "se", "cv")
+
+
+@dataclass(frozen=True)
+class Statistic:
+    name: str
+    kernel: Callable
+    needs: FrozenSet[str]
+    probs: Tuple[float, ...] = ()
+
+
+_REGISTRY: Dict[str, Statistic] = {}
+_ALIASES: Dict[str, str] = {}
+_FAMILIES: List[Tuple["re.Pattern[str]", Callable[["re.Match[str]"], Statistic]]] = []
+
+
+def register(name: str, needs: Sequence[str], probs: Sequence[float] = (),
+             aliases: Sequence[str] = ()):
+    """Decorator registering ``kernel(intermediates)`` as statistic *name*."""
+    unknown = set(needs) - set(INTERMEDIATES)
+    if unknown:
+        raise ValueError(f"Unknown intermediates for {name!r}: {sorted(unknown)}")
+
+    def decorator(kernel: Callable) -> Callable:
+        _REGISTRY[name] = Statistic(name, kernel, frozenset(needs), tuple(probs))
+        for alias in aliases:
+            _ALIASES[alias] = name
+        _clear_caches()
+        return kernel
+    return decorator
+
+
+def register_family(pattern: str, factory: Callable[["re.Match[str]"], Statistic]) -> None:
+    """Register parameterised names such as ``p90``; *factory* builds the statistic."""
+    _FAMILIES.append((re.compile(pattern), factory))
+    _clear_caches()
+
+
+def _clear_caches() -> None:
+    # Resolved names and plans are memoised; a new registration may change them.
+    lookup.cache_clear()
+    plan_statistics.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def lookup(keyword: str) -> Statistic:
+    name = keyword.lower()
+    name = _ALIASES.get(name, name)
+    if name in _REGISTRY:
+        return _REGISTRY[name]
+    for pattern, factory in _FAMILIES:
+        match = pattern.fullmatch(name)
+        if match:
+            return factory(match)
+    raise ValueError(f"Unsupported statistic requested in ARS: {keyword}")
+
+
+def supported_statistics() -> List[str]:
+    return sorted(set(_REGISTRY) | set(_ALIASES))
+
+
+@dataclass(frozen=True)
+class StatPlan:
+    """Requested statistics resolved to kernels, with the union of their needs."""
+
+    labels: Tuple[str, ...]
+    statistics: Tuple[Statistic, ...]
+    needs: FrozenSet[str]
+    probs: Tuple[float, ...]
+
+    def evaluate(self, values: Sequence[Optional[float]]) -> List[float]:
+        """Evaluate every statistic for one group of values (``None`` is missing)."""
+        return self.evaluate_intermediates(GroupIntermediates(values))
+
+    def evaluate_intermediates(self, inter: "GroupIntermediates") -> List[float]:
+        if not inter.n:
+            return [stat.kernel(inter) if stat.needs <= {"count"} else math.nan
+                    for stat in self.statistics]
+        return [stat.kernel(inter) for stat in self.statistics]
+
+
+@lru_cache(maxsize=256)
+def plan_statistics(keywords: Tuple[str, ...]) -> StatPlan:
+    """Resolve *keywords* once; the plan keeps the caller's labels in order."""
+    stats = tuple(lookup(k) for k in keywords)
+    needs = frozenset().union(*(s.needs for s in stats)) if stats else frozenset()
+    probs = tuple(sorted({p for s in stats for p in s.probs}))
+    return StatPlan(tuple(keywords), stats, needs, probs)
+
+
+def linear_quantile(sorted_values: Sequence[float], prob: float) -> float:
+    if not sorted_values:
+        return math.nan
+    if prob <= 0:
+        return sorted_values[0]
+    if prob >= 1:
+        return sorted_values[-1]
+
+    h = (len(sorted_values) - 1) * prob
+    lower = math.floor(h)
+    upper = math.ceil(h)
+    if lower == upper:
+        return sorted_values[lower]
+    fraction = h - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+class GroupIntermediates:
+    """Intermediates of one group, each computed on first use and then reused.
+
+    The spread (sd, var) of a single value is *single_value_spread*: NaN as
+    ``Series.std(ddof=1)`` and R's ``sd``, or 0.0 for the stdlib engine's
+    historical output.
+    """
+
+    def __init__(self, values: Sequence[Optional[float]] = (),
+                 single_value_spread: float = math.nan):
+        self.values = values
+        self.single_value_spread = single_value_spread
+
+    @cached_property
+    def cleaned(self) -> List[float]:
+        return [value for value in self.values if value is not None]
+
+    @cached_property
+    def n(self) -> int:
+        return len(self.cleaned)
+
+    @cached_property
+    def n_missing(self) -> int:
+        return len(self.values) - len(self.cleaned)
+
+    @cached_property
+    def mean(self) -> float:
+        return float(statistics.fmean(self.cleaned))
+
+    @cached_property
+    def sd(self) -> float:
+        return float(statistics.stdev(self.cleaned)) if self.n >= 2 else self.single_value_spread
+
+    @cached_property
+    def var(self) -> float:
+        return float(statistics.variance(self.cleaned)) if self.n >= 2 else self.single_value_spread
+
+    @cached_property
+    def sorted_values(self) -> List[float]:
+        return sorted(self.cleaned)
+
+    @cached_property
+    def min(self) -> float:
+        return float(self.sorted_values[0] if "sorted_values" in self.__dict__ else min(self.cleaned))
+
+    @cached_property
+    def max(self) -> float:
+        return float(self.sorted_values[-1] if "sorted_values" in self.__dict__ else max(self.cleaned))
+
+    @cached_property
+    def median(self) -> float:
+        return float(statistics.median(self.sorted_values))
+
+    def quantile(self, prob: float) -> float:
+        return float(linear_quantile(self.sorted_values, prob))
+
+
+class FrameIntermediates:
+    """Intermediates of every group of a pandas ``SeriesGroupBy`` at once.
+
+    Only what *plan* needs is computed: one groupby reduction per
+    intermediate, and a single ``quantile`` call covering all requested
+    probabilities. The median is only computed if a statistic reads it.
+    """
+
+    def __init__(self, grouped, plan: StatPlan):
+        self._grouped = grouped
+        self.index = grouped.size().index
+        if "count" in plan.needs:
+            self.n = grouped.count()
+            self.n_missing = grouped.size() - self.n
+        if "moments" in plan.needs:
+            self.mean = grouped.mean()
+            self.var = grouped.var(ddof=1)
+            self.sd = grouped.std(ddof=1)
+        if "extrema" in plan.needs:
+            self.min = grouped.min()
+            self.max = grouped.max()
+        self._quantiles: Dict[float, object] = {}
+        if "sorted" in plan.needs and plan.probs:
+            # One pass for all probabilities; the last index level is the probability.
+            q = grouped.quantile(list(plan.probs))
+            for prob in plan.probs:
+                self._quantiles[prob] = q.xs(prob, level=-1).reindex(self.index)
+
+    @cached_property
+    def median(self):
+        return self._grouped.median()
+
+    def quantile(self, prob: float):
+        return self._quantiles[prob]
+
+
+def _sqrt(x):
+    return math.sqrt(x) if isinstance(x, (int, float)) else x ** 0.5
+
+
+def _div(a, b):
+    # Division by zero is undefined (NaN) for floats and Series alike.
+    if isinstance(b, (int, float)):
+        return a / b if b else math.nan
+    return (a / b).where(b != 0)
+
+
+@register("n", ["count"], aliases=["count", "n_non_missing", "nnonmiss", "n_nonmiss",
+                                   "nonmissing", "non_missing"])
+def _n(i):
+    return i.n
+
+
+@register("n_missing", ["count"], aliases=["missing", "nmiss", "missing_count"])
+def _n_missing(i):
+    return i.n_missing
+
+
+@register("mean", ["moments"], aliases=["arithmetic_mean"])
+def _mean(i):
+    return i.mean
+
+
+@register("sd", ["moments"], aliases=["stddev", "std", "std_dev"])
+def _sd(i):
+    return i.sd
+
+
+@register("se", ["count", "moments"], aliases=["stderr"])
+def _se(i):
+    return _div(i.sd, _sqrt(i.n))
+
+
+@register("var", ["moments"], aliases=["variance"])
+def _var(i):
+    return i.var
+
+
+@register("cv", ["moments"])
+def _cv(i):
+    # Coefficient of variation in percent, as in the R and SAS engines.
+    return _div(100.0 * i.sd, i.mean)
+
+
+@register("min", ["extrema"])
+def _min(i):
+    return i.min
+
+
+@register("max", ["extrema"])
+def _max(i):
+    return i.max
+
+
+@register("range", ["extrema"])
+def _range(i):
+    return i.max - i.min
+
+
+@register("median", ["sorted"], aliases=["q2"])
+def _median(i):
+    return i.median
+
+
+@register("iqr", ["sorted"], probs=[0.25, 0.75])
+def _iqr(i):
+    return i.quantile(0.75) - i.quantile(0.25)
+
+
+def _percentile(match: "re.Match[str]") -> Statistic:
+    prob = int(match.group(1)) / 100.0
+    return Statistic(match.group(0), lambda i: i.quantile(prob), frozenset(["sorted"]), (prob,))
+
+
+_QUARTILES = {"q1": 0.25, "q3": 0.75, "q4": 1.0}
+
+
+def _quartile(match: "re.Match[str]") -> Statistic:
+    prob = _QUARTILES[match.group(0)]
+    return Statistic(match.group(0), lambda i: i.quantile(prob), frozenset(["sorted"]), (prob,))
+
+
+register_family(r"p(\d+)", _percentile)
+register_family(r"q[134]", _quartile)
@@ -1,19 +1,25 @@
-import numpy as np
 import pandas as pd
 
 def summarize(doms: dict, analyses: list) -> dict:
-    results = {}
+    return dict(iter_summaries(doms, analyses))
+
+def iter_summaries(doms: dict, analyses: list):
+    """Yield ``(table_name, frame)`` per analysis as soon as each is computed."""
+    from .registry import DEFAULT_STATISTICS, FrameIntermediates, plan_statistics
     for a in analyses:
-        df = doms.get(a.get("source","ANALYSIS")).copy()
+        df = doms.get(a.get("source","ANALYSIS"))
         gb = a.get("group_by", [])
         var = a["variable"]
-        statset = a.get("statistics", ["n","mean","sd","median","q1","q3","min","max","se","cv"])
+        # Resolved once per analysis; each statistic is one vectorised kernel
+        # over shared group-wise intermediates (counts, moments, quantiles).
+        plan = plan_statistics(tuple(a.get("statistics", DEFAULT_STATISTICS)))
         g = df.groupby(gb, dropna=False)[var]
-        out = pd.DataFrame(index=g.size().index)
-        if "n" in statset: out["N"] = g.size().values
-        if "mean" in statset: out["MEAN"] = g.mean().values
-        if "sd" in statset: out["SD"] = g.std(ddof=1).values
-        # ... fill others deterministically ...
+        inter = FrameIntermediates(g, plan)
+        out = pd.DataFrame(index=inter.index)
+        # Columns carry the registry name (``std`` -> SD), as ``ars_to_ard.py
+        # --stat-names canonical`` does, so schema rules apply to any alias.
+        for stat in plan.statistics:
+            if stat.name.upper() not in out:
+                out[stat.name.upper()] = stat.kernel(inter)
         out = out.reset_index()
-        results[a.get("id", var)] = out
-    return results
+        yield a.get("id", var), out
@@ -0,0 +1,65 @@
+"""Per-run timing and resource sidecar (``ard_timings.json``).
+
+Every engine writes the same sidecar next to its ARDs so that
+``python/compare_ard.py`` can put engine run times side by side.
+"""
+from __future__ import annotations
+
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+TIMINGS_FILE_NAME = "ard_timings.json"
+
+
+def peak_rss_bytes() -> int | None:
+    """High-water resident set size of this process, or ``None`` where unavailable."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes elsewhere.
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+class RunTimer:
+    """Collects per-analysis wall/CPU time, peak RSS and row counts for one run."""
+
+    def __init__(self, engine: str = "Python"):
+        self.engine = engine
+        self.analyses: list[dict] = []
+        self._start = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def record(self, analysis_id: str, start: float, cpu: float, rows_in: int | None,
+               rows_out: int | None, file: str | None = None) -> None:
+        # analysis_id is the spec's raw id so rows line up across engines.
+        self.analyses.append({
+            "analysis_id": analysis_id,
+            "file": file or f"{analysis_id}.csv",
+            "wall_seconds": round(time.perf_counter() - start, 6),
+            "cpu_seconds": round(time.process_time() - cpu, 6),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "rows_in": rows_in,
+            "rows_out": rows_out,
+        })
+
+    def sidecar(self) -> dict:
+        return {
+            "engine": self.engine,
+            "engine_version": platform.python_version(),
+            "run_datetime": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "wall_seconds": round(time.perf_counter() - self._start, 6),
+            "cpu_seconds": round(time.process_time() - self._cpu, 6),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "analyses": list(self.analyses),
+        }
+
+
+def write_timings(output_dir: str | Path, sidecar: dict, name: str = TIMINGS_FILE_NAME) -> None:
+    out = Path(output_dir); out.mkdir(parents=True, exist_ok=True)
+    (out / name).write_text(json.dumps(sidecar, indent=2))
@@ -0,0 +1,121 @@
+"""Schema validation for ARS specs and emitted ARD tables.
+
+Validators are compiled once per process and cached by schema name (or
+path), so the schema document is neither re-read nor re-hashed per call. ARD tables are checked column-wise against the row
+contract in ``schemas/ard.schema.json`` (``$defs.table_row``) so large
+outputs are never expanded into per-row JSON objects.
+"""
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from pathlib import Path
+
+SCHEMA_DIR = Path(__file__).resolve().parents[2] / "schemas"
+
+
+class SchemaValidationError(ValueError):
+    """Raised when a spec, ARD table or ARD metadata violates its schema."""
+
+    def __init__(self, subject: str, problems: list[str]):
+        self.subject = subject
+        self.problems = problems
+        super().__init__(f"{subject} failed schema validation:\n" + "\n".join(f"  - {p}" for p in problems))
+
+
+@lru_cache(maxsize=None)
+def load_schema(name: str) -> dict:
+    """Load a schema from ``schemas/``; an absolute path is read as is."""
+    return json.loads((SCHEMA_DIR / name).read_text())
+
+
+@lru_cache(maxsize=None)
+def compiled_validator(name: str, format_checker: bool = True, draft: str | None = None):
+    """Return a checked ``jsonschema`` validator for schema *name*, built once per process.
+
+    The validator class follows the schema's ``$schema`` unless *draft* names
+    one (e.g. ``"Draft7Validator"``); ``format`` keywords are only asserted
+    with *format_checker*.
+    """
+    import jsonschema
+    from jsonschema import validators
+
+    schema = load_schema(name)
+    cls = getattr(jsonschema, draft) if draft else validators.validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema, format_checker=cls.FORMAT_CHECKER if format_checker else None)
+
+
+def _raise_on_errors(subject: str, validator, instance) -> None:
+    errors = sorted(validator.iter_errors(instance), key=lambda e: list(e.path))
+    if errors:
+        raise SchemaValidationError(
+            subject, [f"{'/'.join(str(p) for p in e.path) or '<root>'}: {e.message}" for e in errors]
+        )
+
+
+def validate_spec(spec: dict, schema_name: str = "ars.schema.json") -> None:
+    _raise_on_errors("ARS spec", compiled_validator(schema_name), spec)
+
+
+def validate_metadata(metadata: dict, schema_name: str = "ard.schema.json") -> None:
+    # Tables are validated column-wise; only the envelope goes through jsonschema.
+    _raise_on_errors("ARD metadata", compiled_validator(schema_name),
+                     {"tables": {}, "metadata": metadata})
+
+
+def _column_problems(name: str, s, rule: dict) -> list[str]:
+    import pandas as pd
+
+    problems = []
+    types = rule.get("type", [])
+    types = [types] if isinstance(types, str) else list(types)
+    present = s.dropna()
+    if types:
+        if "null" not in types and len(present) != len(s):
+            problems.append(f"column '{name}' has {len(s) - len(present)} null value(s)")
+        if not present.empty:
+            kind = pd.api.types.infer_dtype(present, skipna=True)
+            ok = False
+            if "string" in types:
+                ok = ok or kind == "string"
+            if "number" in types:
+                ok = ok or kind in ("integer", "floating", "mixed-integer-float", "decimal")
+            if "integer" in types:
+                ok = ok or kind == "integer" or (
+                    kind == "floating" and bool((present.astype(float) % 1 == 0).all())
+                )
+            if "boolean" in types:
+                ok = ok or kind == "boolean"
+            if not ok:
+                problems.append(f"column '{name}' has inferred type '{kind}', expected {' or '.join(types)}")
+                return problems
+    if "enum" in rule:
+        bad = present[~present.isin(rule["enum"])]
+        if not bad.empty:
+            problems.append(f"column '{name}' has {len(bad)} value(s) outside enum, e.g. {bad.iloc[0]!r}")
+    if "minimum" in rule and not present.empty:
+        below = int((present < rule["minimum"]).sum())
+        if below:
+            problems.append(f"column '{name}' has {below} value(s) below minimum {rule['minimum']}")
+    return problems
+
+
+def validate_table(name: str, df, required: list[str] | tuple = (),
+                   schema_name: str = "ard.schema.json") -> None:
+    """Check one ARD table against ``$defs.table_row`` using whole-column operations.
+
+    *required* adds analysis-specific columns (e.g. the ``group_by`` keys) to the
+    schema's own ``required`` list.
+    """
+    row = load_schema(schema_name).get("$defs", {}).get("table_row", {})
+    problems = []
+    needed = list(dict.fromkeys(list(row.get("required", [])) + list(required)))
+    missing = [c for c in needed if c not in df.columns]
+    if missing:
+        problems.append(f"missing required column(s): {', '.join(missing)}")
+    for column, rule in row.get("properties", {}).items():
+        if column in df.columns:
+            problems.extend(_column_problems(column, df[column], rule))
+    if problems:
+        raise SchemaValidationError(f"ARD table '{name}'", problems)
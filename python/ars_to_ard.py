@@ -13,11 +13,51 @@ from __future__ import annotations
 import argparse
 import ast
 import csv
+import hashlib
+import itertools
 import json
 import math
+import mmap
+import operator
+import os
+import random
 import statistics
+import sys
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from multiprocessing import shared_memory
 from pathlib import Path
-from typing import Dict, Iterator, List, Mapping, MutableMapping, Optional, Sequence, Tuple
+from typing import (
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+try:  # POSIX; elsewhere the digest index is only guarded within one process
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+from ars_runtime.pipeline import AsyncWriter
+from ars_runtime.registry import (
+    GroupIntermediates,
+    linear_quantile,
+    lookup,
+    plan_statistics,
+)
+from ars_runtime.timings import RunTimer, write_timings
 
 
 class PopulationExpressionError(ValueError):
@@ -107,6 +147,23 @@ def normalise_stat_keyword(stat: str) -> str:
     return stat_lower
 
 
+def resolve_statistics(keywords: Sequence[str], canonical: bool = False) -> List[str]:
+    """Statistic names for *keywords*, in order and without duplicates.
+
+    By default these are the historical ARD labels (``normalise_stat_keyword``),
+    so ``std`` stays ``STD`` and ``q1`` stays ``P25``. With *canonical* they
+    are the registry names that ``ars_runtime`` labels its columns with, and
+    aliases of one statistic collapse into a single row. Unsupported
+    statistics fail here either way.
+    """
+
+    if canonical:
+        return list(dict.fromkeys(lookup(keyword).name for keyword in keywords))
+    names = list(dict.fromkeys(normalise_stat_keyword(keyword) for keyword in keywords))
+    plan_statistics(tuple(names))
+    return names
+
+
 def select_method_for_variable(
     methods: Sequence[Mapping[str, object]],
     variable: Mapping[str, object],
@@ -181,131 +238,627 @@ def safe_float(value: Optional[str]) -> Optional[float]:
         raise ValueError(f"Value '{value}' is not numeric") from exc
 
 
-def linear_quantile(sorted_values: Sequence[float], prob: float) -> float:
-    if not sorted_values:
-        return math.nan
-    if prob <= 0:
-        return sorted_values[0]
-    if prob >= 1:
-        return sorted_values[-1]
+def compute_statistic(values: Sequence[Optional[float]], stat: str) -> float:
+    """Evaluate one statistic for one group; see ``ars_runtime.registry``."""
 
-    h = (len(sorted_values) - 1) * prob
-    lower = math.floor(h)
-    upper = math.ceil(h)
-    if lower == upper:
-        return sorted_values[lower]
-    fraction = h - lower
-    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+    return plan_statistics((stat,)).evaluate_intermediates(GroupIntermediates(values, 0.0))[0]
 
 
-def compute_statistic(values: Sequence[Optional[float]], stat: str) -> float:
-    cleaned = [value for value in values if value is not None]
-    total = len(values)
-    missing = total - len(cleaned)
-
-    if stat in {"n", "n_non_missing"}:
-        return len(cleaned)
-    if stat in {"n_missing", "missing"}:
-        return missing
-
-    if not cleaned:
-        return math.nan
-
-    if stat in {"mean", "arithmetic_mean"}:
-        return float(statistics.fmean(cleaned))
-    if stat in {"sd", "stddev", "std", "stderr", "se"}:
-        if len(cleaned) < 2:
-            stdev = 0.0
-        else:
-            stdev = statistics.stdev(cleaned)
-        if stat in {"stderr", "se"}:
-            return float(stdev / math.sqrt(len(cleaned))) if cleaned else math.nan
-        return float(stdev)
-    if stat in {"var", "variance"}:
-        if len(cleaned) < 2:
-            return 0.0
-        return float(statistics.variance(cleaned))
-    if stat == "median":
-        return float(statistics.median(cleaned))
-    if stat == "min":
-        return float(min(cleaned))
-    if stat == "max":
-        return float(max(cleaned))
-    if stat == "range":
-        return float(max(cleaned) - min(cleaned))
-    if stat == "iqr":
-        ordered = sorted(cleaned)
-        return float(linear_quantile(ordered, 0.75) - linear_quantile(ordered, 0.25))
-    if stat.startswith("p") and stat[1:].isdigit():
-        ordered = sorted(cleaned)
-        prob = float(int(stat[1:])) / 100.0
-        return float(linear_quantile(ordered, prob))
-
-    raise ValueError(f"Unsupported statistic requested in ARS: {stat}")
+_COMPARISONS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Gt: lambda left, right: float(left) > float(right),
+    ast.GtE: lambda left, right: float(left) >= float(right),
+    ast.Lt: lambda left, right: float(left) < float(right),
+    ast.LtE: lambda left, right: float(left) <= float(right),
+}
 
 
-def evaluate_population_where(where: str, row: Mapping[str, object]) -> bool:
-    if not where.strip():
-        return True
+def _spread(value: object, length: int) -> List[object]:
+    # Column-wise evaluation: names evaluate to lists, constants to scalars.
+    return value if isinstance(value, list) else [value] * length
 
-    try:
-        expression = ast.parse(where, mode="eval")
-    except SyntaxError as exc:  # pragma: no cover - defensive path
-        raise PopulationExpressionError(str(exc)) from exc
 
-    def _eval(node: ast.AST) -> object:
-        if isinstance(node, ast.Expression):
-            return _eval(node.body)
+class PopulationFilter:
+    """A population ``where`` expression, parsed once per analysis.
+
+    Calling it evaluates one row mapping. ``mask`` evaluates whole columns at
+    once with the same operators, which is how ``ColumnarDataset`` inputs are
+    filtered. Every operand is evaluated (there is no short-circuiting), so
+    both forms raise on the same rows. ``names`` lists the columns it reads.
+    """
+
+    def __init__(self, where: str):
+        self.where = where
+        self._row = self._columns = None
+        self.names: Tuple[str, ...] = ()
+        if where.strip():
+            try:
+                tree = ast.parse(where, mode="eval").body
+            except SyntaxError as exc:  # pragma: no cover - defensive path
+                raise PopulationExpressionError(str(exc)) from exc
+            self.names = tuple(dict.fromkeys(
+                node.id for node in ast.walk(tree) if isinstance(node, ast.Name)
+            ))
+            self._row = self._compile(tree, columnar=False)
+            self._columns = self._compile(tree, columnar=True)
+
+    def __call__(self, row: Mapping[str, object]) -> bool:
+        return True if self._row is None else bool(self._row(row))
+
+    def mask(self, column: Callable[[str], List[object]], length: int) -> List[bool]:
+        """Truth value per row, where ``column(name)`` returns that column as a list."""
+
+        if self._columns is None:
+            return [True] * length
+        return [bool(value) for value in _spread(self._columns((column, length)), length)]
+
+    def _compile(self, node: ast.AST, columnar: bool) -> Callable[[object], object]:
         if isinstance(node, ast.BoolOp):
-            values = [_eval(value) for value in node.values]
-            if isinstance(node.op, ast.And):
-                return all(values)
-            if isinstance(node.op, ast.Or):
-                return any(values)
-            raise PopulationExpressionError("Unsupported boolean operator")
+            if not isinstance(node.op, (ast.And, ast.Or)):
+                raise PopulationExpressionError("Unsupported boolean operator")
+            combine = all if isinstance(node.op, ast.And) else any
+            parts = [self._compile(value, columnar) for value in node.values]
+            if not columnar:
+                return lambda row: combine([part(row) for part in parts])
+            return lambda ctx: [
+                combine(values) for values in zip(*(_spread(part(ctx), ctx[1]) for part in parts))
+            ]
         if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
-            return not bool(_eval(node.operand))
+            operand = self._compile(node.operand, columnar)
+            if not columnar:
+                return lambda row: not bool(operand(row))
+            return lambda ctx: [not bool(value) for value in _spread(operand(ctx), ctx[1])]
         if isinstance(node, ast.Compare):
-            left = _eval(node.left)
-            results: List[bool] = []
-            current = left
+            left = self._compile(node.left, columnar)
+            steps = []
             for operator_node, comparator in zip(node.ops, node.comparators):
-                right = _eval(comparator)
-                if isinstance(operator_node, ast.Eq):
-                    results.append(current == right)
-                elif isinstance(operator_node, ast.NotEq):
-                    results.append(current != right)
-                elif isinstance(operator_node, ast.Gt):
-                    results.append(float(current) > float(right))
-                elif isinstance(operator_node, ast.GtE):
-                    results.append(float(current) >= float(right))
-                elif isinstance(operator_node, ast.Lt):
-                    results.append(float(current) < float(right))
-                elif isinstance(operator_node, ast.LtE):
-                    results.append(float(current) <= float(right))
-                else:  # pragma: no cover - unsupported operator guard
+                if type(operator_node) not in _COMPARISONS:
                     raise PopulationExpressionError("Unsupported comparison operator")
-                current = right
-            return all(results)
+                compare = _COMPARISONS[type(operator_node)]
+                steps.append((compare, self._compile(comparator, columnar)))
+
+            def compare_row(row: Mapping[str, object]) -> bool:
+                current, results = left(row), []
+                for compare, right in steps:
+                    value = right(row)
+                    results.append(compare(current, value))
+                    current = value
+                return all(results)
+
+            def compare_columns(ctx: Tuple[object, int]) -> List[bool]:
+                current, results = _spread(left(ctx), ctx[1]), []
+                for compare, right in steps:
+                    value = _spread(right(ctx), ctx[1])
+                    results.append(list(map(compare, current, value)))
+                    current = value
+                return [all(values) for values in zip(*results)]
+
+            return compare_columns if columnar else compare_row
         if isinstance(node, ast.Name):
-            return row.get(node.id)
+            name = node.id
+            if not columnar:
+                return lambda row: row.get(name)
+            return lambda ctx: ctx[0](name)
         if isinstance(node, ast.Constant):
-            return node.value
+            constant = node.value
+            return lambda _: constant
         raise PopulationExpressionError("Unsupported expression in population filter")
 
-    result = _eval(expression)
-    return bool(result)
 
+@lru_cache(maxsize=256)
+def compile_population_where(where: str) -> PopulationFilter:
+    return PopulationFilter(where)
 
-def load_datasets(data_dir: Path) -> Dict[str, List[MutableMapping[str, object]]]:
-    datasets: Dict[str, List[MutableMapping[str, object]]] = {}
-    for csv_path in sorted(data_dir.glob("*.csv")):
-        with csv_path.open(newline="", encoding="utf-8") as handle:
-            reader = csv.DictReader(handle)
-            datasets[csv_path.stem] = [dict(row) for row in reader]
-    if not datasets:
+
+def evaluate_population_where(where: str, row: Mapping[str, object]) -> bool:
+    return compile_population_where(where)(row)
+
+
+def filter_population(
+    rows: Sequence[Mapping[str, object]], where: str
+) -> Sequence[Mapping[str, object]]:
+    """Rows of *rows* matching *where*; a ``ColumnarDataset`` is filtered column-wise."""
+
+    predicate = compile_population_where(where)
+    if isinstance(rows, ColumnarDataset):
+        return rows.select(predicate.mask(rows.column, len(rows)))
+    return [row for row in rows if predicate(row)]
+
+
+def discover_datasets(data_dir: Path) -> Dict[str, Path]:
+    paths = {csv_path.stem: csv_path for csv_path in sorted(data_dir.glob("*.csv"))}
+    if not paths:
         raise FileNotFoundError(f"No CSV files were located in {data_dir}")
-    return datasets
+    return paths
+
+
+def read_dataset(csv_path: Path) -> List[MutableMapping[str, object]]:
+    with csv_path.open(newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        return [dict(row) for row in reader]
+
+
+def load_datasets(data_dir: Path) -> Dict[str, List[MutableMapping[str, object]]]:
+    return {name: read_dataset(path) for name, path in discover_datasets(data_dir).items()}
+
+
+Projection = Tuple[FrozenSet[str], FrozenSet[str]]
+
+
+def union_projection(projections: Sequence[Projection]) -> Projection:
+    """One projection serving several readers of a CSV.
+
+    It keeps every column any reader uses; a column stays numeric-only unless
+    some reader needs its string values.
+    """
+
+    columns = frozenset().union(*(used for used, _ in projections))
+    textual = frozenset().union(*(used - numeric for used, numeric in projections))
+    return columns, columns - textual
+
+
+def analysis_projections(analyses: Sequence[Mapping[str, object]]) -> Dict[str, Projection]:
+    """Return, per dataset, the columns the analyses read and which are numeric-only.
+
+    A column is numeric-only when it is used solely as an analysis variable;
+    columns that appear in a population filter or grouping keep their string
+    values so comparisons behave exactly as with ``csv.DictReader``.
+    """
+
+    columns: Dict[str, set] = {}
+    textual: Dict[str, set] = {}
+    for analysis in analyses:
+        if not isinstance(analysis, Mapping) or not isinstance(analysis.get("dataset"), str):
+            continue
+        name = str(analysis["dataset"])
+        used = columns.setdefault(name, set())
+        text = textual.setdefault(name, set())
+
+        population = analysis.get("population") or {}
+        where = str(population.get("where", "")) if isinstance(population, Mapping) else ""
+        if where.strip():
+            try:
+                tree = ast.parse(where, mode="eval")
+            except SyntaxError:
+                tree = None
+            if tree is not None:
+                text.update(node.id for node in ast.walk(tree) if isinstance(node, ast.Name))
+
+        grouping = analysis.get("grouping") or []
+        if isinstance(grouping, Mapping):
+            grouping = [grouping]
+        for group in grouping:
+            if isinstance(group, Mapping):
+                text.add(str(group.get("variable") or group.get("name") or ""))
+
+        variables = analysis.get("variables") or []
+        if isinstance(variables, Mapping):
+            variables = [variables]
+        for variable in variables:
+            if isinstance(variable, Mapping) and isinstance(variable.get("name"), str):
+                used.add(variable["name"])
+        used.update(text)
+
+    return {
+        name: (frozenset(used - {""}), frozenset(used - textual[name]))
+        for name, used in columns.items()
+    }
+
+
+class NumericColumn(Sequence[object]):
+    """Column of floats in an ``array('d')`` with side tables for blanks and bad cells.
+
+    Blank cells read back as ``None`` and unparseable cells as their original
+    text, so ``safe_float`` reports them exactly as it does for DictReader rows.
+    """
+
+    __slots__ = ("values", "missing", "invalid")
+
+    def __init__(self, raw: Sequence[object] = ()):
+        self.values = array("d")
+        self.missing: set = set()
+        self.invalid: Dict[int, str] = {}
+        self.extend(raw)
+
+    def extend(self, raw: Sequence[object]) -> None:
+        append = self.values.append
+        for index, cell in enumerate(raw, start=len(self.values)):
+            try:
+                append(float(cell))  # type: ignore[arg-type]
+            except (TypeError, ValueError):
+                append(math.nan)
+                text = cell.decode("utf-8") if isinstance(cell, bytes) else cell
+                if text is None or not str(text).strip():
+                    self.missing.add(index)
+                else:
+                    self.invalid[index] = str(text)
+
+    def take(self, positions: Sequence[int]) -> List[Optional[float]]:
+        """``safe_float`` of the cells at *positions*, reading the array directly when clean."""
+
+        if not self.missing and not self.invalid:
+            values = self.values
+            return [values[position] for position in positions]
+        return [safe_float(self[position]) for position in positions]  # type: ignore[arg-type]
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if index in self.invalid:
+            return self.invalid[index]
+        if index in self.missing:
+            return None
+        return self.values[index]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class ColumnarRow(Mapping[str, object]):
+    """Lightweight row view over a ``ColumnarDataset``."""
+
+    __slots__ = ("_columns", "_index")
+
+    def __init__(self, columns: Mapping[str, Sequence[object]], index: int):
+        self._columns = columns
+        self._index = index
+
+    def __getitem__(self, key: str) -> object:
+        return self._columns[key][self._index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+
+class ColumnarDataset(Sequence[Mapping[str, object]]):
+    """Projected, column-oriented dataset exposing rows as read-only mappings.
+
+    ``select`` returns a view of some rows that shares the parent's columns;
+    *positions* are the selected row numbers (``None`` for every row).
+    """
+
+    def __init__(
+        self,
+        columns: Mapping[str, Sequence[object]],
+        row_count: int,
+        positions: Optional[Sequence[int]] = None,
+    ):
+        self.columns = dict(columns)
+        self.positions: Sequence[int] = range(row_count) if positions is None else positions
+        self.row_count = len(self.positions)
+
+    def column(self, name: str) -> List[object]:
+        """Values of *name* for the selected rows; ``None`` where the column is absent."""
+
+        source = self.columns.get(name)
+        if source is None:
+            return [None] * self.row_count
+        if isinstance(source, list) and isinstance(self.positions, range):
+            return source[self.positions.start:self.positions.stop]
+        return [source[position] for position in self.positions]
+
+    def select(self, mask: Sequence[bool]) -> "ColumnarDataset":
+        positions = [position for position, keep in zip(self.positions, mask) if keep]
+        return ColumnarDataset(self.columns, len(positions), positions)
+
+    def group_values(
+        self, group_vars: Sequence[str], variable: str
+    ) -> Tuple[List[Tuple[object, ...]], List[List[Optional[float]]]]:
+        """Group keys in first-appearance order and the ``safe_float`` values of each group."""
+
+        keys = zip(*(self.column(var) for var in group_vars)) if group_vars else None
+        groups: Dict[Tuple[object, ...], List[int]] = {}
+        if keys is None:
+            groups[()] = list(self.positions)
+        else:
+            for key, position in zip(keys, self.positions):
+                groups.setdefault(key, []).append(position)
+        source = self.columns.get(variable)
+        values: List[List[Optional[float]]] = []
+        for members in groups.values():
+            if isinstance(source, NumericColumn):
+                values.append(source.take(members))
+            elif source is None:
+                values.append([None] * len(members))
+            else:
+                values.append([safe_float(source[p]) for p in members])  # type: ignore[arg-type]
+        return list(groups), values
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [ColumnarRow(self.columns, i) for i in self.positions[index]]
+        return ColumnarRow(self.columns, self.positions[index])
+
+    def __iter__(self) -> Iterator[Mapping[str, object]]:
+        columns = self.columns
+        return (ColumnarRow(columns, i) for i in self.positions)
+
+    def __len__(self) -> int:
+        return self.row_count
+
+
+def _extend_strings(
+    column: List[object], raw: Sequence[object], cache: Dict[object, object]
+) -> None:
+    # Categorical columns repeat heavily, so decode each distinct value once.
+    append = column.append
+    for cell in raw:
+        value = cache.get(cell)
+        if value is None:
+            value = cell.decode("utf-8") if isinstance(cell, bytes) else cell
+            if cell is not None:
+                cache[cell] = value
+        append(value)
+
+
+class _ColumnBuilder:
+    """Accumulates projected cells block by block into typed columns."""
+
+    def __init__(self, positions: Mapping[str, int], numeric: FrozenSet[str]):
+        self.positions = dict(positions)
+        self.columns: Dict[str, Sequence[object]] = {
+            name: NumericColumn() if name in numeric else [] for name in positions
+        }
+        self._caches: Dict[str, Dict[object, object]] = {name: {} for name in positions}
+        self.row_count = 0
+
+    def add(self, rows: Sequence[Sequence[object]]) -> None:
+        for name, index in self.positions.items():
+            raw = [fields[index] if len(fields) > index else None for fields in rows]
+            column = self.columns[name]
+            if isinstance(column, NumericColumn):
+                column.extend(raw)
+            else:
+                _extend_strings(column, raw, self._caches[name])  # type: ignore[arg-type]
+        self.row_count += len(rows)
+
+    def dataset(self) -> ColumnarDataset:
+        return ColumnarDataset(self.columns, self.row_count)
+
+
+# Bytes of the memory map split at a time; only projected cells outlive a window.
+FAST_CSV_WINDOW_BYTES = 1 << 23
+
+
+def read_dataset_fast(
+    csv_path: Path,
+    columns: FrozenSet[str],
+    numeric: FrozenSet[str] = frozenset(),
+) -> ColumnarDataset:
+    """Read only *columns* of *csv_path* into typed columns.
+
+    The file is memory-mapped and split into lines and fields one window of
+    ``FAST_CSV_WINDOW_BYTES`` at a time, so it is never copied whole; fields
+    past the last projected column are never split and unprojected fields are
+    never decoded. ``\\n``, ``\\r\\n`` and lone ``\\r`` all end a record, as with
+    ``csv.DictReader``. Files containing quote characters fall back to the
+    ``csv`` module for tokenising but still use the projected columnar layout.
+    """
+
+    with csv_path.open("rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        if size == 0:
+            return ColumnarDataset({}, 0)
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if mapped.find(b'"') != -1:
+                return _read_quoted_dataset(csv_path, columns, numeric)
+            return _read_mapped_dataset(mapped, size, columns, numeric)
+
+
+def _last_record_end(mapped: mmap.mmap, start: int, stop: int) -> int:
+    """Index just past the last line break in ``mapped[start:stop]``, or -1 if none."""
+
+    last = max(mapped.rfind(b"\n", start, stop), mapped.rfind(b"\r", start, stop))
+    return last + 1 if last != -1 else -1
+
+
+def _next_record_end(mapped: mmap.mmap, start: int, size: int) -> int:
+    """Index just past the first line break at or after *start*, or *size* if none."""
+
+    ends = [mapped.find(b"\n", start), mapped.find(b"\r", start)]
+    ends = [index for index in ends if index != -1]
+    return min(ends) + 1 if ends else size
+
+
+def _split_lines(block: bytes) -> List[bytes]:
+    if b"\r" in block:
+        block = block.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    return [line for line in block.split(b"\n") if line]
+
+
+def _read_mapped_dataset(
+    mapped: mmap.mmap, size: int, columns: FrozenSet[str], numeric: FrozenSet[str]
+) -> ColumnarDataset:
+    start = _next_record_end(mapped, 0, size)
+    header = mapped[:start].rstrip(b"\r\n").decode("utf-8").split(",")
+    builder = _ColumnBuilder(
+        {name: index for index, name in enumerate(header) if name in columns}, numeric
+    )
+    last = max(builder.positions.values(), default=0)
+    while start < size:
+        stop = min(size, start + FAST_CSV_WINDOW_BYTES)
+        if stop < size:
+            end = _last_record_end(mapped, start, stop)
+            # A record longer than the window extends it to the next line break.
+            stop = end if end != -1 else _next_record_end(mapped, stop, size)
+        # Only this window is copied out of the map; a CRLF split across two
+        # windows leaves an empty line, which is skipped like a blank record.
+        builder.add([line.split(b",", last + 1) for line in _split_lines(mapped[start:stop])])
+        start = stop
+    return builder.dataset()
+
+
+def _read_quoted_dataset(
+    csv_path: Path,
+    columns: FrozenSet[str],
+    numeric: FrozenSet[str],
+) -> ColumnarDataset:
+    with csv_path.open(newline="", encoding="utf-8") as handle:
+        reader = csv.reader(handle)
+        header = next(reader, [])
+        builder = _ColumnBuilder(
+            {name: index for index, name in enumerate(header) if name in columns}, numeric
+        )
+        batch: List[List[str]] = []
+        for fields in reader:
+            if fields:
+                batch.append(fields)
+            if len(batch) >= 65536:
+                builder.add(batch)
+                batch = []
+        builder.add(batch)
+    return builder.dataset()
+
+
+class SampledDataset(List[MutableMapping[str, object]]):
+    """``csv.DictReader`` rows of a Bernoulli row sample, with the rate they were kept at."""
+
+    def __init__(self, rows: Sequence[MutableMapping[str, object]], fraction: float):
+        super().__init__(rows)
+        self.fraction = fraction
+
+
+def read_dataset_sample(csv_path: Path, options: "PreviewOptions") -> SampledDataset:
+    """Keep each record of *csv_path* with probability ``options.sample`` before parsing it.
+
+    Records are cut from raw lines by quote parity (so quoted line breaks stay
+    inside their record) and only the kept ones are handed to the ``csv``
+    module. The rate is raised so that about ``options.min_rows`` records are
+    kept, and a file that would be kept whole is simply read in full.
+    """
+
+    with csv_path.open("rb") as handle:
+        lines = sum(chunk.count(b"\n") for chunk in iter(lambda: handle.read(1 << 20), b""))
+    fraction = min(1.0, max(options.sample, options.min_rows / max(1, lines)))
+    if fraction >= 1.0:
+        return SampledDataset(read_dataset(csv_path), 1.0)
+
+    rng = random.Random(f"{options.seed}:{csv_path.name}")
+    kept: List[str] = []
+    with csv_path.open(newline="", encoding="utf-8") as handle:
+        header = next(csv.reader(handle), [])
+        record: List[str] = []
+        open_quote = False
+        for line in handle:
+            record.append(line)
+            open_quote ^= line.count('"') % 2 == 1
+            if open_quote:
+                continue
+            if rng.random() < fraction:
+                kept.append("".join(record))
+            record = []
+    rows = [dict(row) for row in csv.DictReader(kept, fieldnames=header)]
+    return SampledDataset(rows, fraction)
+
+
+def load_dataset(
+    name: str,
+    csv_path: Path,
+    projections: Optional[Mapping[str, Projection]] = None,
+    preview: Optional["PreviewOptions"] = None,
+) -> Sequence[Mapping[str, object]]:
+    """Load one dataset with ``csv.DictReader``, or projected when *projections* is given.
+
+    With *preview* the rows are sampled first (``read_dataset_sample``) and
+    *projections* is ignored.
+    """
+
+    if preview is not None:
+        return read_dataset_sample(csv_path, preview)
+    if projections is None:
+        return read_dataset(csv_path)
+    columns, numeric = projections.get(name, (frozenset(), frozenset()))
+    return read_dataset_fast(csv_path, columns, numeric)
+
+
+class LazyDatasets(Mapping[str, Sequence[Mapping[str, object]]]):
+    """Read-only dataset mapping that parses each CSV on first access."""
+
+    def __init__(
+        self,
+        paths: Mapping[str, Path],
+        projections: Optional[Mapping[str, Projection]] = None,
+        preview: Optional["PreviewOptions"] = None,
+    ):
+        self._paths = dict(paths)
+        self._projections = projections
+        self._preview = preview
+        self._loaded: Dict[str, Sequence[Mapping[str, object]]] = {}
+
+    def __getitem__(self, name: str) -> Sequence[Mapping[str, object]]:
+        if name not in self._loaded:
+            self._loaded[name] = load_dataset(
+                name, self._paths[name], self._projections, self._preview
+            )
+        return self._loaded[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._paths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+
+class PrefetchedDatasets(Mapping[str, Sequence[Mapping[str, object]]]):
+    """Read-only dataset mapping whose members are parsed on background threads.
+
+    Loads are submitted in *priority* order (the order analyses first use each
+    dataset). Lookups block only until the requested dataset is ready, so the
+    first analysis can start while later datasets are still being read. Any
+    other dataset is loaded on first access, so CSVs that no analysis reads
+    (or whose analyses are served from the aggregate store) are never parsed.
+    """
+
+    def __init__(
+        self,
+        paths: Mapping[str, Path],
+        pool: Executor,
+        priority: Sequence[str] = (),
+        shared: Optional[MutableMapping[object, Future]] = None,
+        projections: Optional[Mapping[str, Projection]] = None,
+        preview: Optional["PreviewOptions"] = None,
+    ):
+        self._paths = dict(paths)
+        self._pool = pool
+        self._projections = projections
+        self._preview = preview
+        # *shared* maps resolved file paths to loads already scheduled by other
+        # jobs in the same batch, so each CSV is parsed at most once; a batch
+        # passes every job the same (union) projection for a shared file.
+        self._shared: MutableMapping[object, Future] = {} if shared is None else shared
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        for name in dict.fromkeys(priority):
+            if name in paths:
+                self._schedule(name)
+
+    def _schedule(self, name: str) -> Future:
+        with self._lock:
+            if name not in self._futures:
+                key = self._paths[name].resolve()
+                if key not in self._shared:
+                    self._shared[key] = self._pool.submit(
+                        load_dataset, name, self._paths[name], self._projections, self._preview
+                    )
+                self._futures[name] = self._shared[key]
+            return self._futures[name]
+
+    def __getitem__(self, name: str) -> Sequence[Mapping[str, object]]:
+        return self._schedule(name).result()
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._paths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
 
 
 def ensure_grouping_variables(
@@ -331,6 +884,18 @@ def analysis_population_label(population: Mapping[str, object], where: str) -> s
     return where if where.strip() else "All"
 
 
+def analysis_group_vars(analysis: Mapping[str, object]) -> List[str]:
+    grouping = analysis.get("grouping") or []
+    if isinstance(grouping, Mapping):
+        grouping = [grouping]
+    group_vars = [
+        str(group.get("variable") or group.get("name") or "")
+        for group in grouping
+        if isinstance(group, Mapping)
+    ]
+    return [var for var in group_vars if var]
+
+
 def iter_grouped_rows(
     rows: Sequence[Mapping[str, object]],
     group_vars: Sequence[str],
@@ -347,11 +912,989 @@ def iter_grouped_rows(
         yield key, group_rows
 
 
+def group_variable_values(
+    rows: Sequence[Mapping[str, object]],
+    group_vars: Sequence[str],
+    variable: str,
+) -> Tuple[List[Tuple[object, ...]], List[List[Optional[float]]]]:
+    """Group keys in first-appearance order and the ``safe_float`` values of *variable* per group.
+
+    A ``ColumnarDataset`` is grouped column-wise instead of through row views.
+    """
+
+    if isinstance(rows, ColumnarDataset):
+        return rows.group_values(group_vars, variable)
+    group_keys: List[Tuple[object, ...]] = []
+    group_values: List[List[Optional[float]]] = []
+    for group_key, group_rows in iter_grouped_rows(rows, group_vars):
+        group_keys.append(group_key)
+        group_values.append([safe_float(row.get(variable)) for row in group_rows])
+    return group_keys, group_values
+
+
+def build_aggregate(values: Sequence[Optional[float]]) -> Dict[str, object]:
+    """Return mergeable sufficient statistics and the sorted distinct values of *values*.
+
+    The distinct values are kept exactly rather than as a quantile sketch: a
+    store hit must reproduce the ARD of a cold run byte for byte, and every
+    quantile statistic (MEDIAN, P25, IQR, ...) and SD needs the full
+    distribution for that. ``counts`` is omitted when every value is distinct,
+    which is the common case for continuous variables and halves the entry.
+    """
+
+    cleaned = sorted(value for value in values if value is not None)
+    distinct: List[float] = []
+    counts: List[int] = []
+    for value in cleaned:
+        if distinct and distinct[-1] == value:
+            counts[-1] += 1
+        else:
+            distinct.append(value)
+            counts.append(1)
+    aggregate: Dict[str, object] = {
+        "n": len(cleaned),
+        "n_missing": len(values) - len(cleaned),
+        "sum": math.fsum(cleaned),
+        "min": cleaned[0] if cleaned else None,
+        "max": cleaned[-1] if cleaned else None,
+        "values": distinct,
+    }
+    if len(distinct) != len(cleaned):
+        aggregate["counts"] = counts
+    return aggregate
+
+
+class AggregateIntermediates(GroupIntermediates):
+    """Registry intermediates served from a stored aggregate.
+
+    Counts, mean and extrema come straight from the aggregate; the distinct
+    values are already sorted and are only expanded if a statistic needs them.
+    """
+
+    def __init__(self, aggregate: Mapping[str, object], single_value_spread: float = math.nan):
+        super().__init__((), single_value_spread)
+        n = int(aggregate["n"])  # type: ignore[arg-type]
+        self.__dict__.update(n=n, n_missing=int(aggregate["n_missing"]))  # type: ignore[arg-type]
+        if n:
+            self.__dict__.update(
+                mean=float(aggregate["sum"]) / n,  # type: ignore[arg-type]
+                min=float(aggregate["min"]),  # type: ignore[arg-type]
+                max=float(aggregate["max"]),  # type: ignore[arg-type]
+            )
+        self.aggregate = aggregate
+
+    @cached_property
+    def cleaned(self) -> List[float]:
+        aggregate = self.aggregate
+        if "runs" in aggregate:  # entries written before ``values``/``counts``
+            runs = aggregate["runs"]
+        else:
+            distinct = aggregate["values"]
+            counts = aggregate.get("counts") or itertools.repeat(1)
+            runs = zip(distinct, counts)  # type: ignore[arg-type]
+        values: List[float] = []
+        for value, count in runs:  # type: ignore[union-attr]
+            values.extend([float(value)] * int(count))
+        return values
+
+    @cached_property
+    def sorted_values(self) -> List[float]:
+        return self.cleaned
+
+
+class AggregateStore:
+    """Size-bounded on-disk cache of per-group aggregates.
+
+    Entries are keyed by dataset content hash, population predicate, grouping
+    variables and analysis variable, so any change to the input file misses.
+    The least recently used entries are evicted once the store exceeds
+    *max_bytes*.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        dataset_paths: Mapping[str, Path],
+        max_bytes: int,
+        create: bool = True,
+    ):
+        self.directory = directory
+        self.dataset_paths = dict(dataset_paths)
+        self.max_bytes = max_bytes
+        self._entries = directory / "entries"
+        if create:
+            self._entries.mkdir(parents=True, exist_ok=True)
+        self._index_path = directory / "digests.json"
+        self._digests: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._index_lock = threading.Lock()
+
+    def dataset_digest(self, dataset_name: str) -> str:
+        with self._lock:
+            if dataset_name not in self._digests:
+                self._digests[dataset_name] = self._file_digest(self.dataset_paths[dataset_name])
+            return self._digests[dataset_name]
+
+    def _read_index(self, path: Path) -> Tuple[Dict[str, object], str, Optional[str]]:
+        """Return the digest index, *path*'s (size, mtime) stamp and its memoised hash."""
+
+        stat = path.stat()
+        stamp = f"{stat.st_size}:{stat.st_mtime_ns}"
+        index = self._load_index()
+        known = index.get(str(path.resolve()))
+        if known and known.get("stamp") == stamp:
+            return index, stamp, str(known["sha256"])
+        return index, stamp, None
+
+    def _load_index(self) -> Dict[str, object]:
+        try:
+            return json.loads(self._index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    @contextmanager
+    def _locked_index(self) -> Iterator[None]:
+        """Hold the digest index exclusively, across threads and (on POSIX) processes."""
+
+        with self._index_lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with (self.directory / "digests.lock").open("a") as handle:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+                yield  # closing the handle releases the lock
+
+    def _file_digest(self, path: Path) -> str:
+        # Hashes are memoised by (size, mtime) so unchanged inputs are not re-read.
+        _, stamp, known = self._read_index(path)
+        if known is not None:
+            return known
+        digest = hashlib.sha256()
+        with path.open("rb") as handle:
+            for chunk in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(chunk)
+        # Re-read under the lock so entries other runs added meanwhile are kept;
+        # readers never lock, since the index is only ever replaced by rename.
+        with self._locked_index():
+            index = self._load_index()
+            index[str(path.resolve())] = {"stamp": stamp, "sha256": digest.hexdigest()}
+            self._atomic_write(self._index_path, json.dumps(index, indent=2))
+        return digest.hexdigest()
+
+    def _entry_path(
+        self, dataset_name: str, where: str, group_vars: Sequence[str], variable: str,
+        digest: Optional[str] = None,
+    ) -> Path:
+        key = json.dumps(
+            [digest or self.dataset_digest(dataset_name), where.strip(), list(group_vars), variable]
+        )
+        return self._entries / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+    def lookup(
+        self, dataset_name: str, where: str, group_vars: Sequence[str], variable: str
+    ) -> Optional[List[Dict[str, object]]]:
+        if dataset_name not in self.dataset_paths:
+            return None
+        path = self._entry_path(dataset_name, where, group_vars, variable)
+        try:
+            groups = json.loads(path.read_text(encoding="utf-8"))["groups"]
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError, KeyError):
+            return None
+        return groups
+
+    def peek(
+        self, dataset_name: str, where: str, group_vars: Sequence[str], variable: str
+    ) -> bool:
+        """Whether an entry exists, without hashing, reading or touching anything.
+
+        The dataset digest is only taken from the (size, mtime) memo, so an
+        input modified since it was last hashed reports a miss.
+        """
+
+        if dataset_name not in self.dataset_paths:
+            return False
+        digest = self._digests.get(dataset_name)
+        if digest is None:
+            try:
+                digest = self._read_index(self.dataset_paths[dataset_name])[2]
+            except OSError:
+                return False
+        if digest is None:
+            return False
+        return self._entry_path(dataset_name, where, group_vars, variable, digest).exists()
+
+    def save(
+        self,
+        dataset_name: str,
+        where: str,
+        group_vars: Sequence[str],
+        variable: str,
+        group_keys: Sequence[Tuple[object, ...]],
+        group_values: Sequence[Sequence[Optional[float]]],
+    ) -> None:
+        if dataset_name not in self.dataset_paths:
+            return
+        groups = [
+            dict(build_aggregate(values), key=list(key))
+            for key, values in zip(group_keys, group_values)
+        ]
+        path = self._entry_path(dataset_name, where, group_vars, variable)
+        self._atomic_write(path, json.dumps({"groups": groups}))
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        for path in self._entries.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    @staticmethod
+    def _atomic_write(path: Path, text: str) -> None:
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+
+
+# Preview runs keep their own sidecar so they never replace an exact run's.
+PREVIEW_TIMINGS_FILE_NAME = "ard_timings.preview.json"
+# Every ``--preview`` interval is reported at this confidence level.
+PREVIEW_CONFIDENCE = 0.95
+# Values per preview work unit; per-chunk summaries are merged in order.
+PREVIEW_CHUNK_VALUES = 1 << 16
+
+
+@dataclass(frozen=True)
+class PreviewOptions:
+    """Settings for approximate ``--preview`` runs.
+
+    Each CSV is row-sampled at *sample*, raised so that about *min_rows*
+    records are kept; small inputs are therefore read in full.
+    """
+
+    k: int = 200
+    sample: float = 0.1
+    seed: int = 123
+    confidence: float = PREVIEW_CONFIDENCE
+    min_rows: int = 2000
+
+
+class KllSketch:
+    """Mergeable KLL quantile sketch (Karnin, Lang & Liberty, 2016).
+
+    Level ``h`` holds items of weight ``2**h``. When the sketch grows past its
+    capacity the lowest over-full level is sorted and every other item, from a
+    random offset, is promoted to the next level. While nothing has been
+    compacted the sketch holds every value and answers exactly.
+    """
+
+    def __init__(self, k: int = 200, rng: Optional[random.Random] = None):
+        self.k = max(8, k)
+        self.levels: List[List[float]] = [[]]
+        self.n = 0
+        self._rng = rng or random.Random(0)
+        self._retained = 0
+        self._limit = self._max_size()
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _size(self) -> int:
+        return sum(len(level) for level in self.levels)
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(level) for level in range(len(self.levels)))
+
+    def update(self, value: float) -> None:
+        self.levels[0].append(value)
+        self.n += 1
+        self._retained += 1
+        if self._retained > self._limit:
+            self._compress()
+
+    def merge(self, other: "KllSketch") -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.n += other.n
+        self._retained = self._size()
+        self._limit = self._max_size()
+        while self._retained > self._limit:
+            self._compress()
+
+    def _compress(self) -> None:
+        for level in range(len(self.levels)):
+            if len(self.levels[level]) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                items = sorted(self.levels[level])
+                carry = [items.pop()] if len(items) % 2 else []
+                offset = self._rng.randint(0, 1)
+                self.levels[level + 1].extend(items[offset::2])
+                self.levels[level] = carry
+                self._retained = self._size()
+                self._limit = self._max_size()
+                return
+
+    @property
+    def exact(self) -> bool:
+        return len(self.levels) == 1
+
+    def rank_error(self, confidence: float = PREVIEW_CONFIDENCE) -> float:
+        """Normalised rank error bound holding with probability *confidence*.
+
+        KLL's error scales as ``sqrt(ln(2/delta)) / k``; the constant is fitted
+        to the empirical DataSketches bound (``2.296 / k**0.9723`` at 99%) for
+        k = 200.
+        """
+
+        if self.exact:
+            return 0.0
+        return min(1.0, 1.154 * math.sqrt(math.log(2.0 / (1.0 - confidence))) / self.k)
+
+    def quantile(self, prob: float) -> float:
+        if self.n == 0:
+            return math.nan
+        if self.exact:
+            return linear_quantile(sorted(self.levels[0]), prob)
+        weighted = sorted(
+            (value, 1 << level) for level, items in enumerate(self.levels) for value in items
+        )
+        total = sum(weight for _, weight in weighted)
+        target = min(max(prob, 0.0), 1.0) * total
+        cumulative = 0
+        for value, weight in weighted:
+            cumulative += weight
+            if cumulative >= target:
+                return value
+        return weighted[-1][0]
+
+
+def _sampling_rank_error(sampled: int, confidence: float) -> float:
+    # Dvoretzky-Kiefer-Wolfowitz bound on the empirical CDF of a sample.
+    if sampled <= 0:
+        return 1.0
+    return math.sqrt(math.log(2.0 / (1.0 - confidence)) / (2.0 * sampled))
+
+
+class PreviewSummary:
+    """Mergeable summary of one chunk of a group: counts, moments, extrema and a sketch.
+
+    Moments are kept as (mean, sum of squared deviations) and combined with
+    Chan et al.'s pairwise update, so chunks can be summarised independently
+    and merged in order without keeping their values.
+    """
+
+    __slots__ = ("n", "n_missing", "mean", "m2", "min", "max", "sketch")
+
+    def __init__(self, values: Sequence[Optional[float]], k: int, seed: str):
+        cleaned = [value for value in values if value is not None]
+        self.n = len(cleaned)
+        self.n_missing = len(values) - self.n
+        self.mean = math.fsum(cleaned) / self.n if cleaned else math.nan
+        self.m2 = math.fsum((value - self.mean) ** 2 for value in cleaned)
+        self.min = min(cleaned, default=math.nan)
+        self.max = max(cleaned, default=math.nan)
+        self.sketch = KllSketch(k, random.Random(seed))
+        for value in cleaned:
+            self.sketch.update(value)
+
+    def merge(self, other: "PreviewSummary") -> None:
+        self.n_missing += other.n_missing
+        if other.n:
+            if self.n:
+                n = self.n + other.n
+                delta = other.mean - self.mean
+                self.mean += delta * other.n / n
+                self.m2 += other.m2 + delta * delta * self.n * other.n / n
+                self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+            else:
+                self.mean, self.m2, self.min, self.max = other.mean, other.m2, other.min, other.max
+            self.n += other.n
+        self.sketch.merge(other.sketch)
+
+
+class PreviewIntermediates(GroupIntermediates):
+    """Registry intermediates read from fixed values, with quantiles from a sketch.
+
+    *shifts* moves individual quantile probabilities by a rank error so a
+    kernel can be evaluated at either end of its interval.
+    """
+
+    def __init__(
+        self,
+        fields: Mapping[str, float],
+        sketch: KllSketch,
+        shifts: Optional[Mapping[float, float]] = None,
+    ):
+        super().__init__()
+        self.__dict__.update(fields)
+        self._sketch = sketch
+        self._shifts = shifts or {}
+        if self.n:
+            self.__dict__["median"] = self.quantile(0.5)
+
+    def quantile(self, prob: float) -> float:
+        shifted = min(1.0, max(0.0, prob + self._shifts.get(prob, 0.0)))
+        return float(self._sketch.quantile(shifted))
+
+
+def _preview_fields(
+    summary: PreviewSummary, fraction: float, confidence: float, single_value_spread: float
+) -> Dict[str, Tuple[float, float, float]]:
+    """``(estimate, lower, upper)`` of every scalar intermediate of one group.
+
+    With *fraction* < 1 the summary covers a Bernoulli row sample: counts are
+    scaled up, moments get normal-approximation intervals and the extrema are
+    only bounded on one side. Unsampled results differ from exact mode only by
+    floating-point rounding, which the bounds cover.
+    """
+
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2.0)
+    sampled = fraction < 1.0
+    n = summary.n
+
+    def count(value: int) -> Tuple[float, float, float]:
+        if not sampled:
+            return value, value, value
+        half = z * math.sqrt(max(value, 1) * (1.0 - fraction))
+        return (
+            round(value / fraction),
+            max(value, math.floor((value - half) / fraction)),
+            math.ceil((value + half) / fraction),
+        )
+
+    var = summary.m2 / (n - 1) if n >= 2 else single_value_spread if n else math.nan
+    if sampled:
+        mean_half = z * math.sqrt(var * (1.0 - fraction) / n) if n >= 2 else math.inf
+        rel = z * math.sqrt(2.0 * (1.0 - fraction) / (n - 1)) if n >= 2 else math.inf
+        var_range = (var * max(0.0, 1.0 - rel), var * (1.0 + rel))
+        lowest, highest = (-math.inf, summary.min), (summary.max, math.inf)
+    else:
+        spread = summary.max - summary.min if n else 0.0
+        tolerance = 8.0 * n * sys.float_info.epsilon
+        mean_half = tolerance * max(abs(summary.min), abs(summary.max)) if n else 0.0
+        var_range = (max(0.0, var - tolerance * spread ** 2), var + tolerance * spread ** 2)
+        lowest, highest = (summary.min, summary.min), (summary.max, summary.max)
+    return {
+        "n": count(n),
+        "n_missing": count(summary.n_missing),
+        "mean": (summary.mean, summary.mean - mean_half, summary.mean + mean_half),
+        "var": (var, *var_range),
+        "min": (summary.min, *lowest),
+        "max": (summary.max, *highest),
+    }
+
+
+_PREVIEW_FIELDS = {"count": ("n", "n_missing"), "moments": ("mean", "var"),
+                   "extrema": ("min", "max")}
+
+
+def preview_statistics(
+    summary: PreviewSummary,
+    stats: Sequence[str],
+    fraction: float = 1.0,
+    confidence: float = PREVIEW_CONFIDENCE,
+    canonical: bool = False,
+) -> List[Tuple[float, float, float, bool]]:
+    """Estimate every statistic of one group as ``(value, lower, upper, approximate)``.
+
+    Bounds come from evaluating each kernel at every combination of the ends
+    of the intervals it reads; registered statistics are monotone in each
+    intermediate, except the coefficient of variation when the mean interval
+    contains zero, which is then unbounded. Quantile ranks combine the sketch
+    error with the sampling (DKW) error, each at half the miss probability,
+    so every interval holds with at least *confidence*. *canonical* is as for
+    ``compute_group_statistics``.
+    """
+
+    plan = plan_statistics(tuple(stats))
+    fields = _preview_fields(summary, fraction, confidence, math.nan if canonical else 0.0)
+    sources = [not summary.sketch.exact, fraction < 1.0]
+    level = 1.0 - (1.0 - confidence) / max(1, sum(sources))
+    eps = summary.sketch.rank_error(level)
+    if fraction < 1.0:
+        eps += _sampling_rank_error(summary.n, level)
+
+    def intermediates(pick: Mapping[str, int], shifts: Mapping[float, float]):
+        values = {name: fields[name][pick.get(name, 0)] for name in fields}
+        values["sd"] = math.sqrt(values["var"]) if values["var"] >= 0 else math.nan
+        return PreviewIntermediates(values, summary.sketch, shifts)
+
+    row: List[Tuple[float, float, float, bool]] = []
+    point = plan.evaluate_intermediates(intermediates({}, {}))
+    for stat, value in zip(plan.statistics, point):
+        if not summary.n and not stat.needs <= {"count"}:
+            row.append((value, value, value, False))
+            continue
+        names = [name for need in sorted(stat.needs) for name in _PREVIEW_FIELDS.get(need, ())]
+        probs = (stat.probs or (0.5,)) if "sorted" in stat.needs else ()
+        ends = []
+        for corner in itertools.product((1, 2), repeat=len(names) + len(probs)):
+            pick = dict(zip(names, corner))
+            shifts = {p: eps if end == 2 else -eps for p, end in zip(probs, corner[len(names):])}
+            ends.append(stat.kernel(intermediates(pick, shifts)))
+        ends = [end for end in ends if not math.isnan(end)]
+        mean_low, mean_high = fields["mean"][1:]
+        if not ends or math.isnan(value):
+            lower = upper = value
+        elif stat.name == "cv" and mean_low <= 0.0 <= mean_high:
+            lower, upper = -math.inf, math.inf
+        else:
+            lower, upper = min(ends), max(ends)
+        row.append((value, lower, upper, lower != upper))
+    return row
+
+
+def preview_group_statistics(
+    group_values: Sequence[Sequence[Optional[float]]],
+    stats: Sequence[str],
+    options: PreviewOptions,
+    fraction: float = 1.0,
+    executor: Optional[Executor] = None,
+    canonical: bool = False,
+) -> List[List[Tuple[float, float, float, bool]]]:
+    """Counterpart of ``compute_sharded_statistics`` for ``--preview``.
+
+    Each group is cut into chunks of ``PREVIEW_CHUNK_VALUES`` values that are
+    summarised independently (on *executor* when given) and merged in order,
+    so results do not depend on the worker count or pool type. *fraction* is
+    the row sampling rate the values were drawn at.
+    """
+
+    pending: List[Tuple[int, object]] = []
+    for index, values in enumerate(group_values):
+        for start in range(0, max(1, len(values)), PREVIEW_CHUNK_VALUES):
+            args = (values[start:start + PREVIEW_CHUNK_VALUES], options.k,
+                    f"{options.seed}:{index}:{start}")
+            summary = executor.submit(PreviewSummary, *args) if executor else PreviewSummary(*args)
+            pending.append((index, summary))
+
+    summaries: List[Optional[PreviewSummary]] = [None] * len(group_values)
+    for index, summary in pending:
+        if isinstance(summary, Future):
+            summary = summary.result()
+        if summaries[index] is None:
+            summaries[index] = summary  # type: ignore[assignment]
+        else:
+            summaries[index].merge(summary)  # type: ignore[union-attr, arg-type]
+    return [
+        preview_statistics(summary, stats, fraction, options.confidence,  # type: ignore[arg-type]
+                           canonical)
+        for summary in summaries
+    ]
+
+
+def compute_group_statistics(
+    group_values: Sequence[Sequence[Optional[float]]],
+    stats: Sequence[str],
+    canonical: bool = False,
+) -> List[List[float]]:
+    """Return one list of statistic values per group, in input order.
+
+    *stats* are names rather than a plan so that shards stay picklable for
+    process pools; each process resolves a given list once. A single value
+    has a spread (SD, VAR, SE) of 0.0, as this engine always reported, or NaN
+    like ``ars_runtime`` when *canonical*.
+    """
+
+    plan = plan_statistics(tuple(stats))
+    spread = math.nan if canonical else 0.0
+    return [
+        plan.evaluate_intermediates(GroupIntermediates(values, spread)) for values in group_values
+    ]
+
+
+def shard_bounds(weights: Sequence[int], shard_count: int) -> List[Tuple[int, int]]:
+    """Split ``range(len(weights))`` into contiguous shards of similar total weight."""
+
+    if not weights:
+        return []
+    shard_count = max(1, min(shard_count, len(weights)))
+    target = sum(weights) / shard_count
+    bounds: List[Tuple[int, int]] = []
+    start = 0
+    running = 0
+    for index, weight in enumerate(weights):
+        running += weight
+        remaining_groups = len(weights) - index - 1
+        remaining_shards = shard_count - len(bounds) - 1
+        if remaining_shards and (running >= target or remaining_groups == remaining_shards):
+            bounds.append((start, index + 1))
+            start = index + 1
+            running = 0
+    bounds.append((start, len(weights)))
+    return bounds
+
+
+def compute_sharded_statistics(
+    group_values: Sequence[Sequence[Optional[float]]],
+    stats: Sequence[str],
+    executor: Optional[Executor] = None,
+    shard_count: int = 1,
+    canonical: bool = False,
+) -> List[List[float]]:
+    """Compute per-group statistics, optionally fanning groups out over *executor*.
+
+    Groups are split into contiguous shards balanced by row count so that the
+    merged result keeps the original group order (and therefore the ARD row
+    order) regardless of which worker finishes first.
+    """
+
+    if executor is None or shard_count <= 1 or len(group_values) < 2:
+        return compute_group_statistics(group_values, stats, canonical)
+
+    bounds = shard_bounds([len(values) for values in group_values], shard_count)
+    futures = [
+        executor.submit(compute_group_statistics, group_values[start:stop], list(stats), canonical)
+        for start, stop in bounds
+    ]
+    merged: List[List[float]] = []
+    for future in futures:
+        merged.extend(future.result())
+    return merged
+
+
+class SharedColumns:
+    """Read-only column buffers in ``multiprocessing.shared_memory`` for sharded analyses.
+
+    Text columns are stored as int32 codes into a small table of their
+    distinct values. Numeric columns are stored as float64 values plus one
+    state byte per row (0 value, 1 blank, 2 unparseable, with the original
+    text kept aside for ``safe_float`` to report). Shard tasks receive only
+    ``spec`` (block names and the small tables) and attach to the blocks, so
+    row data is never pickled to workers.
+    """
+
+    def __init__(
+        self,
+        rows: Sequence[Mapping[str, object]],
+        text_columns: Sequence[str],
+        numeric_columns: Sequence[str],
+    ):
+        self.row_count = len(rows)
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self.spec: Dict[str, object] = {"text": {}, "numeric": {}}
+        try:
+            for name in dict.fromkeys(text_columns):
+                self._share_text(name, self._column(rows, name))
+            for name in dict.fromkeys(numeric_columns):
+                self._share_numeric(name, rows, self._column(rows, name))
+        except BaseException:
+            self.close()
+            raise
+
+    @staticmethod
+    def _column(rows: Sequence[Mapping[str, object]], name: str) -> Sequence[object]:
+        if isinstance(rows, ColumnarDataset):
+            return rows.column(name)
+        return [row.get(name) for row in rows]
+
+    def _block(self, data: bytes) -> str:
+        block = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        self._blocks.append(block)
+        block.buf[:len(data)] = data
+        return block.name
+
+    def _share_text(self, name: str, column: Sequence[object]) -> None:
+        index: Dict[object, int] = {}
+        codes = array("i", [index.setdefault(value, len(index)) for value in column])
+        self.spec["text"][name] = (self._block(codes.tobytes()), list(index))  # type: ignore[index]
+
+    def _share_numeric(
+        self, name: str, rows: Sequence[Mapping[str, object]], column: Sequence[object]
+    ) -> None:
+        source = rows.columns.get(name) if isinstance(rows, ColumnarDataset) else None
+        if not (isinstance(source, NumericColumn) and len(source) == self.row_count):
+            source = NumericColumn(column)
+        state = bytearray(self.row_count)
+        for position in source.missing:
+            state[position] = 1
+        for position in source.invalid:
+            state[position] = 2
+        self.spec["numeric"][name] = (  # type: ignore[index]
+            self._block(source.values.tobytes()), self._block(bytes(state)), dict(source.invalid)
+        )
+
+    def values(self, name: str, groups: Sequence[bytes]) -> List[List[Optional[float]]]:
+        return _shared_group_values(self.spec, name, groups)
+
+    def close(self) -> None:
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+class _Attached:
+    """Worker-side views of ``SharedColumns`` blocks; released and detached on exit."""
+
+    def __init__(self) -> None:
+        self._blocks: Dict[str, shared_memory.SharedMemory] = {}
+        self._views: List[memoryview] = []
+
+    def view(self, block_name: str, fmt: str) -> memoryview:
+        if block_name not in self._blocks:
+            self._blocks[block_name] = shared_memory.SharedMemory(name=block_name)
+        view = self._blocks[block_name].buf.cast(fmt)
+        self._views.append(view)
+        return view
+
+    def __enter__(self) -> "_Attached":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        for view in self._views:
+            view.release()
+        for block in self._blocks.values():
+            block.close()
+
+
+def _shared_filter_group(
+    spec: Mapping[str, object], where: str, group_vars: Sequence[str], start: int, stop: int
+) -> List[Tuple[Tuple[int, ...], bytes]]:
+    """Filter rows ``[start, stop)`` and group them by code; groups in first-appearance order.
+
+    Returns ``(key codes, row positions as array('q') bytes)`` per group.
+    """
+
+    text: Mapping[str, Tuple[str, List[object]]] = spec["text"]  # type: ignore[assignment]
+    with _Attached() as attached:
+        codes = {name: attached.view(block, "i")[start:stop] for name, (block, _) in text.items()}
+
+        def column(name: str) -> List[object]:
+            if name not in codes:
+                return [None] * (stop - start)
+            levels = text[name][1]
+            return [levels[code] for code in codes[name]]
+
+        mask = compile_population_where(where).mask(column, stop - start)
+        groups: Dict[Tuple[int, ...], array] = {}
+        key_codes = [codes[var].tolist() for var in group_vars]
+        keys = zip(*key_codes) if group_vars else itertools.repeat(())
+        for position, (keep, key) in enumerate(zip(mask, keys), start=start):
+            if keep:
+                members = groups.get(key)
+                if members is None:
+                    members = groups[key] = array("q")
+                members.append(position)
+        for view in codes.values():
+            view.release()
+    return [(key, members.tobytes()) for key, members in groups.items()]
+
+
+def _shared_group_values(
+    spec: Mapping[str, object], name: str, groups: Sequence[bytes]
+) -> List[List[Optional[float]]]:
+    """``safe_float`` values of numeric column *name* for each group's row positions."""
+
+    values_block, state_block, invalid = spec["numeric"][name]  # type: ignore[index]
+    with _Attached() as attached:
+        values, state = attached.view(values_block, "d"), attached.view(state_block, "B")
+        clean = not any(state)
+        result: List[List[Optional[float]]] = []
+        for packed in groups:
+            positions = array("q")
+            positions.frombytes(packed)
+            if clean:
+                result.append([values[position] for position in positions])
+                continue
+            group: List[Optional[float]] = []
+            for position in positions:
+                flag = state[position]
+                if flag == 0:
+                    group.append(values[position])
+                elif flag == 1:
+                    group.append(None)
+                else:
+                    group.append(safe_float(invalid[position]))
+            result.append(group)
+    return result
+
+
+def _shared_group_statistics(
+    spec: Mapping[str, object],
+    name: str,
+    groups: Sequence[bytes],
+    stats: Sequence[str],
+    canonical: bool,
+) -> List[List[float]]:
+    return compute_group_statistics(_shared_group_values(spec, name, groups), stats, canonical)
+
+
+class ShardedPopulation:
+    """One analysis population filtered, grouped and summarised on a worker pool.
+
+    The filter and grouping run over contiguous row shards and are merged in
+    shard order, so groups keep their first-appearance order and rows their
+    input order. Statistics then run over contiguous group shards, reading
+    values from the shared buffers. The ARD is therefore identical to a
+    serial run whatever the worker count or pool type. ``close`` releases the
+    shared memory.
+    """
+
+    def __init__(
+        self,
+        rows: Sequence[Mapping[str, object]],
+        where: str,
+        group_vars: Sequence[str],
+        variables: Sequence[str],
+        executor: Executor,
+        shard_count: int,
+    ):
+        filter_columns = compile_population_where(where).names
+        self.columns = SharedColumns(rows, [*group_vars, *filter_columns], variables)
+        self.executor = executor
+        self.shard_count = shard_count
+        try:
+            self._group(where, group_vars)
+        except BaseException:
+            self.close()
+            raise
+
+    def _group(self, where: str, group_vars: Sequence[str]) -> None:
+        count = self.columns.row_count
+        shards = max(1, min(self.shard_count, count))
+        bounds = [(count * i // shards, count * (i + 1) // shards) for i in range(shards)]
+        futures = [
+            self.executor.submit(
+                _shared_filter_group, self.columns.spec, where, list(group_vars), start, stop
+            )
+            for start, stop in bounds
+        ]
+        merged: Dict[Tuple[int, ...], bytearray] = {}
+        for future in futures:
+            for key, packed in future.result():
+                merged.setdefault(key, bytearray()).extend(packed)
+        levels = [self.columns.spec["text"][var][1] for var in group_vars]  # type: ignore[index]
+        self.group_keys = [
+            tuple(levels[i][code] for i, code in enumerate(key)) for key in merged
+        ]
+        self.groups = [bytes(packed) for packed in merged.values()]
+        self.row_count = sum(len(packed) for packed in self.groups) // 8
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def values(self, variable: str) -> List[List[Optional[float]]]:
+        return self.columns.values(variable, self.groups)
+
+    def statistics(
+        self, variable: str, stats: Sequence[str], canonical: bool = False
+    ) -> List[List[float]]:
+        weights = [len(packed) // 8 for packed in self.groups]
+        futures = [
+            self.executor.submit(
+                _shared_group_statistics, self.columns.spec, variable, self.groups[start:stop],
+                list(stats), canonical,
+            )
+            for start, stop in shard_bounds(weights, self.shard_count)
+        ]
+        merged: List[List[float]] = []
+        for future in futures:
+            merged.extend(future.result())
+        return merged
+
+    def close(self) -> None:
+        self.columns.close()
+
+
+def create_executor(kind: str, workers: int) -> Optional[Executor]:
+    """Return a pool for group sharding, or ``None`` when running serially."""
+
+    if workers <= 1:
+        return None
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=workers)
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    raise ValueError(f"Unknown executor kind: {kind}")
+
+
+ArdTable = Tuple[str, List[str], List[Dict[str, object]]]
+
+
 def summarise_analysis(
     analysis: Mapping[str, object],
     datasets: Mapping[str, Sequence[Mapping[str, object]]],
     root: Path,
+    executor: Optional[Executor] = None,
+    shard_count: int = 1,
+    writer: Optional[AsyncWriter] = None,
+    store: Optional["AggregateStore"] = None,
+    preview: Optional[PreviewOptions] = None,
+    metrics: Optional[MutableMapping[str, object]] = None,
+    canonical: bool = False,
 ) -> None:
+    table = build_analysis_ard(
+        analysis, datasets, executor, shard_count, store, preview, metrics, canonical
+    )
+    if table is None:
+        return
+
+    file_name, ordered_cols, output_rows = table
+    if metrics is not None:
+        metrics["file"] = file_name
+        metrics["rows_out"] = len(output_rows)
+    output_path = root / file_name
+    if writer is None:
+        write_ard(output_path, ordered_cols, output_rows)
+    else:
+        writer.submit(write_ard, output_path, ordered_cols, output_rows)
+
+
+def build_analysis_ard(
+    analysis: Mapping[str, object],
+    datasets: Mapping[str, Sequence[Mapping[str, object]]],
+    executor: Optional[Executor] = None,
+    shard_count: int = 1,
+    store: Optional["AggregateStore"] = None,
+    preview: Optional[PreviewOptions] = None,
+    metrics: Optional[MutableMapping[str, object]] = None,
+    canonical: bool = False,
+) -> Optional[ArdTable]:
+    """Compute one analysis and return ``(file name, columns, rows)`` without writing it.
+
+    If *metrics* is given, ``rows_in`` is set to the number of dataset rows
+    scanned (zero when every variable was served from the aggregate store)
+    and ``analysis_id`` to the raw id the file name is derived from.
+    *canonical* selects registry statistic names (``--stat-names``).
+    """
+
+    sharded: Dict[str, ShardedPopulation] = {}
+    try:
+        return _build_analysis_ard(
+            analysis, datasets, executor, shard_count, store, preview, metrics, canonical, sharded
+        )
+    finally:
+        for population in sharded.values():
+            population.close()
+
+
+def _build_analysis_ard(
+    analysis: Mapping[str, object],
+    datasets: Mapping[str, Sequence[Mapping[str, object]]],
+    executor: Optional[Executor],
+    shard_count: int,
+    store: Optional["AggregateStore"],
+    preview: Optional[PreviewOptions],
+    metrics: Optional[MutableMapping[str, object]],
+    canonical: bool,
+    sharded: Dict[str, ShardedPopulation],
+) -> Optional[ArdTable]:
+    if metrics is not None:
+        metrics["rows_in"] = 0
+
     dataset_name = analysis.get("dataset")
     if not isinstance(dataset_name, str):
         raise ValueError("Analysis is missing a 'dataset' entry")
@@ -359,33 +1902,64 @@ def summarise_analysis(
         available = ", ".join(sorted(datasets))
         raise KeyError(f"Dataset '{dataset_name}' not found in data directory. Available: {available}")
 
-    rows = list(datasets[dataset_name])
-
     population = analysis.get("population") or {}
     where = str(population.get("where", ""))
-    filtered_rows = [row for row in rows if evaluate_population_where(where, row)]
-    if not filtered_rows:
-        raise ValueError(
-            f"Population filter for analysis '{analysis.get('analysis_id')}' produced an empty dataset"
-        )
-
     pop_label = analysis_population_label(population, where)
 
-    grouping = analysis.get("grouping") or []
-    if isinstance(grouping, Mapping):
-        grouping = [grouping]
-    group_vars = [
-        str(group.get("variable") or group.get("name") or "")
-        for group in grouping
-        if isinstance(group, Mapping)
-    ]
-    group_vars = [var for var in group_vars if var]
+    group_vars = analysis_group_vars(analysis)
+
+    # The population is only materialised on demand so that analyses served
+    # entirely from the aggregate store never read the raw rows.
+    population: Dict[str, Sequence[Mapping[str, object]]] = {}
+
+    # With a worker pool the filter and grouping are sharded over shared
+    # column buffers as well, rather than run here and shipped to workers.
+    shard = executor is not None and shard_count > 1 and preview is None
 
-    ensure_grouping_variables(filtered_rows, group_vars, dataset_name)
+    def load_sharded_population() -> ShardedPopulation:
+        if "population" not in sharded:
+            source_rows = datasets[dataset_name]
+            if metrics is not None:
+                metrics["rows_in"] = len(source_rows)
+            numeric = [str(v.get("name")) for v in variables if isinstance(v, Mapping)]
+            result = sharded["population"] = ShardedPopulation(
+                source_rows, where, group_vars, numeric, executor, shard_count
+            )
+            if not result.groups:
+                raise ValueError(
+                    f"Population filter for analysis '{analysis.get('analysis_id')}' produced an empty dataset"
+                )
+            # The first filtered row, as the serial path checks population[0].
+            population["first"] = [source_rows[array("q", result.groups[0][:8])[0]]]
+            ensure_grouping_variables(population["first"], group_vars, dataset_name)
+        return sharded["population"]
+
+    def load_population_rows() -> Sequence[Mapping[str, object]]:
+        if shard:
+            load_sharded_population()
+            return population["first"]
+        if "rows" not in population:
+            # Filter straight from the shared dataset rather than copying it first.
+            source_rows = datasets[dataset_name]
+            population_rows = population["rows"] = filter_population(source_rows, where)
+            if metrics is not None:
+                metrics["rows_in"] = len(source_rows)
+            if not population_rows:
+                raise ValueError(
+                    f"Population filter for analysis '{analysis.get('analysis_id')}' produced an empty dataset"
+                )
+            ensure_grouping_variables(population_rows, group_vars, dataset_name)
+        return population["rows"]
 
     variables = analysis.get("variables") or []
     if isinstance(variables, Mapping):
         variables = [variables]
+
+    if preview is not None:
+        store = None  # the store only holds exact aggregates
+    if store is None:
+        load_population_rows()
+
     if not variables:
         raise ValueError("Analysis is missing a 'variables' entry")
 
@@ -403,22 +1977,65 @@ def summarise_analysis(
         var_name = variable.get("name")
         if not isinstance(var_name, str) or not var_name:
             raise ValueError("Analysis variable is missing a name")
-        if filtered_rows and var_name not in filtered_rows[0]:
-            raise KeyError(
-                f"Variable '{var_name}' for analysis '{analysis.get('analysis_id')}' "
-                f"not found in dataset '{dataset_name}'"
-            )
 
         method = select_method_for_variable(methods, variable)
-        stats = [normalise_stat_keyword(stat) for stat in collect_statistics(variable, method)]
-        stats = list(dict.fromkeys(stats))  # preserve order, remove duplicates
-
-        for group_key, group_rows in iter_grouped_rows(filtered_rows, group_vars):
-            values = [safe_float(row.get(var_name)) for row in group_rows]
-            total_rows = len(values)
-
-            for stat in stats:
-                stat_value = compute_statistic(values, stat)
+        # Fails fast on unsupported statistics.
+        stats = resolve_statistics(collect_statistics(variable, method), canonical)
+        plan = plan_statistics(tuple(stats))
+        spread = math.nan if canonical else 0.0
+
+        cached = store.lookup(dataset_name, where, group_vars, var_name) if store else None
+        if cached is not None:
+            group_keys = [tuple(group["key"]) for group in cached]
+            group_results = [
+                plan.evaluate_intermediates(AggregateIntermediates(group, spread))
+                for group in cached
+            ]
+        else:
+            filtered_rows = load_population_rows()
+            if filtered_rows and var_name not in filtered_rows[0]:
+                raise KeyError(
+                    f"Variable '{var_name}' for analysis '{analysis.get('analysis_id')}' "
+                    f"not found in dataset '{dataset_name}'"
+                )
+
+            if shard:
+                sharded_population = load_sharded_population()
+                group_keys = sharded_population.group_keys
+                group_results = sharded_population.statistics(var_name, stats, canonical)
+                if store is not None:
+                    group_values = sharded_population.values(var_name)
+                    store.save(dataset_name, where, group_vars, var_name, group_keys, group_values)
+            else:
+                # Project the analysis variable into one read-only value column per
+                # group before any sharding so workers never see the raw row dicts.
+                group_keys, group_values = group_variable_values(
+                    filtered_rows, group_vars, var_name
+                )
+                if preview is None:
+                    group_results = compute_sharded_statistics(
+                        group_values, stats, executor, shard_count, canonical
+                    )
+                else:
+                    fraction = getattr(datasets[dataset_name], "fraction", 1.0)
+                    group_results = preview_group_statistics(
+                        group_values, stats, preview, fraction, executor, canonical
+                    )
+                if store is not None:
+                    store.save(dataset_name, where, group_vars, var_name, group_keys, group_values)
+
+        for group_key, stat_values in zip(group_keys, group_results):
+            for stat, stat_result in zip(stats, stat_values):
+                extra: Dict[str, object] = {}
+                if preview is not None:
+                    stat_value, lower, upper, approximate = stat_result  # type: ignore[misc]
+                    extra = {
+                        "stat_lower": lower,
+                        "stat_upper": upper,
+                        "approximate": "Y" if approximate else "N",
+                    }
+                else:
+                    stat_value = stat_result
                 row: Dict[str, object] = {
                     "analysis_id": analysis.get("analysis_id"),
                     "dataset": dataset_name,
@@ -431,6 +2048,7 @@ def summarise_analysis(
                     "inputs_ver": traceability.get("inputs_version"),
                     "stat_name": stat.upper(),
                     "stat": stat_value,
+                    **extra,
                 }
 
                 for index, value in enumerate(group_key, start=1):
@@ -440,7 +2058,7 @@ def summarise_analysis(
                 output_rows.append(row)
 
     if not output_rows:
-        return
+        return None
 
     group_cols = [f"group{idx}" for idx in range(1, len(group_vars) + 1)]
     group_level_cols = [f"group{idx}_level" for idx in range(1, len(group_vars) + 1)]
@@ -453,6 +2071,9 @@ def summarise_analysis(
             "variable_label",
             "stat_name",
             "stat",
+        ]
+        + (["stat_lower", "stat_upper", "approximate"] if preview is not None else [])
+        + [
             "dataset",
             "population",
             "method",
@@ -467,9 +2088,21 @@ def summarise_analysis(
         for column in ordered_cols:
             row.setdefault(column, None)
 
-    output_path = root / f"ARD_{slugify(analysis.get('analysis_id') or dataset_name + '_SUMMARY')}.csv"
+    analysis_id = str(analysis.get("analysis_id") or dataset_name + "_SUMMARY")
+    if metrics is not None:
+        metrics["analysis_id"] = analysis_id
+    # Slugs never contain ".", so a preview can never replace an exact ARD.
+    suffix = ".preview.csv" if preview is not None else ".csv"
+    return f"ARD_{slugify(analysis_id)}{suffix}", ordered_cols, output_rows
+
+
+def write_ard(
+    output_path: Path,
+    fieldnames: Sequence[str],
+    output_rows: Sequence[Mapping[str, object]],
+) -> None:
     with output_path.open("w", newline="", encoding="utf-8") as handle:
-        writer = csv.DictWriter(handle, fieldnames=ordered_cols)
+        writer = csv.DictWriter(handle, fieldnames=fieldnames)
         writer.writeheader()
         for row in output_rows:
             writer.writerow(row)
@@ -493,29 +2126,643 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         default=Path("data"),
         help="Directory containing CSV datasets (default: ./data)",
     )
-    return parser.parse_args(argv)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of workers used to shard each analysis by group (default: 1, serial)",
+    )
+    parser.add_argument(
+        "--executor",
+        choices=("process", "thread"),
+        default="process",
+        help="Pool type used when --workers is greater than 1 (default: process)",
+    )
+    parser.add_argument(
+        "--io-threads",
+        type=int,
+        default=2,
+        help=(
+            "Background threads that prefetch datasets and write ARDs while "
+            "analyses are computed (default: 2; 0 runs I/O synchronously)"
+        ),
+    )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="Print the planned stages with row, memory and cost estimates as JSON and exit",
+    )
+    parser.add_argument(
+        "--fast-csv",
+        dest="fast_csv",
+        action="store_true",
+        help=(
+            "Memory-map inputs and parse only the columns the analyses use into "
+            "typed columns instead of csv.DictReader rows"
+        ),
+    )
+    parser.add_argument(
+        "--agg-store",
+        dest="agg_store",
+        type=Path,
+        default=None,
+        help="Directory of the materialized aggregate store (default: disabled)",
+    )
+    parser.add_argument(
+        "--agg-store-max-mb",
+        dest="agg_store_max_mb",
+        type=float,
+        default=256.0,
+        help="Evict least recently used aggregates beyond this size (default: 256)",
+    )
+    parser.add_argument(
+        "--stat-names",
+        dest="stat_names",
+        choices=("legacy", "canonical"),
+        default="legacy",
+        help=(
+            "How statistics are labelled: 'legacy' keeps this engine's historical labels "
+            "(STD, P25, ...) and a spread of 0.0 for single values; 'canonical' uses the "
+            "registry names ars_runtime emits (SD, Q1, ...), one row per statistic and "
+            "NaN spreads (default: legacy)"
+        ),
+    )
+    parser.add_argument(
+        "--batch",
+        type=Path,
+        default=None,
+        help="Run every (ars, data, out) job listed in this JSON manifest instead of --ars/--data",
+    )
+    parser.add_argument(
+        "--batch-summary",
+        dest="batch_summary",
+        type=Path,
+        default=None,
+        help="Where to write the batch timing summary (default: next to the manifest)",
+    )
+    parser.add_argument(
+        "--batch-prefetch",
+        dest="batch_prefetch",
+        type=int,
+        default=1,
+        help="Later batch jobs whose inputs load while the current job runs (default: 1)",
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help=(
+            "Estimate every statistic from a row sample, with quantiles from mergeable "
+            "KLL sketches, and add stat_lower/stat_upper/approximate columns; outputs "
+            "are written as ARD_<id>.preview.csv next to, never over, exact ARDs"
+        ),
+    )
+    parser.add_argument(
+        "--preview-sample",
+        dest="preview_sample",
+        type=float,
+        default=PreviewOptions.sample,
+        help=(
+            "Fraction of CSV records parsed in preview mode; raised so that at least "
+            f"{PreviewOptions.min_rows} records of each file are kept, and 1.0 reads "
+            f"every record (default: {PreviewOptions.sample})"
+        ),
+    )
+    parser.add_argument(
+        "--preview-k",
+        dest="preview_k",
+        type=int,
+        default=200,
+        help="KLL sketch accuracy parameter; larger is more accurate (default: 200)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=123,
+        help="Seed for preview sampling and sketch compaction (default: 123)",
+    )
+    args = parser.parse_args(argv)
+    if args.batch is not None and args.explain:
+        parser.error("--explain cannot be combined with --batch")
+    return args
+
+
+def load_analyses(ars_path: Path, data_dir: Path) -> List[Mapping[str, object]]:
+    if not ars_path.exists():
+        raise FileNotFoundError(f"Could not locate ARS file at {ars_path}")
+    if not data_dir.exists():
+        raise FileNotFoundError(f"Could not locate data directory at {data_dir}")
+
+    with ars_path.open(encoding="utf-8") as handle:
+        ars = json.load(handle)
+
+    analyses = ars.get("analyses")
+    if not isinstance(analyses, Sequence) or not analyses:
+        raise ValueError(f"No analyses were found in {ars_path}")
+    return list(analyses)
+
+
+def create_store(
+    args: argparse.Namespace, paths: Mapping[str, Path], create: bool = True
+) -> Optional["AggregateStore"]:
+    """The ``--agg-store`` cache; with ``create=False`` a missing directory is not made."""
+
+    if args.agg_store is None:
+        return None
+    return AggregateStore(
+        args.agg_store, paths, int(args.agg_store_max_mb * 1024 * 1024), create=create
+    )
+
+
+def served_from_store(analysis: Mapping[str, object], store: Optional[AggregateStore]) -> bool:
+    """Whether *store* already holds every variable of *analysis*."""
+
+    if store is None or not isinstance(analysis.get("dataset"), str):
+        return False
+    population = analysis.get("population") or {}
+    where = str(population.get("where", "")) if isinstance(population, Mapping) else ""
+    group_vars = analysis_group_vars(analysis)
+    variables = analysis.get("variables") or []
+    if isinstance(variables, Mapping):
+        variables = [variables]
+    names = [str(v.get("name")) for v in variables if isinstance(v, Mapping)]
+    return bool(names) and all(
+        store.peek(str(analysis["dataset"]), where, group_vars, name) for name in names
+    )
+
+
+def prefetch_order(
+    analyses: Sequence[Mapping[str, object]],
+    store: Optional[AggregateStore],
+    args: argparse.Namespace,
+) -> List[str]:
+    """Datasets to load up front, in first-use order, skipping aggregate-store hits."""
+
+    if args.preview:
+        store = None  # the store only holds exact aggregates
+    return [
+        str(a.get("dataset"))
+        for a in analyses
+        if isinstance(a, Mapping) and not served_from_store(a, store)
+    ]
 
 
 def main(argv: Optional[Sequence[str]] = None) -> None:
     args = parse_args(argv)
+    if args.batch is not None:
+        run_batch(args.batch, args)
+        return
+
     root = Path.cwd()
+    analyses = load_analyses(args.ars_path, args.data_dir)
 
-    if not args.ars_path.exists():
-        raise FileNotFoundError(f"Could not locate ARS file at {args.ars_path}")
-    if not args.data_dir.exists():
-        raise FileNotFoundError(f"Could not locate data directory at {args.data_dir}")
+    paths = discover_datasets(args.data_dir)
+    if args.explain:
+        # Explaining never writes: the store is only peeked at, not created.
+        print(json.dumps(explain(analyses, paths, args, create_store(args, paths, create=False)),
+                         indent=2, default=str))
+        return
 
-    with args.ars_path.open(encoding="utf-8") as handle:
-        ars = json.load(handle)
+    store = create_store(args, paths)
 
-    analyses = ars.get("analyses")
-    if not isinstance(analyses, Sequence) or not analyses:
-        raise ValueError(f"No analyses were found in {args.ars_path}")
+    # Datasets are parsed only when an analysis misses the aggregate store.
+    projections = analysis_projections(analyses) if args.fast_csv else None
+    preview = preview_options(args)
 
-    datasets = load_datasets(args.data_dir)
+    if args.io_threads <= 0:
+        datasets = LazyDatasets(paths, projections, preview)
+        run_analyses(analyses, datasets, root, args, store=store)
+        return
 
-    for analysis in analyses:
-        summarise_analysis(analysis, datasets, root)
+    priority = prefetch_order(analyses, store, args)
+    with ThreadPoolExecutor(max_workers=args.io_threads, thread_name_prefix="ars-load") as pool:
+        datasets = PrefetchedDatasets(paths, pool, priority, projections=projections,
+                                      preview=preview)
+        # On error the writer is stopped without masking the original exception.
+        with AsyncWriter(maxsize=args.io_threads * 2) as writer:
+            run_analyses(analyses, datasets, root, args, writer, store)
+
+
+def run_analyses(
+    analyses: Sequence[Mapping[str, object]],
+    datasets: Mapping[str, Sequence[Mapping[str, object]]],
+    root: Path,
+    args: argparse.Namespace,
+    writer: Optional[AsyncWriter] = None,
+    store: Optional[AggregateStore] = None,
+    executor: Optional[Executor] = None,
+) -> None:
+    owns_executor = executor is None
+    if owns_executor:
+        executor = create_executor(args.executor, args.workers)
+    timer = RunTimer()
+    try:
+        for analysis in analyses:
+            metrics: Dict[str, object] = {}
+            start = time.perf_counter()
+            cpu = time.process_time()
+            summarise_analysis(
+                analysis,
+                datasets,
+                root,
+                executor,
+                shard_count=args.workers,
+                writer=writer,
+                store=store,
+                preview=preview_options(args),
+                metrics=metrics,
+                canonical=args.stat_names == "canonical",
+            )
+            if "file" in metrics:
+                timer.record(
+                    str(metrics["analysis_id"]),
+                    start,
+                    cpu,
+                    metrics.get("rows_in"),  # type: ignore[arg-type]
+                    metrics.get("rows_out"),  # type: ignore[arg-type]
+                    file=str(metrics["file"]),
+                )
+    finally:
+        if owns_executor and executor is not None:
+            executor.shutdown()
+    if args.preview:
+        write_timings(root, dict(timer.sidecar(), approximate=True), PREVIEW_TIMINGS_FILE_NAME)
+    else:
+        write_timings(root, timer.sidecar())
+
+
+# Rough in-memory footprint of one csv.DictReader row: dict overhead per row
+# plus a key slot and a small str per field.
+ROW_OVERHEAD_BYTES = 232
+FIELD_OVERHEAD_BYTES = 90
+
+
+def probe_dataset(csv_path: Path, sample_rows: int = 1000) -> Dict[str, object]:
+    """Cheap statistics for one CSV from its header and first *sample_rows* rows."""
+
+    size = csv_path.stat().st_size
+    with csv_path.open(newline="", encoding="utf-8") as handle:
+        header_line = handle.readline()
+        reader = csv.DictReader([header_line] + [handle.readline() for _ in range(sample_rows)])
+        sample = [dict(row) for row in reader]
+    header_bytes = len(header_line.encode("utf-8"))
+    sample_bytes = sum(
+        len(",".join(str(v or "") for v in row.values()).encode("utf-8")) + 1 for row in sample
+    )
+    if len(sample) < sample_rows:
+        est_rows = len(sample)
+    else:
+        est_rows = int((size - header_bytes) / max(1.0, sample_bytes / len(sample)))
+    columns = next(csv.reader([header_line])) if header_line else []
+    return {
+        "path": str(csv_path),
+        "bytes": size,
+        "columns": columns,
+        "estimated_rows": est_rows,
+        "sampled_rows": len(sample),
+        "sample": sample,
+    }
+
+
+def explain_analysis(
+    analysis: Mapping[str, object],
+    probes: Mapping[str, Mapping[str, object]],
+    args: argparse.Namespace,
+    store: Optional[AggregateStore] = None,
+) -> Dict[str, object]:
+    """Describe the stages ``summarise_analysis`` would run, with estimates."""
+
+    dataset_name = str(analysis.get("dataset"))
+    probe = probes.get(dataset_name)
+    if probe is None:
+        return {
+            "analysis_id": analysis.get("analysis_id"),
+            "error": f"Dataset '{dataset_name}' not found",
+        }
+    sample: List[Mapping[str, object]] = probe["sample"]  # type: ignore[assignment]
+    est_rows = int(probe["estimated_rows"])  # type: ignore[arg-type]
+    n_columns = len(probe["columns"])  # type: ignore[arg-type]
+
+    population = analysis.get("population") or {}
+    where = str(population.get("where", "")) if isinstance(population, Mapping) else ""
+    try:
+        kept = [row for row in sample if evaluate_population_where(where, row)]
+        selectivity = len(kept) / len(sample) if sample else 1.0
+    except (PopulationExpressionError, ValueError, TypeError) as exc:
+        kept, selectivity = list(sample), 1.0
+        where = f"{where} (not evaluable on sample: {exc})"
+    filtered_rows = int(round(est_rows * selectivity))
+
+    group_vars = analysis_group_vars(analysis)
+    cardinalities = {var: len({row.get(var) for row in kept}) for var in group_vars}
+    groups = len({tuple(row.get(var) for var in group_vars) for row in kept}) or 1
+
+    variables = analysis.get("variables") or []
+    if isinstance(variables, Mapping):
+        variables = [variables]
+    methods = analysis.get("methods") or []
+    if isinstance(methods, Mapping):
+        methods = [methods]
+
+    rows_per_group = max(1.0, filtered_rows / groups)
+    variable_plans = []
+    cost = float(est_rows * n_columns)  # parse + filter
+    for variable in variables:
+        if not isinstance(variable, Mapping):
+            continue
+        method = select_method_for_variable(methods, variable)
+        stats = resolve_statistics(
+            collect_statistics(variable, method), args.stat_names == "canonical"
+        )
+        plan = plan_statistics(tuple(stats))
+        sorts = "sorted" in plan.needs
+        var_cost = filtered_rows * (len(stats) + (math.log2(rows_per_group + 1) if sorts else 0.0))
+        cached = False
+        if store is not None and not args.preview:
+            raw_where = str(population.get("where", "")) if isinstance(population, Mapping) else ""
+            cached = store.peek(dataset_name, raw_where, group_vars, str(variable.get("name")))
+        if cached:
+            var_cost = float(groups * len(stats))
+        cost += var_cost
+        variable_plans.append(
+            {
+                "variable": variable.get("name"),
+                "statistics": [st.upper() for st in stats],
+                "kernels": [
+                    {
+                        "statistic": label.upper(),
+                        "kernel": "sort+quantile" if "sorted" in stat.needs else "single-pass",
+                        "intermediates": sorted(stat.needs),
+                    }
+                    for label, stat in zip(plan.labels, plan.statistics)
+                ],
+                "intermediates": sorted(plan.needs),
+                "aggregate_store": None if store is None else ("hit" if cached else "miss"),
+                "estimated_cost": var_cost,
+            }
+        )
+
+    memory = est_rows * (ROW_OVERHEAD_BYTES + FIELD_OVERHEAD_BYTES * n_columns) + filtered_rows * 24
+    return {
+        "analysis_id": analysis.get("analysis_id"),
+        "stages": [
+            {
+                "stage": "load",
+                "dataset": dataset_name,
+                "bytes": probe["bytes"],
+                "estimated_rows": est_rows,
+            },
+            {
+                "stage": "filter",
+                "where": where or None,
+                "selectivity": round(selectivity, 4),
+                "estimated_rows": filtered_rows,
+            },
+            {
+                "stage": "partition",
+                "group_by": group_vars,
+                "cardinalities": cardinalities,
+                "estimated_groups": groups,
+                "shards": max(1, min(args.workers, groups)),
+            },
+            {"stage": "summarise", "variables": variable_plans},
+            {
+                "stage": "emit",
+                "estimated_rows": groups * sum(len(v["statistics"]) for v in variable_plans),
+            },
+        ],
+        "estimated_memory_bytes": int(memory),
+        "estimated_cost": cost,
+    }
+
+
+def explain(
+    analyses: Sequence[Mapping[str, object]],
+    paths: Mapping[str, Path],
+    args: argparse.Namespace,
+    store: Optional[AggregateStore] = None,
+) -> Dict[str, object]:
+    """Build the ``--explain`` plan: probes of the datasets used plus one entry per analysis.
+
+    Row counts are extrapolated from file size and a sample of leading rows;
+    filter selectivity and group counts are measured on that sample. Costs
+    are in abstract row-operation units and ``relative_cost`` is each
+    analysis' share of the total.
+    """
+
+    used = {str(a.get("dataset")) for a in analyses if isinstance(a, Mapping)}
+    probes = {name: probe_dataset(path) for name, path in paths.items() if name in used}
+    plans = [explain_analysis(a, probes, args, store) for a in analyses if isinstance(a, Mapping)]
+    total = sum(float(p.get("estimated_cost", 0.0)) for p in plans) or 1.0
+    for plan in plans:
+        plan["relative_cost"] = round(float(plan.get("estimated_cost", 0.0)) / total, 4)
+    peak = 0
+    for name in probes:
+        width = len(probes[name]["columns"])  # type: ignore[arg-type]
+        peak += int(probes[name]["estimated_rows"]) * (  # type: ignore[arg-type]
+            ROW_OVERHEAD_BYTES + FIELD_OVERHEAD_BYTES * width
+        )
+    return {
+        "engine": "python-stdlib",
+        "datasets": {
+            name: {key: value for key, value in probe.items() if key != "sample"}
+            for name, probe in probes.items()
+        },
+        "analyses": plans,
+        "estimated_peak_memory_bytes": peak,
+        "workers": args.workers,
+    }
+
+
+def preview_options(args: argparse.Namespace) -> Optional[PreviewOptions]:
+    if not args.preview:
+        return None
+    if not 0.0 < args.preview_sample <= 1.0:
+        raise ValueError("--preview-sample must be in (0, 1]")
+    return PreviewOptions(k=args.preview_k, sample=args.preview_sample, seed=args.seed)
+
+
+@dataclass
+class BatchJob:
+    """One (spec, data directory, output directory) entry of a batch manifest."""
+
+    ars_path: Path
+    data_dir: Path
+    out_dir: Path
+    name: str = ""
+
+
+def load_manifest(manifest_path: Path) -> List[BatchJob]:
+    """Read a batch manifest; relative paths are resolved against its directory.
+
+    The manifest is either a JSON list of jobs or an object with a ``jobs``
+    list. Each job provides ``ars``, ``data`` and ``out`` and an optional
+    ``name``.
+    """
+
+    with manifest_path.open(encoding="utf-8") as handle:
+        manifest = json.load(handle)
+    entries = manifest.get("jobs") if isinstance(manifest, Mapping) else manifest
+    if not isinstance(entries, Sequence) or not entries:
+        raise ValueError(f"No jobs were found in batch manifest {manifest_path}")
+
+    base = manifest_path.parent
+    jobs: List[BatchJob] = []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, Mapping):
+            raise ValueError(f"Batch job {index} in {manifest_path} is not an object")
+        missing = [key for key in ("ars", "data", "out") if not entry.get(key)]
+        if missing:
+            raise ValueError(
+                f"Batch job {index} in {manifest_path} is missing: {', '.join(missing)}"
+            )
+        jobs.append(
+            BatchJob(
+                ars_path=base / str(entry["ars"]),
+                data_dir=base / str(entry["data"]),
+                out_dir=base / str(entry["out"]),
+                name=str(entry.get("name") or f"job{index + 1}"),
+            )
+        )
+    return jobs
+
+
+def run_batch(manifest_path: Path, args: argparse.Namespace) -> None:
+    """Run every job in *manifest_path*, sharing dataset loads across jobs.
+
+    Datasets that miss the aggregate store load on one loader pool, keyed by
+    resolved file path, so a CSV used by several specs is parsed once. Only
+    the running job and the next ``--batch-prefetch`` jobs have their loads
+    scheduled, so later jobs' inputs load while earlier jobs compute without
+    the whole batch being held in memory. A parsed CSV is dropped after the
+    last job that reads it. A failing job is recorded and the remaining jobs
+    still run.
+    """
+
+    jobs = load_manifest(manifest_path)
+    summary_path = args.batch_summary or manifest_path.with_name("batch_summary.json")
+    shared: Dict[object, Future] = {}
+    released = 0
+    results: List[Dict[str, object]] = []
+    batch_start = time.perf_counter()
+    batch_cpu = time.process_time()
+
+    loaded: List[Tuple[BatchJob, object]] = []
+    for job in jobs:
+        try:
+            analyses = load_analyses(job.ars_path, job.data_dir)
+            loaded.append((job, (analyses, discover_datasets(job.data_dir))))
+        except (OSError, ValueError) as exc:
+            loaded.append((job, exc))
+
+    # Each CSV is parsed once for the whole batch, projected onto the columns
+    # every job reads from it, and released after the last job that reads it.
+    readers: Dict[Path, List[Projection]] = {}
+    last_use: Dict[Path, int] = {}
+    for index, (job, state) in enumerate(loaded):
+        if isinstance(state, Exception):
+            continue
+        analyses, paths = state  # type: ignore[misc]
+        job_projections = analysis_projections(analyses)
+        for name in job_projections:
+            if name in paths:
+                key = paths[name].resolve()
+                readers.setdefault(key, []).append(job_projections[name])
+                last_use[key] = index
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, args.io_threads), thread_name_prefix="ars-load"
+    ) as pool:
+        prepared: List[Tuple[BatchJob, object]] = []
+
+        def prepare(state: object) -> object:
+            if isinstance(state, Exception):
+                return state
+            analyses, paths = state  # type: ignore[misc]
+            try:
+                store = create_store(args, paths)
+                priority = prefetch_order(analyses, store, args)
+                projections = None
+                if args.fast_csv:
+                    projections = {
+                        name: union_projection(readers[path.resolve()])
+                        for name, path in paths.items()
+                        if path.resolve() in readers
+                    }
+                datasets = PrefetchedDatasets(
+                    paths, pool, priority, shared, projections, preview_options(args)
+                )
+                return analyses, store, datasets
+            except (OSError, ValueError) as exc:
+                return exc
+
+        executor = create_executor(args.executor, args.workers)
+        try:
+            for index, (job, _) in enumerate(loaded):
+                # Schedule loads for this job and the next --batch-prefetch jobs only.
+                window = min(len(loaded), index + 1 + max(0, args.batch_prefetch))
+                while len(prepared) < window:
+                    ahead, ahead_state = loaded[len(prepared)]
+                    prepared.append((ahead, prepare(ahead_state)))
+                state = prepared[index][1]
+                prepared[index] = loaded[index] = (job, None)
+                record: Dict[str, object] = {
+                    "name": job.name,
+                    "ars": str(job.ars_path),
+                    "data": str(job.data_dir),
+                    "out": str(job.out_dir),
+                }
+                job_start = time.perf_counter()
+                job_cpu = time.process_time()
+                try:
+                    if isinstance(state, Exception):
+                        raise state
+                    analyses, store, datasets = state  # type: ignore[misc]
+                    job.out_dir.mkdir(parents=True, exist_ok=True)
+                    with AsyncWriter(maxsize=max(1, args.io_threads) * 2) as writer:
+                        run_analyses(
+                            analyses,
+                            datasets,
+                            job.out_dir,
+                            args,
+                            writer,
+                            store,
+                            executor,
+                        )
+                    record.update(status="ok", analyses=len(analyses))
+                except Exception as exc:  # keep going; reported in the summary
+                    record.update(status="failed", error=f"{type(exc).__name__}: {exc}")
+                state = datasets = None
+                for key in [key for key, last in last_use.items() if last == index]:
+                    if shared.pop(key, None) is not None:
+                        released += 1
+                record["wall_seconds"] = round(time.perf_counter() - job_start, 6)
+                record["cpu_seconds"] = round(time.process_time() - job_cpu, 6)
+                results.append(record)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    loads = len(shared) + released
+    summary = {
+        "manifest": str(manifest_path),
+        "jobs": results,
+        "datasets_loaded": loads,
+        "wall_seconds": round(time.perf_counter() - batch_start, 6),
+        "cpu_seconds": round(time.process_time() - batch_cpu, 6),
+    }
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+    summary_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+    for record in results:
+        print(f"{record['name']}: {record['status']} in {record['wall_seconds']:.3f}s")
+    print(
+        f"Batch: {len(results)} job(s), {loads} dataset(s) loaded, "
+        f"{summary['wall_seconds']:.3f}s. Summary: {summary_path}"
+    )
+
+    failed = [record for record in results if record["status"] != "ok"]
+    if failed:
+        raise SystemExit(f"{len(failed)} batch job(s) failed. See {summary_path} for details.")
 
 
 if __name__ == "__main__":
@@ -1,16 +1,24 @@
-"""Generate a parity report between ARD outputs produced by each engine."""
+"""Generate a parity report between ARD outputs produced by each engine.
+
+When the engines' ``ard_timings.json`` sidecars are present, the report also
+compares per-analysis run time and memory and flags slowdown outliers.
+"""
 
 from __future__ import annotations
 
 import argparse
+import hashlib
 import itertools
+import json
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Iterable, List, Sequence
+from typing import Dict, Iterable, List, Optional, Sequence
 
 import numpy as np
 import pandas as pd
 
+from ars_runtime.timings import TIMINGS_FILE_NAME
+
 
 POTENTIAL_KEY_COLUMNS: Sequence[str] = (
     "ANALYSISID",
@@ -119,6 +127,111 @@ def _record_duplicate_rows(
     return True
 
 
+FINGERPRINT_SUFFIX = ".fingerprint.json"
+FINGERPRINT_VERSION = 2
+
+
+def table_fingerprint(frame: pd.DataFrame, tolerance: float) -> Optional[str]:
+    """Return a canonical content hash of *frame*, or ``None`` if it has none.
+
+    Columns are taken in name order. Key columns from ``select_key_columns``
+    are hashed as their raw text together with their dtype, because the
+    detailed diff joins on exact key values. Numeric value columns are
+    quantised to *tolerance*. Rows are sorted by the keys and then by every
+    other column. Equal fingerprints therefore imply that ``compare_tables``
+    would report a match. Tables with duplicate keys get no fingerprint, so
+    they always take the detailed path.
+    """
+
+    if frame.columns.empty:
+        return None
+    keys = select_key_columns(frame, frame)
+    if frame.duplicated(subset=keys).any():
+        return None
+
+    canonical = pd.DataFrame(index=frame.index)
+    kinds = []
+    for column in sorted(frame.columns):
+        if column in keys:
+            # Never coerce keys: text levels such as "<65" would become NaN
+            # and different tables could collide.
+            raw = frame[column]
+            canonical[column] = raw.astype(str).where(raw.notna(), "\x00NA")
+            kinds.append(f"{column}:key:{raw.dtype}")
+            continue
+        series = _to_numeric(frame[column])
+        if pd.api.types.is_numeric_dtype(series):
+            values = series.astype(float)
+            if tolerance > 0:
+                values = np.round(values / tolerance)
+            canonical[column] = values + 0.0  # fold -0.0 into 0.0
+            kinds.append(f"{column}:num")
+        else:
+            canonical[column] = series.fillna("").astype(str)
+            kinds.append(f"{column}:str")
+
+    order = keys + [c for c in canonical.columns if c not in keys]
+    canonical = canonical.sort_values(order, kind="mergesort").reset_index(drop=True)
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps({"columns": kinds, "tolerance": tolerance}).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(canonical, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fingerprint_cache_path(path: Path) -> Path:
+    return path.with_name(path.name + FINGERPRINT_SUFFIX)
+
+
+def read_cached_fingerprint(path: Path, tolerance: float) -> Optional[Dict[str, object]]:
+    """Return the cached fingerprint record for *path* if it is still current."""
+
+    try:
+        cached = json.loads(_fingerprint_cache_path(path).read_text(encoding="utf-8"))
+        stat = path.stat()
+    except (OSError, ValueError):
+        return None
+    if (
+        cached.get("version") != FINGERPRINT_VERSION
+        or cached.get("size") != stat.st_size
+        or cached.get("mtime_ns") != stat.st_mtime_ns
+        or cached.get("tolerance") != tolerance
+    ):
+        return None
+    return cached
+
+
+def write_cached_fingerprint(
+    path: Path,
+    tolerance: float,
+    file_sha256: str,
+    fingerprint: Optional[str],
+) -> None:
+    """Store the fingerprint next to *path*; unwritable directories are ignored."""
+
+    try:
+        stat = path.stat()
+        record = {
+            "version": FINGERPRINT_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "tolerance": tolerance,
+            "sha256": file_sha256,
+            "fingerprint": fingerprint,
+        }
+        _fingerprint_cache_path(path).write_text(json.dumps(record, indent=2), encoding="utf-8")
+    except OSError:
+        pass
+
+
 def compare_tables(
     analysis_id: str,
     left_label: str,
@@ -126,13 +239,64 @@ def compare_tables(
     right_label: str,
     right: Path,
     tolerance: float = 1e-8,
+    use_fingerprints: bool = True,
 ) -> ComparisonResult:
-    """Compare two ARD CSV files and capture mismatches."""
+    """Compare two ARD CSV files and capture mismatches.
+
+    With *use_fingerprints*, byte-identical files or tables with equal
+    canonical fingerprints are reported as matching without the merge-based
+    diff. Fingerprints are cached next to each ARD and reused while the file
+    is unchanged.
+    """
 
     result = ComparisonResult(analysis_id=analysis_id, pair_label=f"{left_label} vs {right_label}")
 
+    if not use_fingerprints:
+        return _compare_frames(
+            result, left_label, pd.read_csv(left), right_label, pd.read_csv(right), tolerance
+        )
+
+    cached = {
+        "left": read_cached_fingerprint(left, tolerance),
+        "right": read_cached_fingerprint(right, tolerance),
+    }
+    if cached["left"] and cached["right"]:
+        if cached["left"]["sha256"] == cached["right"]["sha256"]:
+            return result
+        if cached["left"]["fingerprint"] and cached["left"]["fingerprint"] == cached["right"]["fingerprint"]:
+            return result
+
+    shas = {
+        "left": cached["left"]["sha256"] if cached["left"] else _file_digest(left),
+        "right": cached["right"]["sha256"] if cached["right"] else _file_digest(right),
+    }
+    if shas["left"] == shas["right"]:
+        return result
+
     df_left = pd.read_csv(left)
     df_right = pd.read_csv(right)
+    prints = {}
+    for side, path, frame in (("left", left, df_left), ("right", right, df_right)):
+        if cached[side]:
+            prints[side] = cached[side]["fingerprint"]
+        else:
+            prints[side] = table_fingerprint(frame, tolerance)
+            write_cached_fingerprint(path, tolerance, shas[side], prints[side])
+    if prints["left"] and prints["left"] == prints["right"]:
+        return result
+
+    return _compare_frames(result, left_label, df_left, right_label, df_right, tolerance)
+
+
+def _compare_frames(
+    result: ComparisonResult,
+    left_label: str,
+    df_left: pd.DataFrame,
+    right_label: str,
+    df_right: pd.DataFrame,
+    tolerance: float,
+) -> ComparisonResult:
+    """Run the detailed merge-based diff of two loaded ARD frames."""
 
     missing_cols = sorted(set(df_left.columns) - set(df_right.columns))
     extra_cols = sorted(set(df_right.columns) - set(df_left.columns))
@@ -200,8 +364,166 @@ def compare_tables(
     return result
 
 
-def build_report(results: Iterable[ComparisonResult]) -> str:
-    """Render the comparison results to a Markdown report."""
+TIMING_FIELDS: Sequence[str] = ("wall_seconds", "cpu_seconds", "peak_rss_bytes", "rows_in", "rows_out")
+
+
+def load_timings(directory: Path) -> Optional[Dict[str, object]]:
+    """Return the engine's timing sidecar in *directory*, or ``None`` if absent or unreadable."""
+
+    path = directory / TIMINGS_FILE_NAME
+    try:
+        sidecar = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return sidecar if isinstance(sidecar, dict) else None
+
+
+def build_performance_table(sidecars: Dict[str, Dict[str, object]]) -> List[Dict[str, object]]:
+    """Line up per-analysis timings across engines.
+
+    Each row holds every engine's figures for one analysis plus its slowdown
+    relative to the fastest engine by wall time.
+    """
+
+    by_analysis: Dict[str, Dict[str, Dict[str, object]]] = {}
+    for label, sidecar in sidecars.items():
+        for entry in sidecar.get("analyses") or []:
+            if isinstance(entry, dict) and entry.get("analysis_id"):
+                record = {key: entry.get(key) for key in TIMING_FIELDS}
+                by_analysis.setdefault(str(entry["analysis_id"]), {})[label] = record
+
+    rows: List[Dict[str, object]] = []
+    for analysis_id in sorted(by_analysis):
+        engines = by_analysis[analysis_id]
+        walls = {
+            label: float(record["wall_seconds"])
+            for label, record in engines.items()
+            if isinstance(record.get("wall_seconds"), (int, float))
+        }
+        fastest = min(walls, key=walls.get) if walls else None
+        slowdown: Dict[str, Optional[float]] = {}
+        for label in engines:
+            if fastest is None or label not in walls:
+                slowdown[label] = None
+            elif walls[fastest] > 0:
+                slowdown[label] = round(walls[label] / walls[fastest], 3)
+            else:
+                slowdown[label] = 1.0 if walls[label] == 0 else None
+        rows.append(
+            {"analysis_id": analysis_id, "engines": engines, "fastest": fastest, "slowdown": slowdown}
+        )
+    return rows
+
+
+def find_slowdown_outliers(
+    performance: Iterable[Dict[str, object]], threshold: float, min_seconds: float
+) -> List[Dict[str, object]]:
+    """Return engine/analysis pairs at least *threshold* times slower than the fastest engine.
+
+    Pairs whose absolute gap is below *min_seconds* are ignored so that
+    start-up noise on tiny analyses is not reported.
+    """
+
+    outliers: List[Dict[str, object]] = []
+    for row in performance:
+        fastest = row["fastest"]
+        if fastest is None:
+            continue
+        best = float(row["engines"][fastest]["wall_seconds"])  # type: ignore[index]
+        for label, ratio in row["slowdown"].items():  # type: ignore[union-attr]
+            if label == fastest or ratio is None or ratio < threshold:
+                continue
+            wall = float(row["engines"][label]["wall_seconds"])  # type: ignore[index]
+            if wall - best < min_seconds:
+                continue
+            outliers.append(
+                {
+                    "analysis_id": row["analysis_id"],
+                    "engine": label,
+                    "wall_seconds": wall,
+                    "fastest_engine": fastest,
+                    "fastest_wall_seconds": best,
+                    "slowdown": ratio,
+                }
+            )
+    return outliers
+
+
+def _format_number(value: object, scale: float = 1.0, digits: int = 3) -> str:
+    if not isinstance(value, (int, float)):
+        return "–"
+    return f"{value / scale:.{digits}f}"
+
+
+def _performance_lines(
+    sidecars: Dict[str, Dict[str, object]],
+    performance: Sequence[Dict[str, object]],
+    outliers: Sequence[Dict[str, object]],
+    threshold: float,
+) -> List[str]:
+    lines = ["", "## Performance", ""]
+    if not sidecars:
+        lines.append(f"No `{TIMINGS_FILE_NAME}` sidecars were found; run times are not compared.")
+        return lines
+
+    lines.extend(
+        [
+            "| Engine | Version | Wall (s) | CPU (s) | Peak RSS (MiB) |",
+            "| --- | --- | --- | --- | --- |",
+        ]
+    )
+    for label, sidecar in sidecars.items():
+        lines.append(
+            f"| {label} | {sidecar.get('engine_version', '–')} "
+            f"| {_format_number(sidecar.get('wall_seconds'))} "
+            f"| {_format_number(sidecar.get('cpu_seconds'))} "
+            f"| {_format_number(sidecar.get('peak_rss_bytes'), 1024 * 1024, 1)} |"
+        )
+
+    lines.extend(
+        [
+            "",
+            "| Analysis ID | Engine | Wall (s) | CPU (s) | Peak RSS (MiB) | Rows in | Rows out | Slowdown |",
+            "| --- | --- | --- | --- | --- | --- | --- | --- |",
+        ]
+    )
+    for row in performance:
+        for label, record in row["engines"].items():  # type: ignore[union-attr]
+            ratio = row["slowdown"].get(label)  # type: ignore[union-attr]
+            marker = " (fastest)" if label == row["fastest"] else ""
+            lines.append(
+                f"| {row['analysis_id']} | {label}{marker} "
+                f"| {_format_number(record.get('wall_seconds'))} "
+                f"| {_format_number(record.get('cpu_seconds'))} "
+                f"| {_format_number(record.get('peak_rss_bytes'), 1024 * 1024, 1)} "
+                f"| {record.get('rows_in', '–')} | {record.get('rows_out', '–')} "
+                f"| {'–' if ratio is None else f'{ratio:.2f}x'} |"
+            )
+
+    lines.append("")
+    lines.append(f"### Slowdown outliers (≥ {threshold:g}x the fastest engine)")
+    lines.append("")
+    if not outliers:
+        lines.append("None.")
+    for entry in outliers:
+        lines.append(
+            f"- {entry['analysis_id']}: {entry['engine']} took {entry['wall_seconds']:.3f}s, "
+            f"{entry['slowdown']:.2f}x {entry['fastest_engine']} ({entry['fastest_wall_seconds']:.3f}s)"
+        )
+    return lines
+
+
+def build_report(
+    results: Iterable[ComparisonResult],
+    sidecars: Optional[Dict[str, Dict[str, object]]] = None,
+    performance: Sequence[Dict[str, object]] = (),
+    outliers: Sequence[Dict[str, object]] = (),
+    slowdown_threshold: float = 2.0,
+) -> str:
+    """Render the comparison results to a Markdown report.
+
+    The performance section is only added when *sidecars* is given.
+    """
 
     rows = list(results)
     lines = [
@@ -238,9 +560,40 @@ def build_report(results: Iterable[ComparisonResult]) -> str:
         lines.append("")
         lines.append("All ARD outputs match within the configured tolerance.")
 
+    if sidecars is not None:
+        lines.extend(_performance_lines(sidecars, performance, outliers, slowdown_threshold))
+
     return "\n".join(lines).strip() + "\n"
 
 
+def build_json_report(
+    results: Iterable[ComparisonResult],
+    sidecars: Dict[str, Dict[str, object]],
+    performance: Sequence[Dict[str, object]],
+    outliers: Sequence[Dict[str, object]],
+) -> Dict[str, object]:
+    """Machine-readable counterpart of :func:`build_report`."""
+
+    return {
+        "parity": [
+            {
+                "analysis_id": result.analysis_id,
+                "comparison": result.pair_label,
+                "status": result.status,
+                "errors": list(result.errors),
+            }
+            for result in results
+        ],
+        "engines": {
+            label: {key: sidecar.get(key) for key in ("engine", "engine_version", "run_datetime",
+                                                      "wall_seconds", "cpu_seconds", "peak_rss_bytes")}
+            for label, sidecar in sidecars.items()
+        },
+        "performance": list(performance),
+        "slowdown_outliers": list(outliers),
+    }
+
+
 def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("--r", type=Path, required=True, help="Directory containing R ARDs")
@@ -258,6 +611,31 @@ def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
         default=1e-8,
         help="Numeric tolerance when comparing values (default: 1e-8)",
     )
+    parser.add_argument(
+        "--json",
+        dest="json_path",
+        type=Path,
+        default=None,
+        help="Also write parity and performance results as JSON to this path",
+    )
+    parser.add_argument(
+        "--slowdown-threshold",
+        type=float,
+        default=2.0,
+        help="Flag engines at least this many times slower than the fastest (default: 2.0)",
+    )
+    parser.add_argument(
+        "--min-slowdown-seconds",
+        type=float,
+        default=0.1,
+        help="Ignore slowdowns smaller than this many seconds in absolute terms (default: 0.1)",
+    )
+    parser.add_argument(
+        "--no-fingerprint",
+        dest="use_fingerprints",
+        action="store_false",
+        help="Always run the detailed diff instead of the fingerprint fast path",
+    )
     return parser.parse_args(argv)
 
 
@@ -297,12 +675,27 @@ def main(argv: Sequence[str] | None = None) -> None:
                         right_label,
                         right_path,
                         tolerance=args.tolerance,
+                        use_fingerprints=args.use_fingerprints,
                     )
                 )
 
-    report = build_report(results)
+    sidecars = {
+        label: sidecar
+        for label, sidecar in ((label, load_timings(path)) for label, path in directories.items())
+        if sidecar is not None
+    }
+    performance = build_performance_table(sidecars)
+    outliers = find_slowdown_outliers(
+        performance, args.slowdown_threshold, args.min_slowdown_seconds
+    )
+
+    report = build_report(results, sidecars, performance, outliers, args.slowdown_threshold)
     args.report.parent.mkdir(parents=True, exist_ok=True)
     args.report.write_text(report, encoding="utf-8")
+    if args.json_path is not None:
+        payload = build_json_report(results, sidecars, performance, outliers)
+        args.json_path.parent.mkdir(parents=True, exist_ok=True)
+        args.json_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
 
     mismatches = [result for result in results if result.errors]
     if mismatches:
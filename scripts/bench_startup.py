@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Cold-start benchmark for the ``ars_runtime`` CLI.
+
+Fails (exit 1) when importing the CLI drags in heavy dependencies, or when
+``--help`` takes more than ``--budget-ms`` longer than a bare interpreter
+start. Run from the repository root: ``python3 scripts/bench_startup.py``.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ("pandas", "numpy", "jsonschema")
+
+def time_command(cmd, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return statistics.median(samples)
+
+def heavy_imports():
+    probe = (
+        "import sys, python.ars_runtime, python.ars_runtime.cli; "
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", probe], check=True, capture_output=True, text=True)
+    return out.stdout.split()
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--repeat", type=int, default=15)
+    p.add_argument("--budget-ms", type=float, default=100.0,
+                   help="allowed CLI --help overhead over bare interpreter start (default: 100)")
+    args = p.parse_args(argv)
+
+    loaded = heavy_imports()
+    if loaded:
+        print(f"[STARTUP] CLI import loaded heavy modules: {', '.join(loaded)}")
+        sys.exit(1)
+
+    bare = time_command([sys.executable, "-c", "pass"], args.repeat)
+    cli = time_command([sys.executable, "-m", "python.ars_runtime.cli", "--help"], args.repeat)
+    overhead = cli - bare
+    print(f"interpreter: {bare:.1f} ms  cli --help: {cli:.1f} ms  overhead: {overhead:.1f} ms "
+          f"(budget {args.budget_ms:.0f} ms)")
+    if overhead > args.budget_ms:
+        print("[STARTUP] cold-start time regressed beyond budget")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
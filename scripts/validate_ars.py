@@ -1,13 +1,18 @@
 #!/usr/bin/env python3
 import sys, json
-from jsonschema import validate, Draft7Validator
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from python.ars_runtime.validation import compiled_validator
 
 if len(sys.argv) < 3:
     print("Usage: validate_ars.py <ars.json> <schema.json>"); sys.exit(2)
 
 ars = json.load(open(sys.argv[1]))
-schema = json.load(open(sys.argv[2]))
-errs = sorted(Draft7Validator(schema).iter_errors(ars), key=lambda e: e.path)
+# Draft 7 without format assertions, as this script has always validated.
+validator = compiled_validator(str(Path(sys.argv[2]).resolve()), format_checker=False,
+                               draft="Draft7Validator")
+errs = sorted(validator.iter_errors(ars), key=lambda e: list(e.path))
 if errs:
     for e in errs:
         print(f"[SCHEMA] {'/'.join([str(p) for p in e.path])}: {e.message}")
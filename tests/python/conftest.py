@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+# The legacy engine and cluster runner are scripts that import each other
+# (and ``ars_runtime``) from the python/ directory.
+sys.path.insert(0, str(ROOT / "python"))
+
+
+@pytest.fixture
+def data_dir() -> Path:
+    return ROOT / "tests" / "data"
+
+
+@pytest.fixture
+def legacy_spec() -> Path:
+    return ROOT / "tests" / "specs" / "legacy_ars.json"
+
+
+@pytest.fixture
+def simple_spec() -> Path:
+    return ROOT / "tests" / "specs" / "simple.json"
+
+
+@pytest.fixture
+def instances(monkeypatch):
+    """``instances(module, "Name")`` records every ``module.Name`` built during the test."""
+
+    def record(module, name):
+        created = []
+        cls = getattr(module, name)
+
+        class Recorded(cls):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                created.append(self)
+
+        monkeypatch.setattr(module, name, Recorded)
+        return created
+
+    return record
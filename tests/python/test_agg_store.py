@@ -0,0 +1,103 @@
+import filecmp
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import ars_to_ard
+from ars_to_ard import main as legacy_main
+
+
+def _run(spec, data_dir, out, monkeypatch, *extra):
+    out.mkdir()
+    monkeypatch.chdir(out)
+    legacy_main(["--ars", str(spec), "--data", str(data_dir), *extra])
+    return sorted(p.name for p in out.glob("ARD_*.csv"))
+
+
+@pytest.mark.parametrize("io_threads", ["0", "2"])
+def test_store_hit_matches_cold_run_without_reading_csvs(tmp_path, legacy_spec, data_dir,
+                                                         monkeypatch, io_threads):
+    store = ["--agg-store", str(tmp_path / "store"), "--io-threads", io_threads]
+    files = _run(legacy_spec, data_dir, tmp_path / "cold", monkeypatch, "--io-threads", io_threads)
+    _run(legacy_spec, data_dir, tmp_path / "fill", monkeypatch, *store)
+
+    loads = []
+    load_dataset = ars_to_ard.load_dataset
+    monkeypatch.setattr(ars_to_ard, "load_dataset",
+                        lambda name, *a: loads.append(name) or load_dataset(name, *a))
+    assert _run(legacy_spec, data_dir, tmp_path / "hit", monkeypatch, *store) == files
+    assert loads == []
+    for run in ("fill", "hit"):
+        match, mismatch, errors = filecmp.cmpfiles(tmp_path / "cold", tmp_path / run, files,
+                                                   shallow=False)
+        assert mismatch == [] and errors == []
+
+
+def test_explain_peeks_at_the_store_without_side_effects(tmp_path, legacy_spec, data_dir,
+                                                         monkeypatch, capsys):
+    inputs = tmp_path / "in"
+    inputs.mkdir()
+    for csv in data_dir.glob("*.csv"):
+        (inputs / csv.name).write_bytes(csv.read_bytes())
+    (inputs / "UNUSED.csv").write_text("A,B\n1,2\n")
+    store_dir = tmp_path / "store"
+    store = ["--agg-store", str(store_dir)]
+    _run(legacy_spec, inputs, tmp_path / "fill", monkeypatch, *store)
+
+    state = {p: (p.stat().st_mtime_ns, p.read_bytes())
+             for p in store_dir.rglob("*") if p.is_file()}
+    monkeypatch.setattr(ars_to_ard.AggregateStore, "_file_digest",
+                        lambda self, path: pytest.fail(f"explain hashed {path}"))
+    capsys.readouterr()
+    legacy_main(["--ars", str(legacy_spec), "--data", str(inputs), "--explain", *store])
+    plan = json.loads(capsys.readouterr().out)
+
+    assert "UNUSED" not in plan["datasets"]
+    summaries = [stage for a in plan["analyses"] for stage in a["stages"]
+                 if stage["stage"] == "summarise"]
+    assert {v["aggregate_store"] for s in summaries for v in s["variables"]} == {"hit"}
+    assert {p: (p.stat().st_mtime_ns, p.read_bytes())
+            for p in store_dir.rglob("*") if p.is_file()} == state
+
+
+def test_explain_creates_no_store_and_lists_kernels_per_statistic(tmp_path, legacy_spec, data_dir,
+                                                                  monkeypatch, capsys):
+    store_dir = tmp_path / "store"
+    monkeypatch.chdir(tmp_path)
+    legacy_main(["--ars", str(legacy_spec), "--data", str(data_dir), "--explain",
+                 "--agg-store", str(store_dir)])
+    plan = json.loads(capsys.readouterr().out)
+
+    assert not store_dir.exists()
+    for analysis in plan["analyses"]:
+        summarise = next(s for s in analysis["stages"] if s["stage"] == "summarise")
+        for variable in summarise["variables"]:
+            kernels = {k["statistic"]: k["kernel"] for k in variable["kernels"]}
+            assert list(kernels) == variable["statistics"]
+            assert kernels["MEAN"] == "single-pass" and kernels["MEDIAN"] == "sort+quantile"
+
+
+def test_concurrent_runs_keep_every_digest(tmp_path):
+    paths = {}
+    for i in range(8):
+        paths[f"D{i}"] = tmp_path / f"D{i}.csv"
+        paths[f"D{i}"].write_text(f"A\n{i}\n")
+    store_dir = tmp_path / "store"
+    # One store per dataset stands in for separate runs sharing the directory.
+    stores = [ars_to_ard.AggregateStore(store_dir, paths, 1 << 20) for _ in paths]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda pair: pair[0].dataset_digest(pair[1]), zip(stores, paths)))
+    index = json.loads((store_dir / "digests.json").read_text())
+    assert sorted(index) == sorted(str(p.resolve()) for p in paths.values())
+
+
+def test_aggregates_keep_exact_distinct_values():
+    assert ars_to_ard.build_aggregate([3.0, None, 1.0, 2.0]) == {
+        "n": 3, "n_missing": 1, "sum": 6.0, "min": 1.0, "max": 3.0, "values": [1.0, 2.0, 3.0]}
+    repeated = ars_to_ard.build_aggregate([2.0, 1.0, 2.0])
+    assert (repeated["values"], repeated["counts"]) == ([1.0, 2.0], [1, 2])
+    legacy_entry = {"n": 3, "n_missing": 0, "sum": 5.0, "min": 1.0, "max": 2.0,
+                    "runs": [[1.0, 1], [2.0, 2]]}
+    for aggregate in (repeated, legacy_entry):
+        assert ars_to_ard.AggregateIntermediates(aggregate).sorted_values == [1.0, 2.0, 2.0]
@@ -0,0 +1,89 @@
+import filecmp
+import gc
+import json
+import shutil
+import weakref
+
+import pytest
+
+import ars_to_ard
+from ars_to_ard import main as legacy_main
+
+
+@pytest.fixture
+def batch(tmp_path, legacy_spec, data_dir):
+    """Three jobs: two specs reading different columns of one CSV, then a second directory."""
+    spec = json.loads(legacy_spec.read_text())
+    by_flag = json.loads(legacy_spec.read_text())
+    by_flag["analyses"] = [dict(spec["analyses"][0], analysis_id="AGE_BY_SAFFL",
+                                population={}, grouping=[{"variable": "SAFFL"}])]
+    (tmp_path / "a.json").write_text(json.dumps(spec))
+    (tmp_path / "b.json").write_text(json.dumps(by_flag))
+    shutil.copytree(data_dir, tmp_path / "data2")
+    jobs = [{"name": "a", "ars": "a.json", "data": str(data_dir), "out": "out/a"},
+            {"name": "b", "ars": "b.json", "data": str(data_dir), "out": "out/b"},
+            {"name": "c", "ars": "a.json", "data": "data2", "out": "out/c"}]
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps(jobs))
+    return manifest
+
+
+def _single(spec, data_dir, out, monkeypatch):
+    out.mkdir(parents=True)
+    monkeypatch.chdir(out)
+    legacy_main(["--ars", str(spec), "--data", str(data_dir), "--fast-csv"])
+
+
+@pytest.fixture
+def events(monkeypatch):
+    """Dataset loads and job starts, in order, with the datasets still alive at each start."""
+    log, alive = [], {}
+    load_dataset, run_analyses = ars_to_ard.load_dataset, ars_to_ard.run_analyses
+
+    def load(name, path, *args):
+        log.append(("load", path.resolve()))
+        dataset = load_dataset(name, path, *args)
+        alive[path.resolve()] = weakref.ref(dataset)
+        return dataset
+
+    def run(analyses, datasets, root, *args):
+        gc.collect()
+        log.append(("run", root.name, {path for path, ref in alive.items() if ref() is not None}))
+        return run_analyses(analyses, datasets, root, *args)
+
+    monkeypatch.setattr(ars_to_ard, "load_dataset", load)
+    monkeypatch.setattr(ars_to_ard, "run_analyses", run)
+    return log
+
+
+def test_fast_csv_batch_parses_each_file_once_and_releases_it(tmp_path, batch, data_dir,
+                                                              monkeypatch, events):
+    legacy_main(["--batch", str(batch), "--fast-csv"])
+
+    first, second = (data_dir / "ADSL.csv").resolve(), (tmp_path / "data2" / "ADSL.csv").resolve()
+    assert sorted(str(e[1]) for e in events if e[0] == "load") == sorted([str(first), str(second)])
+    resident = {e[1]: e[2] for e in events if e[0] == "run"}
+    assert first in resident["a"] and first in resident["b"] and first not in resident["c"]
+    assert json.loads((tmp_path / "batch_summary.json").read_text())["datasets_loaded"] == 2
+
+    monkeypatch.undo()
+    for job, spec in (("a", "a.json"), ("b", "b.json")):
+        _single(tmp_path / spec, data_dir, tmp_path / "single" / job, monkeypatch)
+        names = sorted(p.name for p in (tmp_path / "single" / job).glob("ARD_*.csv"))
+        _, mismatch, errors = filecmp.cmpfiles(tmp_path / "single" / job, tmp_path / "out" / job,
+                                               names, shallow=False)
+        assert names and not mismatch and not errors
+
+
+def test_batch_prefetch_window_bounds_scheduled_loads(tmp_path, batch, events):
+    legacy_main(["--batch", str(batch), "--fast-csv", "--batch-prefetch", "0"])
+
+    second = (tmp_path / "data2" / "ADSL.csv").resolve()
+    order = [e[1] for e in events]
+    # Job c's input is not scheduled until job b has finished.
+    assert order.index(second) > order.index("b")
+
+
+def test_explain_is_rejected_in_batch_mode(batch):
+    with pytest.raises(SystemExit):
+        legacy_main(["--batch", str(batch), "--explain"])
@@ -0,0 +1,115 @@
+import filecmp
+import subprocess
+import sys
+import threading
+import time
+
+import ars_cluster
+from ars_cluster import (
+    UnitScheduler,
+    WorkUnit,
+    run_fs_worker,
+    run_tcp_worker,
+    serve_fs,
+    serve_tcp,
+)
+from ars_to_ard import load_analyses
+from ars_to_ard import main as legacy_main
+
+
+def _run_legacy(spec, data_dir, out, monkeypatch):
+    out.mkdir()
+    monkeypatch.chdir(out)
+    legacy_main(["--ars", str(spec), "--data", str(data_dir), "--io-threads", "0"])
+
+
+def test_slow_fs_units_are_not_reclaimed_while_heartbeating(tmp_path, legacy_spec, data_dir,
+                                                            monkeypatch):
+    execute = ars_cluster.execute_unit
+
+    def slow(payload, worker, cache):
+        time.sleep(0.5)
+        return execute(payload, worker, cache)
+
+    monkeypatch.setattr(ars_cluster, "execute_unit", slow)
+    analyses = load_analyses(legacy_spec, data_dir)
+    units = [WorkUnit(i, analyses[i % len(analyses)], str(data_dir)) for i in range(4)]
+    scheduler = UnitScheduler(units, max_retries=0)
+    queue_dir = tmp_path / "queue"
+    collector = serve_fs(scheduler, queue_dir, unit_timeout=0.3, poll_interval=0.05)
+    worker = threading.Thread(target=run_fs_worker, args=(queue_dir, 0.05, 0.05), daemon=True)
+    worker.start()
+    deadline = time.monotonic() + 30
+    while not scheduler.finished:
+        assert time.monotonic() < deadline, "fs units were never resolved"
+        time.sleep(0.05)
+    results = [scheduler.wait_result(u.unit_id) for u in units]
+    collector.join(timeout=5)
+    worker.join(timeout=5)
+    assert [r["status"] for r in results] == ["ok"] * 4
+    assert [r["attempts"] for r in results] == [1] * 4
+
+
+def test_cluster_output_matches_local_run(tmp_path, legacy_spec, data_dir, monkeypatch):
+    _run_legacy(legacy_spec, data_dir, tmp_path / "local", monkeypatch)
+    cluster_out = tmp_path / "cluster"
+    subprocess.run(
+        [sys.executable, ars_cluster.__file__, "coordinator", "--ars", str(legacy_spec),
+         "--data", str(data_dir), "--out", str(cluster_out), "--local-workers", "2"],
+        check=True, capture_output=True, timeout=120,
+    )
+    local = sorted(p.name for p in (tmp_path / "local").glob("ARD_*.csv"))
+    assert local == sorted(p.name for p in cluster_out.glob("ARD_*.csv"))
+    _, mismatch, errors = filecmp.cmpfiles(tmp_path / "local", cluster_out, local, shallow=False)
+    assert not mismatch and not errors
+
+
+def test_slow_tcp_units_are_not_requeued_while_heartbeating(tmp_path, legacy_spec, data_dir,
+                                                             monkeypatch):
+    execute = ars_cluster.execute_unit
+
+    def slow(payload, worker, cache):
+        time.sleep(0.5)
+        return execute(payload, worker, cache)
+
+    monkeypatch.setattr(ars_cluster, "execute_unit", slow)
+    analyses = load_analyses(legacy_spec, data_dir)
+    units = [WorkUnit(i, analyses[i % len(analyses)], str(data_dir)) for i in range(3)]
+    scheduler = UnitScheduler(units, max_retries=0)
+    server = serve_tcp(scheduler, ("127.0.0.1", 0), unit_timeout=0.3)
+    try:
+        worker = threading.Thread(target=run_tcp_worker,
+                                  args=(server.server_address[:2], 5.0, 0.05), daemon=True)
+        worker.start()
+        results = [scheduler.wait_result(u.unit_id) for u in units]
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert [(r["status"], r["attempts"]) for r in results] == [("ok", 1)] * 3
+
+
+def test_units_have_a_finite_default_lease():
+    args = ars_cluster.parse_args(["coordinator"])
+    assert args.unit_timeout == ars_cluster.DEFAULT_UNIT_TIMEOUT > ars_cluster.HEARTBEAT_SECONDS
+
+
+def test_expired_fs_lease_is_requeued(tmp_path, legacy_spec, data_dir):
+    analyses = load_analyses(legacy_spec, data_dir)
+    scheduler = UnitScheduler([WorkUnit(0, analyses[0], str(data_dir))], max_retries=1)
+    queue_dir = tmp_path / "queue"
+    serve_fs(scheduler, queue_dir, unit_timeout=0.3, poll_interval=0.05)
+    deadline = time.monotonic() + 10
+    while not list((queue_dir / "todo").glob("*.json")):
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    # A worker that claims the unit and dies without ever renewing its lease.
+    published = next((queue_dir / "todo").glob("*.json"))
+    claim = queue_dir / "claimed" / f"{published.stem}.dead.json"
+    claim.with_suffix(".lease").write_text("{}")
+    published.rename(claim)
+    worker = threading.Thread(target=run_fs_worker, args=(queue_dir, 0.05, 0.05), daemon=True)
+    worker.start()
+    result = scheduler.wait_result(0)
+    worker.join(timeout=5)
+    assert (result["status"], result["attempts"]) == ("ok", 2)
+    assert not list((queue_dir / "claimed").iterdir())
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from compare_ard import compare_tables, table_fingerprint
+
+
+def _ard(levels, stats=(1.0, 2.0)):
+    return pd.DataFrame({
+        "analysis_id": ["A", "A"],
+        "group1": ["AGEGR", "AGEGR"],
+        "group1_level": list(levels),
+        "stat_name": ["N", "N"],
+        "stat": list(stats),
+    })
+
+
+def _verdicts(tmp_path, left, right):
+    left.to_csv(tmp_path / "L.csv", index=False)
+    right.to_csv(tmp_path / "R.csv", index=False)
+    fast = compare_tables("A", "L", tmp_path / "L.csv", "R", tmp_path / "R.csv")
+    full = compare_tables("A", "L", tmp_path / "L.csv", "R", tmp_path / "R.csv",
+                          use_fingerprints=False)
+    return fast.status, full.status
+
+
+def test_text_keys_are_not_coerced_to_nan():
+    assert table_fingerprint(_ard(["65", "<65"]), 1e-8) != table_fingerprint(_ard(["65", ">=65"]), 1e-8)
+
+
+@pytest.mark.parametrize("right", [
+    _ard(["65", ">=65"]),
+    _ard(["65", "<65"], stats=(1.0, 2.0 + 1e-12)),
+    _ard(["65", "<65"], stats=(1.0, 2.5)),
+    _ard(["<65", "65"], stats=(2.0, 1.0)),
+])
+def test_fingerprint_verdict_matches_full_diff(tmp_path, right):
+    fast, full = _verdicts(tmp_path, _ard(["65", "<65"]), right)
+    assert fast == full
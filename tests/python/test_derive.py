@@ -0,0 +1,110 @@
+import json
+import shutil
+
+import pandas as pd
+import pytest
+
+from ars_runtime.derive import DerivationCache, DerivationError, apply_derivations, compile_expr
+from ars_runtime.engine import run_ars
+from ars_runtime.explain import explain_spec
+
+DERIVATIONS = [
+    {"name": "AGEGR", "source": "ADSL", "expr": "cut(AGE, [0, 65, 200], ['<65', '>=65'])"},
+    {"name": "AGE2", "source": "ADSL", "expr": "round(AGE * 2 + 1, 1)"},
+    {"name": "OLD", "source": "ADSL", "expr": "where(AGE >= 65, 'Y', 'N')"},
+]
+
+
+def _write_spec(path, **spec):
+    path.write_text(json.dumps({"version": "0.1", **spec}))
+    return str(path)
+
+
+@pytest.fixture
+def joined_inputs(tmp_path, data_dir):
+    inputs = tmp_path / "in"
+    inputs.mkdir()
+    shutil.copy(data_dir / "ADSL.csv", inputs / "ADSL.csv")
+    lines = (data_dir / "ADSL.csv").read_text().splitlines()[1:]
+    rows = [f"{line.split(',')[0]},{i % 3}" for i, line in enumerate(lines)]
+    (inputs / "ADVS.csv").write_text("USUBJID,VISIT\n" + "\n".join(rows) + "\n")
+    return inputs
+
+
+def _joined_spec(tmp_path, derivations):
+    return _write_spec(
+        tmp_path / "spec.json",
+        sources=[{"name": "ADSL"}, {"name": "ADVS"}],
+        joins=[{"left": {"source": "ADSL"}, "right": {"source": "ADVS"}, "on": ["USUBJID"]}],
+        derivations=derivations,
+        analyses=[{"id": "AGE2_BY_GR", "source": "ANALYSIS", "group_by": ["AGEGR", "OLD"],
+                   "variable": "AGE2", "statistics": ["n", "mean", "sd"]}],
+    )
+
+
+def test_source_derivations_reach_the_joined_frame(tmp_path, joined_inputs):
+    spec = _joined_spec(tmp_path, DERIVATIONS)
+    out = tmp_path / "out"
+    run_ars(spec, str(joined_inputs), str(out), io_threads=0)
+    table = (out / "AGE2_BY_GR.csv").read_text()
+    assert "<65" in table and ">=65" in table
+
+    plan = explain_spec(json.loads((tmp_path / "spec.json").read_text()), str(joined_inputs))
+    stages = [s["stage"] for s in plan["stages"]]
+    assert stages.index("derive") < stages.index("join")
+    assert not any("error" in s for s in plan["stages"])
+    assert "error" not in plan["analyses"][0]
+
+
+def test_derivation_on_unknown_source_is_rejected(tmp_path, joined_inputs):
+    spec = _joined_spec(tmp_path, DERIVATIONS + [{"name": "X", "source": "ADAE", "expr": "AGE"}])
+    with pytest.raises(DerivationError, match="ADAE"):
+        run_ars(spec, str(joined_inputs), str(tmp_path / "out"), io_threads=0)
+
+
+def test_disk_cache_round_trip_matches_a_cold_run(tmp_path, data_dir):
+    spec = _write_spec(
+        tmp_path / "spec.json", sources=[{"name": "ADSL"}], derivations=DERIVATIONS,
+        analyses=[{"id": "AGE2_BY_GR", "source": "ADSL", "group_by": ["AGEGR", "OLD"],
+                   "variable": "AGE2", "statistics": ["n", "mean", "sd"]}])
+    cache = tmp_path / "cache"
+    run_ars(spec, str(data_dir), str(tmp_path / "cold"), io_threads=0)
+    run_ars(spec, str(data_dir), str(tmp_path / "fill"), io_threads=0, derive_cache=str(cache))
+    run_ars(spec, str(data_dir), str(tmp_path / "hit"), io_threads=0, derive_cache=str(cache))
+
+    files = [p for p in cache.rglob("*") if p.is_file()]
+    assert files and {p.suffix for p in files} <= {".json", ".npy"}
+    expected = (tmp_path / "cold" / "AGE2_BY_GR.csv").read_text()
+    for run in ("fill", "hit"):
+        assert (tmp_path / run / "AGE2_BY_GR.csv").read_text() == expected
+
+
+def test_explain_measures_filter_selectivity_on_the_sample(simple_spec, data_dir):
+    plan = explain_spec(json.loads(simple_spec.read_text()), str(data_dir))
+    stage = next(s for s in plan["stages"] if s["stage"] == "filter")
+    rows = (data_dir / "ADSL.csv").read_text().splitlines()[1:]
+    kept = sum(line.endswith(",Y") for line in rows)
+    assert stage["selectivity"] == round(kept / len(rows), 4) < 1.0
+    assert stage["sources"]["ADSL"]["estimated_rows"] == kept
+    kernels = plan["analyses"][0]["kernels"]
+    assert [k["statistic"] for k in kernels] == plan["analyses"][0]["statistics"]
+    assert {k["statistic"]: k["kernel"] for k in kernels}["median"] == "groupby-sort"
+
+
+def test_chained_comparisons_after_in_carry_the_literal():
+    df = pd.DataFrame({"ARM": ["A", "B"], "PLANNED": ["A", "C"]})
+    fn, _ = compile_expr("ARM in ['A', 'B'] == PLANNED")
+    # As in Python: (ARM in [...]) and ([...] == PLANNED), the list compared element-wise.
+    assert fn({c: df[c] for c in df.columns}).tolist() == [True, False]
+
+
+def test_unlabelled_cut_has_interval_categories_on_cache_hits(tmp_path):
+    df = pd.DataFrame({"AGE": [10.0, 70.0, 40.0, None]})
+    derivations = [{"name": "AGEGR", "expr": "cut(AGE, [0, 65, 200])"}]
+    cold = apply_derivations(df, derivations)
+    apply_derivations(df, derivations, DerivationCache(str(tmp_path)))
+    cache = DerivationCache(str(tmp_path))
+    hit = apply_derivations(df, derivations, cache)
+    assert cache.hits == 1
+    pd.testing.assert_series_equal(hit["AGEGR"], cold["AGEGR"])
+    assert isinstance(hit["AGEGR"].cat.categories, pd.IntervalIndex)
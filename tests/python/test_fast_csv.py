@@ -0,0 +1,49 @@
+import pytest
+
+import ars_to_ard
+from ars_to_ard import main as legacy_main
+from ars_to_ard import read_dataset, read_dataset_fast
+
+ROWS = ["S1,A,41,Y", "S2,B,,Y", "", "S3,A,n/a,N", "S4,B", "S5,,7.5,Y"]
+HEADER = "USUBJID,ARM,AGE,SAFFL"
+QUOTED = ['S1,"A, high",41,Y', 'S2,"multi\nline",,Y', "", 'S3,"say ""hi""",bad,N', "S4,B"]
+
+
+def _numeric(cell):
+    try:
+        return float(cell)
+    except (TypeError, ValueError):
+        return None if cell is None or not cell.strip() else cell
+
+
+@pytest.mark.parametrize("window", [None, 5])
+@pytest.mark.parametrize("rows,newline", [
+    (ROWS, "\n"), (ROWS, "\r\n"), (ROWS, "\r"), (QUOTED, "\n"), (QUOTED, "\r\n"),
+])
+def test_fast_reader_matches_dictreader(tmp_path, monkeypatch, rows, newline, window):
+    if window is not None:
+        monkeypatch.setattr(ars_to_ard, "FAST_CSV_WINDOW_BYTES", window)
+    path = tmp_path / "ADSL.csv"
+    # No trailing line break: the last record must still be read.
+    path.write_bytes(newline.join([HEADER, *rows]).encode("utf-8"))
+
+    expected = read_dataset(path)
+    fast = read_dataset_fast(path, frozenset(HEADER.split(",")), frozenset({"AGE"}))
+    assert len(fast) == len(expected) > 0
+    for name in HEADER.split(","):
+        column = fast.column(name)
+        if name == "AGE":
+            assert column == [_numeric(row[name]) for row in expected]
+        else:
+            assert column == [row[name] for row in expected]
+
+
+def test_fast_csv_run_matches_default_run(tmp_path, legacy_spec, data_dir, monkeypatch):
+    outputs = []
+    for extra in ([], ["--fast-csv"]):
+        out = tmp_path / str(len(outputs))
+        out.mkdir()
+        monkeypatch.chdir(out)
+        legacy_main(["--ars", str(legacy_spec), "--data", str(data_dir), *extra])
+        outputs.append({p.name: p.read_bytes() for p in out.glob("ARD_*.csv")})
+    assert outputs[0] and outputs[0] == outputs[1]
@@ -0,0 +1,84 @@
+import json
+import shutil
+
+import pandas as pd
+import pytest
+
+from ars_runtime import memory
+from ars_runtime.engine import run_ars
+
+
+@pytest.fixture
+def joined(tmp_path, data_dir):
+    inputs = tmp_path / "in"
+    inputs.mkdir()
+    shutil.copy(data_dir / "ADSL.csv", inputs / "ADSL.csv")
+    lines = (data_dir / "ADSL.csv").read_text().splitlines()[1:]
+    rows = [f"{line.split(',')[0]},{i % 4},{i * 1.5}" for i, line in enumerate(lines)]
+    (inputs / "ADVS.csv").write_text("USUBJID,VISIT,AVAL\n" + "\n".join(rows) + "\n")
+    spec = tmp_path / "spec.json"
+    spec.write_text(json.dumps({
+        "version": "0.1",
+        "sources": [{"name": "ADSL"}, {"name": "ADVS"}],
+        "joins": [{"left": {"source": "ADSL"}, "right": {"source": "ADVS"}, "on": ["USUBJID"]}],
+        "analyses": [
+            {"id": "AGE_BY_ARM", "source": "ADSL", "group_by": ["ARM"], "variable": "AGE"},
+            {"id": "AVAL_BY_VISIT", "source": "ANALYSIS", "group_by": ["ARM", "VISIT"],
+             "variable": "AVAL"},
+            {"id": "AGE_BY_VISIT", "source": "ANALYSIS", "group_by": ["VISIT"],
+             "variable": "AGE", "statistics": ["n", "mean", "median", "p90"]},
+        ],
+    }))
+    return str(spec), str(inputs)
+
+
+@pytest.mark.parametrize("io_threads", [0, 2])
+def test_spilled_run_matches_in_memory_run(tmp_path, joined, instances, io_threads):
+    spec, inputs = joined
+    stores = instances(memory, "FrameStore")
+    run_ars(spec, inputs, str(tmp_path / "memory"), io_threads=io_threads)
+    run_ars(spec, inputs, str(tmp_path / "spill"), io_threads=io_threads, memory_limit=1,
+            spill_dir=str(tmp_path))
+
+    assert stores[0].spill_count == 0 and stores[1].spill_count > 0
+    assert not list(tmp_path.glob("ars-spill-*"))  # removed on close
+    for name in ("AGE_BY_ARM", "AVAL_BY_VISIT", "AGE_BY_VISIT"):
+        expected = (tmp_path / "memory" / f"{name}.csv").read_text()
+        assert (tmp_path / "spill" / f"{name}.csv").read_text() == expected
+
+
+def _spill_and_reload(tmp_path, df):
+    store = memory.FrameStore(limit=1, spill_dir=str(tmp_path))
+    store.put("a", df)
+    store.put("b", df.iloc[:1])  # pushes "a" out
+    spilled = store.spill_count == 1
+    files = sorted(p.suffix for p in tmp_path.rglob("*") if p.is_file())
+    return spilled, files, store.get("a")
+
+
+def test_spill_round_trips_columns_without_pickle(tmp_path):
+    df = pd.DataFrame({
+        "ARM": ["A", None, "B", "A"],
+        "AGE": [41.0, float("nan"), 7.5, 60.0],
+        "N": [1, 2, 3, 4],
+        "VISIT": pd.Categorical(["V1", "V2", "V1", None], ordered=True),
+        "ID": pd.array(["x", pd.NA, "z", "w"], dtype="string"),
+        "DT": pd.to_datetime(["2024-01-01", "2024-01-02", None, "2024-01-04"]),
+        "MIX": ["a", None, 2.5, True],
+    }, index=pd.MultiIndex.from_tuples([("S1", 1), ("S1", 2), ("S2", 1), ("S3", 1)],
+                                       names=["USUBJID", "SEQ"]))
+    df.insert(2, "ARM", ["x", "y", "z", "w"], allow_duplicates=True)
+
+    spilled, files, reloaded = _spill_and_reload(tmp_path, df)
+    assert spilled and set(files) == {".json", ".npy"}
+    # Reloaded numeric columns are memory-mapped, so compare contents rather than array classes.
+    assert reloaded.equals(df) and reloaded.index.names == df.index.names
+    assert list(reloaded.columns) == list(df.columns) and list(reloaded.dtypes) == list(df.dtypes)
+    assert reloaded["MIX"].iloc[1] is None
+
+
+def test_frames_with_arbitrary_objects_stay_resident(tmp_path):
+    df = pd.DataFrame({"KEY": [(1, 2), (3, 4)]})
+    spilled, files, reloaded = _spill_and_reload(tmp_path, df)
+    assert not spilled and files == []
+    assert reloaded is df
@@ -0,0 +1,39 @@
+import time
+
+import pytest
+
+import ars_to_ard
+from ars_to_ard import main as legacy_main
+
+
+def test_write_error_does_not_mask_the_analysis_error(tmp_path, legacy_spec, data_dir,
+                                                      monkeypatch):
+    def failing_write(*args):
+        time.sleep(0.2)
+        raise OSError("disk full")
+
+    build = ars_to_ard.build_analysis_ard
+    calls = []
+
+    def build_then_fail(analysis, *args):
+        calls.append(analysis)
+        if len(calls) > 1:
+            raise ValueError("bad analysis")
+        return build(analysis, *args)
+
+    monkeypatch.setattr(ars_to_ard, "write_ard", failing_write)
+    monkeypatch.setattr(ars_to_ard, "build_analysis_ard", build_then_fail)
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(ValueError, match="bad analysis"):
+        legacy_main(["--ars", str(legacy_spec), "--data", str(data_dir), "--io-threads", "2"])
+
+
+def test_write_error_is_raised_when_nothing_else_failed(tmp_path, legacy_spec, data_dir,
+                                                        monkeypatch):
+    def failing_write(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(ars_to_ard, "write_ard", failing_write)
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(OSError, match="disk full"):
+        legacy_main(["--ars", str(legacy_spec), "--data", str(data_dir), "--io-threads", "2"])
@@ -0,0 +1,119 @@
+import csv
+import random
+
+import pytest
+
+import ars_to_ard
+from ars_to_ard import KllSketch, PreviewSummary
+from ars_to_ard import main as legacy_main
+
+EXACT_STATS = {"N", "N_MISSING", "MIN", "MAX"}
+
+
+def _run(spec, data_dir, out, monkeypatch, *extra):
+    out.mkdir(exist_ok=True)
+    monkeypatch.chdir(out)
+    legacy_main(["--ars", str(spec), "--data", str(data_dir), "--io-threads", "0", *extra])
+
+
+def _rows(out, preview=False):
+    rows = {}
+    for path in sorted(out.glob("ARD_*.csv")):
+        if path.name.endswith(".preview.csv") != preview:
+            continue
+        analysis = path.name.split(".")[0]
+        with path.open(newline="", encoding="utf-8") as handle:
+            for row in csv.DictReader(handle):
+                rows[(analysis, row.get("group1_level"), row["stat_name"])] = row
+    return rows
+
+
+@pytest.fixture
+def large_data(tmp_path):
+    rng = random.Random(7)
+    data = tmp_path / "large"
+    data.mkdir()
+    with (data / "ADSL.csv").open("w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["USUBJID", "ARM", "AGE", "SAFFL"])
+        for i in range(20000):
+            age = "" if i % 50 == 0 else round(rng.gauss(55, 10), 1)
+            writer.writerow([f"S{i}", rng.choice(["A", "B", "Placebo"]), age,
+                             "Y" if rng.random() < 0.9 else "N"])
+    return data
+
+
+@pytest.mark.parametrize("extra", [[], ["--preview-k", "8"]])
+def test_unsampled_preview_brackets_exact_mode(tmp_path, legacy_spec, data_dir, monkeypatch,
+                                               extra):
+    _run(legacy_spec, data_dir, tmp_path, monkeypatch)
+    exact_files = {p.name: p.read_bytes() for p in tmp_path.glob("ARD_*.csv")}
+    # Small inputs are read in full however low the sampling rate is.
+    _run(legacy_spec, data_dir, tmp_path, monkeypatch, "--preview", "--preview-sample", "0.01",
+         *extra)
+
+    assert {p.name: p.read_bytes() for p in tmp_path.glob("ARD_*.csv")
+            if not p.name.endswith(".preview.csv")} == exact_files
+    assert (tmp_path / "ard_timings.json").exists()
+    assert (tmp_path / "ard_timings.preview.json").exists()
+    exact, preview = _rows(tmp_path), _rows(tmp_path, preview=True)
+    assert preview.keys() == exact.keys()
+    for key, row in preview.items():
+        expected = exact[key]["stat"]
+        assert float(row["stat_lower"]) <= float(expected) <= float(row["stat_upper"])
+        if key[2] in EXACT_STATS or not extra and key[2] in {"MEDIAN", "P25", "P75", "IQR"}:
+            assert row["approximate"] == "N"
+            assert row["stat"] == row["stat_lower"] == row["stat_upper"] == expected
+
+
+def test_sampled_preview_covers_exact_mode(tmp_path, legacy_spec, large_data, monkeypatch):
+    _run(legacy_spec, large_data, tmp_path / "exact", monkeypatch)
+    _run(legacy_spec, large_data, tmp_path / "preview", monkeypatch, "--preview",
+         "--preview-sample", "0.2")
+    exact, preview = _rows(tmp_path / "exact"), _rows(tmp_path / "preview", preview=True)
+
+    assert preview.keys() == exact.keys()
+    assert {row["approximate"] for row in preview.values()} == {"Y"}
+    misses = [key for key, row in preview.items()
+              if not float(row["stat_lower"]) <= float(exact[key]["stat"])
+              <= float(row["stat_upper"])]
+    # 95% intervals: a few misses are expected, never on the one-sided extrema.
+    assert len(misses) <= len(preview) // 10
+    assert not [key for key in misses if key[2] in {"MIN", "MAX"}]
+
+
+def test_preview_does_not_depend_on_workers(tmp_path, legacy_spec, large_data, monkeypatch):
+    monkeypatch.setattr(ars_to_ard, "PREVIEW_CHUNK_VALUES", 500)
+    outputs = []
+    for index, extra in enumerate([[], ["--workers", "3", "--executor", "thread"]]):
+        out = tmp_path / str(index)
+        _run(legacy_spec, large_data, out, monkeypatch, "--preview", *extra)
+        outputs.append({p.name: p.read_bytes() for p in out.glob("ARD_*.csv")})
+    assert outputs[0] and outputs[0] == outputs[1]
+
+
+def test_merged_sketches_match_a_single_pass():
+    rng = random.Random(3)
+    values = [rng.gauss(0, 1) for _ in range(20000)]
+    truth = sorted(values)
+    single = PreviewSummary(values, 64, "single")
+    merged = PreviewSummary(values[:7000], 64, "a")
+    for start in range(7000, 20000, 6500):
+        merged.merge(PreviewSummary(values[start:start + 6500], 64, f"b{start}"))
+
+    assert (merged.n, merged.min, merged.max) == (single.n, single.min, single.max)
+    assert merged.mean == pytest.approx(single.mean, abs=1e-12)
+    assert merged.m2 == pytest.approx(single.m2, rel=1e-12)
+    assert merged.sketch.n == single.sketch.n == len(values)
+    for sketch in (single.sketch, merged.sketch):
+        eps = sketch.rank_error(0.99)
+        for prob in (0.01, 0.25, 0.5, 0.75, 0.99):
+            rank = sum(value <= sketch.quantile(prob) for value in truth) / len(truth)
+            assert abs(rank - prob) <= eps
+
+
+def test_small_sketches_are_exact_until_compacted():
+    sketch = KllSketch(16)
+    for value in range(10):
+        sketch.update(float(value))
+    assert sketch.exact and sketch.rank_error() == 0.0 and sketch.quantile(0.5) == 4.5
@@ -0,0 +1,95 @@
+import math
+
+import pandas as pd
+import pytest
+
+from ars_runtime import registry
+from ars_runtime.registry import FrameIntermediates, Statistic, plan_statistics
+
+STATS = ("n", "n_missing", "mean", "sd", "se", "var", "cv", "min", "max", "range",
+         "median", "iqr", "q1", "q3", "p90")
+GROUPS = {
+    "single": [42.0],
+    "zero_mean": [-1.0, 1.0],
+    "constant_zero": [0.0, 0.0, 0.0],
+    "with_missing": [1.0, None, 4.0, 9.5, None],
+    "all_missing": [None, None],
+    "regular": [3.5, 1.25, 8.0, 2.0, 5.5, 13.0],
+}
+
+
+def _same(a, b):
+    return (math.isnan(a) and math.isnan(b)) or a == pytest.approx(b, rel=1e-12, abs=1e-12)
+
+
+@pytest.mark.parametrize("stats", [STATS, ("sd", "cv"), ("q1", "q3"), ("median",)])
+def test_group_and_frame_paths_agree_at_the_edges(stats):
+    plan = plan_statistics(stats)
+    frame = pd.DataFrame([(g, v) for g, values in GROUPS.items() for v in values],
+                         columns=["G", "X"]).astype({"X": "float64"})
+    inter = FrameIntermediates(frame.groupby("G", dropna=False)["X"], plan)
+    by_frame = {stat.name: stat.kernel(inter) for stat in plan.statistics}
+    for group, values in GROUPS.items():
+        by_group = dict(zip(plan.labels, plan.evaluate(values)))
+        for stat in plan.statistics:
+            assert _same(float(by_frame[stat.name][group]), float(by_group[stat.name])), \
+                (group, stat.name, by_frame[stat.name][group], by_group[stat.name])
+
+
+def test_median_is_only_computed_when_read():
+    frame = pd.DataFrame({"G": ["a", "a", "b"], "X": [1.0, 2.0, 3.0]})
+    inter = FrameIntermediates(frame.groupby("G")["X"], plan_statistics(("q1", "q3")))
+    assert "median" not in vars(inter)
+
+
+@pytest.fixture
+def scratch_registry(monkeypatch):
+    monkeypatch.setattr(registry, "_REGISTRY", dict(registry._REGISTRY))
+    monkeypatch.setattr(registry, "_ALIASES", dict(registry._ALIASES))
+    monkeypatch.setattr(registry, "_FAMILIES", list(registry._FAMILIES))
+    yield registry
+    monkeypatch.undo()
+    registry._clear_caches()
+
+
+def test_registering_invalidates_resolved_names_and_plans(scratch_registry):
+    assert plan_statistics(("p95",)).needs == {"sorted"}  # resolved through the p(\d+) family
+    scratch_registry.register("p95", ["count"])(lambda i: i.n)
+    assert scratch_registry.lookup("p95").needs == {"count"}
+    assert plan_statistics(("p95",)).needs == {"count"}
+
+    scratch_registry.register_family(
+        r"top(\d+)", lambda m: Statistic(m.group(0), lambda i: i.n, frozenset(["count"])))
+    assert scratch_registry.lookup.cache_info().currsize == 0
+    assert plan_statistics.cache_info().currsize == 0
+    assert scratch_registry.lookup("top3").name == "top3"
+
+
+LABEL_ANALYSIS = {
+    "analysis_id": "LABELS", "dataset": "D", "grouping": [{"variable": "G"}],
+    "variables": [{"name": "X", "statistics": ["n", "std", "sd", "q1", "stderr", "count"]}],
+}
+
+
+def test_legacy_engine_keeps_its_historical_labels_and_single_value_spread():
+    from ars_to_ard import build_analysis_ard, normalise_stat_keyword
+
+    datasets = {"D": [{"G": "a", "X": "1.5"}]}
+    _, _, rows = build_analysis_ard(LABEL_ANALYSIS, datasets)
+    assert [(row["stat_name"], row["stat"]) for row in rows] == [
+        ("N", 1), ("STD", 0.0), ("SD", 0.0), ("P25", 1.5), ("STDERR", 0.0)]
+    assert normalise_stat_keyword("Q3") == "p75"
+
+    _, _, rows = build_analysis_ard(LABEL_ANALYSIS, datasets, canonical=True)
+    assert [row["stat_name"] for row in rows] == ["N", "SD", "Q1", "SE"]
+    assert math.isnan(rows[1]["stat"]) and math.isnan(rows[3]["stat"])
+
+
+def test_runtime_columns_use_registry_names():
+    from ars_runtime.stats import summarize
+
+    frame = pd.DataFrame({"G": ["a", "a"], "X": [1.0, 3.0]})
+    analysis = {"id": "t", "group_by": ["G"], "variable": "X",
+                "statistics": ["std", "sd", "stderr", "q1"]}
+    out = summarize({"ANALYSIS": frame}, [analysis])["t"]
+    assert list(out.columns) == ["G", "SD", "SE", "Q1"]
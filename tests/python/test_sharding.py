@@ -0,0 +1,55 @@
+import csv
+import json
+import random
+
+import pytest
+
+from ars_to_ard import main as legacy_main
+
+RUNS = [
+    [],
+    ["--workers", "3", "--executor", "thread"],
+    ["--workers", "3", "--executor", "process"],
+    ["--workers", "5", "--executor", "process"],
+]
+
+
+@pytest.fixture
+def grouped_case(tmp_path, legacy_spec):
+    rng = random.Random(11)
+    data = tmp_path / "data"
+    data.mkdir()
+    with (data / "ADSL.csv").open("w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["USUBJID", "ARM", "SEX", "AGE", "BMI", "SAFFL"])
+        for i in range(3000):
+            age = "" if i % 37 == 0 else round(rng.gauss(55, 10), 1)
+            writer.writerow([f"S{i}", rng.choice("ABCDEFG"), rng.choice("MF"), age,
+                             round(rng.uniform(18, 35), 1),
+                             "Y" if rng.random() < 0.8 else "N"])
+    spec = json.loads(legacy_spec.read_text())
+    spec["analyses"].append({
+        "analysis_id": "DM_AGE_ARM_SEX",
+        "dataset": "ADSL",
+        "population": {"where": 'SAFFL == "Y" and BMI < 30'},
+        "grouping": [{"variable": "ARM"}, {"variable": "SEX"}],
+        "variables": [{"name": "AGE"}],
+    })
+    spec_path = tmp_path / "spec.json"
+    spec_path.write_text(json.dumps(spec))
+    return spec_path, data
+
+
+@pytest.mark.parametrize("fast", [[], ["--fast-csv"]])
+def test_ard_is_identical_across_workers_and_executors(tmp_path, grouped_case, monkeypatch,
+                                                        fast):
+    spec, data = grouped_case
+    outputs = []
+    for index, extra in enumerate(RUNS):
+        out = tmp_path / f"out{index}"
+        out.mkdir()
+        monkeypatch.chdir(out)
+        legacy_main(["--ars", str(spec), "--data", str(data), *fast, *extra])
+        outputs.append({p.name: p.read_bytes() for p in out.glob("ARD_*.csv")})
+    assert len(outputs[0]) == 3
+    assert all(output == outputs[0] for output in outputs[1:])
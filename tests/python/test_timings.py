@@ -0,0 +1,44 @@
+import json
+import re
+import subprocess
+import sys
+
+import ars_cluster
+from ars_runtime.engine import run_ars
+from ars_to_ard import main as legacy_main
+
+UTC_ISO = re.compile(r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\dZ")
+
+
+def _sidecar(directory):
+    return json.loads((directory / "ard_timings.json").read_text())
+
+
+def test_sidecars_use_utc_and_raw_analysis_ids(tmp_path, legacy_spec, data_dir, simple_spec,
+                                               monkeypatch):
+    spec = json.loads(legacy_spec.read_text())
+    spec["analyses"][0]["analysis_id"] = "dm age/summary"
+    spec_path = tmp_path / "ars.json"
+    spec_path.write_text(json.dumps(spec))
+
+    legacy_out = tmp_path / "legacy"
+    legacy_out.mkdir()
+    monkeypatch.chdir(legacy_out)
+    legacy_main(["--ars", str(spec_path), "--data", str(data_dir)])
+    cluster_out = tmp_path / "cluster"
+    subprocess.run(
+        [sys.executable, ars_cluster.__file__, "coordinator", "--ars", str(spec_path),
+         "--data", str(data_dir), "--out", str(cluster_out), "--local-workers", "1"],
+        check=True, capture_output=True, timeout=120,
+    )
+    runtime_out = tmp_path / "runtime"
+    run_ars(str(simple_spec), str(data_dir), str(runtime_out))
+
+    for out in (legacy_out, cluster_out):
+        sidecar = _sidecar(out)
+        assert UTC_ISO.fullmatch(sidecar["run_datetime"])
+        assert [(a["analysis_id"], a["file"]) for a in sidecar["analyses"]] == [
+            ("dm age/summary", "ARD_DM_AGE_SUMMARY.csv"), ("DM_AGE_ALL", "ARD_DM_AGE_ALL.csv")]
+    sidecar = _sidecar(runtime_out)
+    assert UTC_ISO.fullmatch(sidecar["run_datetime"])
+    assert [a["analysis_id"] for a in sidecar["analyses"]] == ["AGE_BY_ARM"]
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from ars_runtime.validation import (
+    SchemaValidationError,
+    compiled_validator,
+    validate_metadata,
+    validate_spec,
+    validate_table,
+)
+
+METADATA = {"ENGINE": "ars_runtime", "ENGINE_VERSION": "1", "RUN_DATETIME": "2024-01-02T03:04:05Z",
+            "SEED": 1}
+
+
+def _problems(call, *args, **kwargs):
+    with pytest.raises(SchemaValidationError) as info:
+        call(*args, **kwargs)
+    return "\n".join(info.value.problems)
+
+
+def test_valid_table_passes():
+    validate_table("t", pd.DataFrame({"ARM": ["A", "B"], "N": [3, 4], "MEAN": [1.5, None],
+                                      "SD": [0.5, float("nan")]}), required=["ARM"])
+
+
+@pytest.mark.parametrize("frame,message", [
+    ({"N": ["3", "4"]}, "column 'N' has inferred type 'string', expected integer"),
+    ({"N": [3, None]}, "column 'N' has 1 null value(s)"),
+    ({"N": [3, 4], "SD": [0.5, -1.0]}, "column 'SD' has 1 value(s) below minimum 0"),
+    ({"N": [3, 4]}, "missing required column(s): ARM"),
+])
+def test_table_failures(frame, message):
+    assert message in _problems(validate_table, "t", pd.DataFrame(frame), required=["ARM"])
+
+
+def test_metadata_failures():
+    validate_metadata(METADATA)
+    assert "metadata/SEED: '1' is not of type 'integer'" in _problems(
+        validate_metadata, {**METADATA, "SEED": "1"})
+    assert "'ENGINE' is a required property" in _problems(
+        validate_metadata, {k: v for k, v in METADATA.items() if k != "ENGINE"})
+
+
+def test_spec_failures():
+    validate_spec({"version": "1", "sources": [{"name": "ADSL"}], "analyses": [{"variable": "AGE"}]})
+    problems = _problems(validate_spec, {"version": 1, "sources": [{}], "analyses": [{}]})
+    assert "version: 1 is not of type 'string'" in problems
+    assert "sources/0: 'name' is a required property" in problems
+    assert "analyses/0: 'variable' is a required property" in problems
+
+
+def test_validator_is_built_once(monkeypatch):
+    from jsonschema import validators
+
+    builds = []
+    real = validators.validator_for
+
+    def validator_for(schema, *args, **kwargs):
+        builds.append(schema.get("$id"))
+        return real(schema, *args, **kwargs)
+
+    monkeypatch.setattr(validators, "validator_for", validator_for)
+    compiled_validator.cache_clear()
+    for _ in range(3):
+        validate_metadata(METADATA)
+    assert compiled_validator("ard.schema.json") is compiled_validator("ard.schema.json")
+    assert builds.count("https://example.org/schemas/ard.schema.json") == 1